@@ -1,24 +1,1743 @@
 __version__ = "1.9.0"
 __build_date__ = "2025-05-13"
 
+import gc
+import importlib
+import logging
+import operator
+import os
+import queue
+import re
 import sys
+import time
+# 启动计时: 各阶段完成的时间点，使用 --profile-startup 启动时输出
+STARTUP_MARKS = [("开始导入", time.perf_counter())]
 import psutil
-import ctypes
+from array import array
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QListWidget, QTabWidget, QPushButton, QLabel, QMenu, 
-                             QSplitter, QCheckBox, QTextEdit, QScrollArea, QMessageBox, QListWidgetItem,QComboBox)
-from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView
-from PyQt5.QtCore import Qt, QTimer, QCoreApplication
-from PyQt5.QtGui import QFont, QTextCursor, QColor
-from pypinyin import lazy_pinyin
+                             QSplitter, QCheckBox, QTextEdit, QPlainTextEdit, QLineEdit, QScrollArea, QMessageBox, QListWidgetItem,QComboBox)
+from PyQt5.QtWidgets import QTableView, QTreeView, QHeaderView, QAbstractItemView, QSpinBox, QSlider, QFileDialog
+from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QSystemTrayIcon
+from PyQt5.QtCore import (Qt, QTimer, QCoreApplication, QAbstractTableModel, QAbstractProxyModel, QModelIndex,
+                          QAbstractItemModel,
+                          QObject, QThread, QEvent, pyqtSignal, pyqtSlot)
+from PyQt5.QtGui import QFont, QTextCursor, QTextCharFormat, QColor
 from PyQt5.QtGui import QIcon
+STARTUP_MARKS.append(("导入 PyQt5/psutil", time.perf_counter()))
+from process_core import (create_platform_backend, row_key, format_bytes, ProcessSnapshot,
+                          ProcessCollector, terminate_process_tree, BULK_ACTIONS, BulkActionResult, run_bulk_action,
+                          RULE_FIELDS, RULE_ACTIONS, ProcessRule, RuleSet, rule_from_dict, describe_rule,
+                          WATCH_METRICS, WATCH_OPERATORS, WATCH_UNITS, WATCH_ACTIONS, WatchRule,
+                          describe_watch_rule, default_state_path, load_state, save_state)
+from process_recording import SnapshotRecorder, ReplayCollector
+from process_export import EXPORT_FORMATS, SnapshotExporter, describe_export, export_recording, gather
+STARTUP_MARKS.append(("导入采集模块", time.perf_counter()))
 QCoreApplication.setApplicationVersion(__version__)
 
-# Windows API常量
-PROCESS_ALL_ACCESS = 0x1F0FFF
 
-class ProcessManager(QMainWindow):
+def mark_startup(phase):
+    """记录一个启动阶段的完成时间"""
+    STARTUP_MARKS.append((phase, time.perf_counter()))
+
+
+def startup_report():
+    """启动耗时报告: 每个阶段的耗时和距开始导入的累计时间"""
+    start = STARTUP_MARKS[0][1]
+    lines = []
+    previous = start
+    for phase, mark in STARTUP_MARKS[1:]:
+        lines.append(f"{phase:<12}{(mark - previous) * 1000:>9.1f} ms  (累计 {(mark - start) * 1000:.1f} ms)")
+        previous = mark
+    return lines
+
+
+HIDDEN_MARK = "[隐藏] "
+HIDDEN_COLOR = QColor(255, 0, 0)
+
+
+@lru_cache(maxsize=8192)
+def pinyin_of(text):
+    """返回文本的 (全拼, 拼音首字母)，均为小写，按字符串缓存"""
+    # 拼音词典加载较慢，首次搜索(或后台预热)时才导入
+    from pypinyin import lazy_pinyin
+    syllables = [p for p in lazy_pinyin(text) if p]
+    return "".join(syllables).lower(), "".join(p[0] for p in syllables).lower()
+
+
+class StringTable:
+    """字符串驻留表: 相同的进程名/窗口标题只保存一份，表格中只保存整数编号"""
+
     def __init__(self):
+        self.texts = []
+        self.sort_keys = []  # 预先计算好的排序键(小写)，同时用于搜索
+        self.pinyin = []  # (全拼, 首字母)，首次搜索时计算
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def intern(self, text):
+        """返回字符串的编号，不存在则加入"""
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = len(self.texts)
+            self.ids[text] = string_id
+            self.texts.append(text)
+            self.sort_keys.append(text.lower())
+            self.pinyin.append(None)
+        return string_id
+
+    def pinyin_at(self, string_id):
+        """返回字符串的 (全拼, 首字母)"""
+        entry = self.pinyin[string_id]
+        if entry is None:
+            entry = self.pinyin[string_id] = pinyin_of(self.texts[string_id])
+        return entry
+
+
+class ProcessTableModel(QAbstractTableModel):
+    """进程表格模型: 按列存储(数组 + 字符串编号)，每行只占几十字节"""
+
+    COLUMNS = ["PID", "进程名", "窗口标题", "CPU %", "内存(RSS)", "线程数", "读取/秒", "写入/秒", "主机"]
+    # 资源列 -> 数组属性，按数值排序
+    METRIC_COLUMNS = {3: 'cpu_percents', 4: 'rss', 5: 'threads', 6: 'read_rates', 7: 'write_rates'}
+    HOST_COLUMN = 8  # 连接了采集代理时才显示
+    # ProcessRow 字段 -> 数组属性(以 _ids 结尾的为字符串编号)
+    FIELD_ARRAYS = {'pid': 'pids', 'create_time': 'create_times', 'name': 'name_ids', 'title': 'title_ids',
+                    'hidden': 'hidden', 'user': 'user_ids', 'cpu': 'cpu_percents', 'rss': 'rss',
+                    'threads': 'threads', 'read_rate': 'read_rates', 'write_rate': 'write_rates', 'ppid': 'ppids',
+                    'host': 'host_ids'}
+
+    # 资源数据(CPU、内存等)整体更新后发出
+    metrics_updated = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.reset_storage()
+
+    def reset_storage(self):
+        """初始化列存储"""
+        self.pids = array('q')
+        self.create_times = array('d')
+        self.name_ids = array('l')
+        self.title_ids = array('l')
+        self.hidden = bytearray()
+        self.user_ids = array('l')
+        self.cpu_percents = array('d')
+        self.rss = array('q')
+        self.threads = array('l')
+        self.read_rates = array('d')
+        self.write_rates = array('d')
+        self.ppids = array('q')
+        self.host_ids = array('l')  # 主机名编号，本机进程为空字符串
+        self.strings = StringTable()
+        self.local_host_id = self.strings.intern("")
+        self.key_to_row = {}
+        self.sort_key_cache = {}
+
+    # ---- Qt 模型接口 ----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.pids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        row = index.row()
+        if role == Qt.DisplayRole:
+            column = index.column()
+            if column == 0:
+                return str(self.pids[row])
+            if column == 1:
+                name = self.strings.texts[self.name_ids[row]]
+                return HIDDEN_MARK + name if self.hidden[row] else name
+            if column == 2:
+                return self.strings.texts[self.title_ids[row]]
+            if column == self.HOST_COLUMN:
+                return self.host_at(row) or "本机"
+            return self.format_metric(column, row)
+        if role == Qt.TextAlignmentRole and index.column() in self.METRIC_COLUMNS:
+            return Qt.AlignRight | Qt.AlignVCenter
+        if role == Qt.ForegroundRole:
+            return HIDDEN_COLOR if self.hidden[row] else None
+        if role == Qt.UserRole:
+            return self.pids[row]
+        return None
+
+    def format_metric(self, column, row):
+        """资源列的显示文本"""
+        if column == 3:
+            return f"{self.cpu_percents[row]:.1f}"
+        if column == 4:
+            return format_bytes(self.rss[row])
+        if column == 5:
+            return str(self.threads[row])
+        rates = self.read_rates if column == 6 else self.write_rates
+        return format_bytes(rates[row]) + "/s"
+
+    # ---- 按行访问 ----
+    def key_at(self, row):
+        host_id = self.host_ids[row]
+        if host_id != self.local_host_id:
+            return (self.pids[row], self.create_times[row], self.strings.texts[host_id])
+        return (self.pids[row], self.create_times[row])
+
+    def iter_keys(self):
+        """按行顺序返回所有进程键(没有远程进程时直接由数组生成)"""
+        if self.host_ids.count(self.local_host_id) == len(self.host_ids):
+            return zip(self.pids, self.create_times)
+        return map(self.key_at, range(len(self.pids)))
+
+    def host_at(self, row):
+        return self.strings.texts[self.host_ids[row]]
+
+    def host_key_at(self, row):
+        """小写的主机名(搜索用)"""
+        return self.strings.sort_keys[self.host_ids[row]]
+
+    def pid_at(self, row):
+        return self.pids[row]
+
+    def name_at(self, row):
+        return self.strings.texts[self.name_ids[row]]
+
+    def title_at(self, row):
+        return self.strings.texts[self.title_ids[row]]
+
+    def is_hidden_at(self, row):
+        return bool(self.hidden[row])
+
+    def name_key_at(self, row):
+        """小写的进程名(搜索用)"""
+        return self.strings.sort_keys[self.name_ids[row]]
+
+    def title_key_at(self, row):
+        """小写的窗口标题(搜索用)"""
+        return self.strings.sort_keys[self.title_ids[row]]
+
+    def name_pinyin_at(self, row):
+        """进程名的 (全拼, 首字母)"""
+        return self.strings.pinyin_at(self.name_ids[row])
+
+    def user_at(self, row):
+        return self.strings.texts[self.user_ids[row]]
+
+    def user_key_at(self, row):
+        """小写的用户名(搜索用)"""
+        return self.strings.sort_keys[self.user_ids[row]]
+
+    def sort_keys(self, column):
+        """返回与源行对齐的排序键序列(缓存到下一次数据变化)"""
+        if column in self.METRIC_COLUMNS:
+            return getattr(self, self.METRIC_COLUMNS[column])
+        keys = self.sort_key_cache.get(column)
+        if keys is None:
+            if column == 0:
+                keys = self.pids
+            else:
+                ids = {1: self.name_ids, 2: self.title_ids}.get(column, self.host_ids)
+                string_keys = self.strings.sort_keys
+                keys = [string_keys[i] for i in ids]
+            self.sort_key_cache[column] = keys
+        return keys
+
+    # ---- 快照差异 ----
+    def diff(self, new_rows):
+        """比较新快照与表格中的数据，返回 (新增行, 结束键, 变化行)"""
+        key_to_row = self.key_to_row
+        texts = self.strings.texts
+        added = []
+        changed = []
+        for key, process_row in new_rows.items():
+            row = key_to_row.get(key)
+            if row is None:
+                added.append(process_row)
+            elif (texts[self.name_ids[row]] != process_row.name
+                  or texts[self.title_ids[row]] != process_row.title
+                  or self.hidden[row] != process_row.hidden):
+                changed.append(process_row)
+        removed = [key for key in key_to_row if key not in new_rows]
+        return added, removed, changed
+
+    def apply_diff(self, added, removed, changed):
+        """把快照差异应用到表格，只发出受影响行的信号"""
+        intern = self.strings.intern
+        self.sort_key_cache = {}
+
+        if removed:
+            rows = sorted(self.key_to_row[key] for key in removed)
+            # 从后往前按连续区间删除
+            end = len(rows) - 1
+            while end >= 0:
+                start = end
+                while start > 0 and rows[start - 1] == rows[start] - 1:
+                    start -= 1
+                first, last = rows[start], rows[end]
+                self.beginRemoveRows(QModelIndex(), first, last)
+                for column in (self.pids, self.create_times, self.name_ids, self.title_ids, self.hidden,
+                               self.user_ids, self.cpu_percents, self.rss, self.threads,
+                               self.read_rates, self.write_rates, self.ppids, self.host_ids):
+                    del column[first:last + 1]
+                self.endRemoveRows()
+                end = start - 1
+            self.key_to_row = dict(zip(self.iter_keys(), range(len(self.pids))))
+
+        for process_row in changed:
+            row = self.key_to_row[row_key(process_row)]
+            self.name_ids[row] = intern(process_row.name)
+            self.title_ids[row] = intern(process_row.title)
+            self.hidden[row] = process_row.hidden
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+
+        if added:
+            first = len(self.pids)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for row, process_row in enumerate(added, first):
+                self.pids.append(process_row.pid)
+                self.create_times.append(process_row.create_time)
+                self.name_ids.append(intern(process_row.name))
+                self.title_ids.append(intern(process_row.title))
+                self.hidden.append(process_row.hidden)
+                self.user_ids.append(intern(process_row.user))
+                self.cpu_percents.append(process_row.cpu)
+                self.rss.append(process_row.rss)
+                self.threads.append(process_row.threads)
+                self.read_rates.append(process_row.read_rate)
+                self.write_rates.append(process_row.write_rate)
+                self.ppids.append(process_row.ppid)
+                self.host_ids.append(intern(process_row.host))
+                self.key_to_row[row_key(process_row)] = row
+            self.endInsertRows()
+
+        # 已结束进程的标题不再使用时压缩字符串表
+        if len(self.strings) > 4 * len(self.pids) + 1024:
+            self.compact_strings()
+
+    def apply_metrics(self, new_rows):
+        """整体更新资源数据(每次快照都会变化，不逐行发信号)"""
+        key_to_row = self.key_to_row
+        cpu_percents = self.cpu_percents
+        rss = self.rss
+        threads = self.threads
+        read_rates = self.read_rates
+        write_rates = self.write_rates
+        ppids = self.ppids
+        for key, process_row in new_rows.items():
+            row = key_to_row.get(key)
+            if row is not None:
+                cpu_percents[row] = process_row.cpu
+                rss[row] = process_row.rss
+                threads[row] = process_row.threads
+                read_rates[row] = process_row.read_rate
+                write_rates[row] = process_row.write_rate
+                ppids[row] = process_row.ppid
+        self.metrics_updated.emit()
+
+    def export_columns(self, rows):
+        """按 ProcessRow 字段取出这些行的各列(导出用)，字符串列转换为文本"""
+        texts = self.strings.texts
+        columns = []
+        for field, attribute in self.FIELD_ARRAYS.items():
+            values = gather(getattr(self, attribute), rows)
+            if attribute.endswith('_ids'):
+                values = gather(texts, values)
+            elif field == 'hidden':
+                values = tuple(map(bool, values))
+            columns.append(values)
+        return tuple(columns)
+
+    def compact_strings(self):
+        """重建字符串表，只保留仍在使用的字符串"""
+        old_texts = self.strings.texts
+        strings = StringTable()
+        self.name_ids = array('l', (strings.intern(old_texts[i]) for i in self.name_ids))
+        self.title_ids = array('l', (strings.intern(old_texts[i]) for i in self.title_ids))
+        self.user_ids = array('l', (strings.intern(old_texts[i]) for i in self.user_ids))
+        self.host_ids = array('l', (strings.intern(old_texts[i]) for i in self.host_ids))
+        self.local_host_id = strings.intern("")
+        self.strings = strings
+        self.sort_key_cache = {}
+
+    def clear(self):
+        """清空表格"""
+        self.beginResetModel()
+        self.reset_storage()
+        self.endResetModel()
+
+
+class ProcessSortFilterProxyModel(QAbstractProxyModel):
+    """排序/过滤代理模型
+
+    直接用源模型预先计算好的排序键一次性排序(sorted + key)，
+    不像 QSortFilterProxyModel 那样每次比较都回调 Python 的 data()。
+    过滤结果按 (pid, create_time) 缓存，数据变化的行才重新判断。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sort_column = 0
+        self.sort_order = Qt.AscendingOrder
+        self.filter_func = None  # filter_func(源模型, 源行号) -> bool
+        self.filter_cache = {}
+        self.proxy_to_source = []
+        self.source_to_proxy = array('l')
+        self.batch_depth = 0
+        self.saved_persistent = []
+        self.probes = None  # PerfProbes，性能页打开时记录过滤和排序耗时
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        model.rowsAboutToBeInserted.connect(self.on_source_about_to_change)
+        model.rowsAboutToBeRemoved.connect(self.on_source_about_to_change)
+        model.modelAboutToBeReset.connect(self.on_source_about_to_change)
+        model.layoutAboutToBeChanged.connect(self.on_source_about_to_change)
+        model.rowsInserted.connect(self.on_source_changed)
+        model.rowsRemoved.connect(self.on_source_changed)
+        model.modelReset.connect(self.on_source_changed)
+        model.layoutChanged.connect(self.on_source_changed)
+        model.dataChanged.connect(self.on_source_data_changed)
+        model.metrics_updated.connect(self.on_source_metrics_updated)
+        self.rebuild_mapping()
+        self.endResetModel()
+
+    # ---- Qt 代理接口 ----
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not 0 <= row < len(self.proxy_to_source):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.proxy_to_source)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self.proxy_to_source[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = self.source_to_proxy[source_index.row()]
+        return self.createIndex(row, source_index.column()) if row >= 0 else QModelIndex()
+
+    def data(self, index, role=Qt.DisplayRole):
+        return self.sourceModel().data(self.mapToSource(index), role)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal:
+            return self.sourceModel().headerData(section, orientation, role)
+        if role == Qt.DisplayRole:
+            return section + 1
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.begin_layout_change()
+        self.sort_column = column
+        self.sort_order = order
+        self.end_layout_change()
+
+    # ---- 过滤 ----
+    def set_filter(self, filter_func, keep=None):
+        """设置过滤函数(None 表示不过滤)并重新过滤
+
+        keep=False: 新条件比旧条件更严格，之前不匹配的行无需重新判断
+        keep=True: 新条件比旧条件更宽松，之前匹配的行无需重新判断
+        """
+        self.begin_layout_change()
+        self.filter_func = filter_func
+        if keep is None or filter_func is None:
+            self.filter_cache = {}
+        else:
+            self.filter_cache = {key: matched for key, matched in self.filter_cache.items() if matched == keep}
+        self.end_layout_change()
+
+    def source_row(self, proxy_row):
+        return self.proxy_to_source[proxy_row]
+
+    # ---- 批量更新 ----
+    def begin_batch(self):
+        """开始批量更新源模型: 期间的源信号合并为一次布局变化"""
+        if self.batch_depth == 0:
+            self.begin_layout_change()
+        self.batch_depth += 1
+
+    def end_batch(self):
+        self.batch_depth -= 1
+        if self.batch_depth == 0:
+            self.end_layout_change()
+
+    def on_source_about_to_change(self, *args):
+        if self.batch_depth == 0:
+            self.begin_layout_change()
+
+    def on_source_changed(self, *args):
+        if self.batch_depth == 0:
+            self.end_layout_change()
+
+    def on_source_data_changed(self, top_left, bottom_right, roles=()):
+        source = self.sourceModel()
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self.filter_cache.pop(source.key_at(row), None)
+        if self.batch_depth == 0:
+            self.begin_layout_change()
+            self.end_layout_change()
+
+    def on_source_metrics_updated(self):
+        """资源数据更新: 过滤条件或排序列用到资源字段时重新过滤/排序，否则只重绘资源列"""
+        metric_columns = self.sourceModel().METRIC_COLUMNS
+        refilter = getattr(self.filter_func, 'uses_metrics', False)
+        if refilter or self.sort_column in metric_columns:
+            if self.batch_depth == 0:
+                self.begin_layout_change()
+            if refilter:
+                self.filter_cache = {}
+            if self.batch_depth == 0:
+                self.end_layout_change()
+        elif self.batch_depth == 0 and self.proxy_to_source:
+            self.dataChanged.emit(self.index(0, min(metric_columns)),
+                                  self.index(len(self.proxy_to_source) - 1, max(metric_columns)))
+
+    def begin_layout_change(self):
+        """通知视图布局将要变化，按进程键记录持久索引(选中行等)"""
+        self.layoutAboutToBeChanged.emit()
+        source = self.sourceModel()
+        self.saved_persistent = [
+            (index, source.key_at(self.proxy_to_source[index.row()]), index.column())
+            for index in self.persistentIndexList()
+        ]
+
+    def end_layout_change(self):
+        """重建映射，把持久索引迁移到进程的新位置"""
+        self.rebuild_mapping()
+        key_to_row = self.sourceModel().key_to_row
+        old_indexes = []
+        new_indexes = []
+        for index, key, column in self.saved_persistent:
+            source_row = key_to_row.get(key)
+            proxy_row = self.source_to_proxy[source_row] if source_row is not None else -1
+            old_indexes.append(index)
+            new_indexes.append(self.createIndex(proxy_row, column) if proxy_row >= 0 else QModelIndex())
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.saved_persistent = []
+        self.layoutChanged.emit()
+
+    def rebuild_mapping(self):
+        """过滤并排序，重建 代理行 <-> 源行 映射"""
+        source = self.sourceModel()
+        count = source.rowCount()
+        rows = range(count)
+        probes = self.probes
+        timed = probes is not None and probes.enabled
+        if timed:
+            start = time.perf_counter()
+        if self.filter_func is not None:
+            cache = self.filter_cache
+            if len(cache) > 2 * count + 1024:
+                cache.clear()
+            filter_func = self.filter_func
+            accepted = []
+            for row in rows:
+                key = source.key_at(row)
+                matched = cache.get(key)
+                if matched is None:
+                    matched = cache[key] = filter_func(source, row)
+                if matched:
+                    accepted.append(row)
+            rows = accepted
+            if timed:
+                filtered = time.perf_counter()
+                probes.record('filter', filtered - start)
+                start = filtered
+        sort_keys = source.sort_keys(self.sort_column)
+        self.proxy_to_source = sorted(rows, key=sort_keys.__getitem__,
+                                      reverse=self.sort_order == Qt.DescendingOrder)
+        if timed:
+            probes.record('sort', time.perf_counter() - start)
+        mapping = array('l', [-1]) * count
+        for proxy_row, source_row in enumerate(self.proxy_to_source):
+            mapping[source_row] = proxy_row
+        self.source_to_proxy = mapping
+
+
+# 进程树: parents[行] 为父节点行号(-1 表示根)，children 只包含有子节点的行
+ProcessTree = namedtuple('ProcessTree', ['parents', 'children', 'roots', 'positions', 'subtree_cpu', 'subtree_rss'])
+
+
+def build_process_tree(pids, ppids, create_times, cpu_percents, rss, visible_rows=None, hosts=None):
+    """由 ppid 索引构建进程树并汇总子树的CPU和内存，整体为 O(n)
+
+    父进程的创建时间晚于子进程说明PID已被复用，此时视为根节点。
+    visible_rows 不为 None 时只保留这些行及其祖先(汇总值仍包含整棵子树)。
+    hosts 为每行的主机编号，有多个主机时只在同一主机内查找父进程。
+    """
+    count = len(pids)
+    if hosts is not None and count and hosts.count(hosts[0]) != count:
+        row_of_pid = dict(zip(zip(hosts, pids), range(count)))
+        parent_keys = list(zip(hosts, ppids))
+    else:
+        row_of_pid = dict(zip(pids, range(count)))
+        parent_keys = ppids
+    parents = array('l', [-1]) * count
+    children = {}
+    roots = []
+    for row in range(count):
+        parent = row_of_pid.get(parent_keys[row], -1)
+        if parent >= 0 and parent != row and create_times[parent] <= create_times[row]:
+            parents[row] = parent
+            siblings = children.get(parent)
+            if siblings is None:
+                children[parent] = [row]
+            else:
+                siblings.append(row)
+        else:
+            roots.append(row)
+
+    # 广度优先得到自顶向下的顺序；环上的节点从根不可达，断开后作为根
+    order = list(roots)
+    visited = bytearray(count)
+    for row in roots:
+        visited[row] = 1
+    index = 0
+    for row in range(count + 1):
+        while index < len(order):
+            for child in children.get(order[index], ()):
+                if not visited[child]:
+                    visited[child] = 1
+                    order.append(child)
+            index += 1
+        if len(order) == count or row == count:
+            break
+        if not visited[row]:
+            siblings = children[parents[row]]
+            siblings.remove(row)
+            if not siblings:
+                del children[parents[row]]
+            parents[row] = -1
+            roots.append(row)
+            visited[row] = 1
+            order.append(row)
+
+    # 自底向上汇总子树资源
+    subtree_cpu = array('d', cpu_percents)
+    subtree_rss = array('q', rss)
+    for row in reversed(order):
+        parent = parents[row]
+        if parent >= 0:
+            subtree_cpu[parent] += subtree_cpu[row]
+            subtree_rss[parent] += subtree_rss[row]
+
+    if visible_rows is not None:
+        # 保留匹配的行及其祖先
+        keep = bytearray(count)
+        for row in visible_rows:
+            while row >= 0 and not keep[row]:
+                keep[row] = 1
+                row = parents[row]
+        roots = [row for row in roots if keep[row]]
+        children = {parent: kept for parent, rows in children.items() if keep[parent]
+                    for kept in ([row for row in rows if keep[row]],) if kept}
+
+    positions = array('l', [0]) * count
+    for position, row in enumerate(roots):
+        positions[row] = position
+    for rows in children.values():
+        for position, row in enumerate(rows):
+            positions[row] = position
+    return ProcessTree(parents, children, roots, positions, subtree_cpu, subtree_rss)
+
+
+class ProcessTreeModel(QAbstractItemModel):
+    """进程树模型: 节点即表格模型的源行号，子节点只在展开时才被视图查询"""
+
+    COLUMNS = ["进程名", "PID", "窗口标题", "子树CPU %", "子树内存"]
+
+    def __init__(self, source_model, parent=None):
+        super().__init__(parent)
+        self.source = source_model
+        self.tree = build_process_tree((), (), (), (), ())
+
+    def rebuild(self, visible_rows=None):
+        """按表格模型的当前数据重建进程树"""
+        source = self.source
+        self.beginResetModel()
+        self.tree = build_process_tree(source.pids, source.ppids, source.create_times,
+                                       source.cpu_percents, source.rss, visible_rows, source.host_ids)
+        self.endResetModel()
+
+    def index_of_row(self, row, column=0):
+        """源行号对应的树节点索引"""
+        if row is None or not 0 <= row < len(self.tree.parents):
+            return QModelIndex()
+        return self.createIndex(self.tree.positions[row], column, row)
+
+    def row_of(self, index):
+        return index.internalId()
+
+    # ---- Qt 模型接口 ----
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid():
+            rows = self.tree.children.get(parent.internalId(), ())
+        else:
+            rows = self.tree.roots
+        if not 0 <= row < len(rows):
+            return QModelIndex()
+        return self.createIndex(row, column, rows[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        parent = self.tree.parents[index.internalId()]
+        if parent < 0:
+            return QModelIndex()
+        return self.createIndex(self.tree.positions[parent], 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.tree.roots)
+        if parent.column() > 0:
+            return 0
+        return len(self.tree.children.get(parent.internalId(), ()))
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.tree.roots)
+        return parent.column() == 0 and parent.internalId() in self.tree.children
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        row = index.internalId()
+        source = self.source
+        if role == Qt.DisplayRole:
+            column = index.column()
+            if column == 0:
+                name = source.name_at(row)
+                return HIDDEN_MARK + name if source.hidden[row] else name
+            if column == 1:
+                return str(source.pids[row])
+            if column == 2:
+                return source.title_at(row)
+            if column == 3:
+                return f"{self.tree.subtree_cpu[row]:.1f}"
+            return format_bytes(self.tree.subtree_rss[row])
+        if role == Qt.TextAlignmentRole and index.column() >= 3:
+            return Qt.AlignRight | Qt.AlignVCenter
+        if role == Qt.ForegroundRole:
+            return HIDDEN_COLOR if source.hidden[row] else None
+        if role == Qt.UserRole:
+            return source.pids[row]
+        return None
+
+
+# 进程分组: 每组为同一主机上同名的进程，members[组] 为组内的源行号
+ProcessGroups = namedtuple('ProcessGroups', ['first_rows', 'members', 'cpu', 'rss', 'group_of_row'])
+
+
+def build_process_groups(name_ids, host_ids, cpu_percents, rss, visible_rows=None):
+    """按 (主机, 进程名) 对各行做一次哈希聚合，同时累加每组的CPU和内存，整体为 O(n)
+
+    visible_rows 不为 None 时只聚合这些行；group_of_row[行] 为所在组，不在任何组中为 -1。
+    """
+    count = len(name_ids)
+    rows = range(count) if visible_rows is None else visible_rows
+    # 只有一个主机时直接以进程名编号为键，不必为每行创建元组
+    keys = name_ids if not count or host_ids.count(host_ids[0]) == count else list(zip(host_ids, name_ids))
+    group_index = {}
+    first_rows = []
+    members = []
+    group_cpu = array('d')
+    group_rss = array('q')
+    group_of_row = array('l', [-1]) * count
+    for row in rows:
+        group = group_index.get(keys[row])
+        if group is None:
+            group = group_index[keys[row]] = len(first_rows)
+            first_rows.append(row)
+            members.append([row])
+            group_cpu.append(cpu_percents[row])
+            group_rss.append(rss[row])
+        else:
+            members[group].append(row)
+            group_cpu[group] += cpu_percents[row]
+            group_rss[group] += rss[row]
+        group_of_row[row] = group
+    return ProcessGroups(first_rows, members, group_cpu, group_rss, group_of_row)
+
+
+class ProcessGroupModel(QAbstractItemModel):
+    """按进程名分组的模型: 顶层每组一行(实例数、CPU和内存合计、合并的窗口标题)，
+    组内的进程行在分组展开时才排序生成
+
+    internalId 为源行号表示进程行，为 GROUP_ID_BASE + 组号表示分组行。
+    """
+
+    COLUMNS = ["进程名", "实例数/PID", "CPU %", "内存", "窗口标题"]
+    GROUP_ID_BASE = 1 << 30
+    MAX_GROUP_TITLES = 5  # 分组行最多合并显示的窗口标题数
+
+    def __init__(self, source_model, parent=None):
+        super().__init__(parent)
+        self.source = source_model
+        self.groups = build_process_groups((), (), (), ())
+        self.order = []  # 显示顺序 -> 组号
+        self.positions = array('l')  # 组号 -> 显示位置
+        self.children = {}  # 组号 -> 排好序的成员行(展开后才生成)
+        self.child_positions = {}  # 源行号 -> 在组内的位置
+        self.group_titles = {}  # 组号 -> 合并的窗口标题(显示时才生成)
+        self.sort_column = 1
+        self.sort_order = Qt.DescendingOrder
+        self.group_font = QFont()
+        self.group_font.setBold(True)
+
+    def rebuild(self, visible_rows=None):
+        """按表格模型的当前数据重新分组"""
+        source = self.source
+        self.beginResetModel()
+        self.groups = build_process_groups(source.name_ids, source.host_ids, source.cpu_percents, source.rss,
+                                           visible_rows)
+        self.children = {}
+        self.child_positions = {}
+        self.group_titles = {}
+        self.order_groups()
+        self.endResetModel()
+
+    def group_sort_key(self, column):
+        """分组行的排序键函数(组号 -> 键)"""
+        groups = self.groups
+        if column == 0:
+            name_key_at = self.source.name_key_at
+            return lambda group: name_key_at(groups.first_rows[group])
+        if column == 1:
+            return lambda group: len(groups.members[group])
+        if column == 2:
+            return groups.cpu.__getitem__
+        if column == 3:
+            return groups.rss.__getitem__
+        return self.titles_of
+
+    def row_sort_key(self, column):
+        """组内进程行的排序键函数(源行号 -> 键)"""
+        source = self.source
+        if column == 2:
+            return source.cpu_percents.__getitem__
+        if column == 3:
+            return source.rss.__getitem__
+        if column == 4:
+            return source.title_key_at
+        return source.pids.__getitem__
+
+    def order_groups(self):
+        self.order = sorted(range(len(self.groups.members)), key=self.group_sort_key(self.sort_column),
+                            reverse=self.sort_order == Qt.DescendingOrder)
+        positions = array('l', [0]) * len(self.order)
+        for position, group in enumerate(self.order):
+            positions[group] = position
+        self.positions = positions
+
+    def children_of(self, group):
+        """分组展开时才按当前排序方式生成组内的进程行"""
+        rows = self.children.get(group)
+        if rows is None:
+            rows = self.children[group] = sorted(self.groups.members[group], key=self.row_sort_key(self.sort_column),
+                                                 reverse=self.sort_order == Qt.DescendingOrder)
+            for position, row in enumerate(rows):
+                self.child_positions[row] = position
+        return rows
+
+    def titles_of(self, group):
+        """组内各进程不重复的窗口标题，超过 MAX_GROUP_TITLES 个时只显示前几个"""
+        text = self.group_titles.get(group)
+        if text is None:
+            source = self.source
+            title_ids = dict.fromkeys(source.title_ids[row] for row in self.groups.members[group])
+            titles = [source.strings.texts[title_id] for title_id in title_ids if source.strings.texts[title_id]]
+            text = ", ".join(titles[:self.MAX_GROUP_TITLES])
+            if len(titles) > self.MAX_GROUP_TITLES:
+                text += f" 等{len(titles)}个"
+            self.group_titles[group] = text
+        return text
+
+    def group_of(self, index):
+        """分组行的组号，进程行返回 None"""
+        node = index.internalId()
+        return node - self.GROUP_ID_BASE if index.isValid() and node >= self.GROUP_ID_BASE else None
+
+    def row_of(self, index):
+        """进程行的源行号，分组行返回 None"""
+        node = index.internalId()
+        return node if index.isValid() and node < self.GROUP_ID_BASE else None
+
+    def group_rows(self, group):
+        return self.groups.members[group]
+
+    def group_name(self, group):
+        """分组的显示名: 远程主机的分组带上主机名"""
+        row = self.groups.first_rows[group]
+        host = self.source.host_at(row)
+        name = self.source.name_at(row)
+        return f"{name} ({host})" if host else name
+
+    def index_of_group(self, group, column=0):
+        if group is None or not 0 <= group < len(self.order):
+            return QModelIndex()
+        return self.createIndex(self.positions[group], column, self.GROUP_ID_BASE + group)
+
+    def index_of_row(self, row, column=0):
+        """源行号对应的进程行索引(不在任何分组中时为无效索引)"""
+        if row is None or not 0 <= row < len(self.groups.group_of_row) or self.groups.group_of_row[row] < 0:
+            return QModelIndex()
+        if row not in self.child_positions:
+            self.children_of(self.groups.group_of_row[row])
+        return self.createIndex(self.child_positions[row], column, row)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """重新排列分组和已展开的组内进程行，保持展开状态和选中行"""
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        self.sort_column = column
+        self.sort_order = order
+        self.order_groups()
+        expanded = list(self.children)
+        self.children = {}
+        self.child_positions = {}
+        for group in expanded:
+            self.children_of(group)
+        new_indexes = [self.index_of_group(self.group_of(index), index.column()) if self.group_of(index) is not None
+                       else self.index_of_row(self.row_of(index), index.column()) for index in old_indexes]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    # ---- Qt 模型接口 ----
+    def index(self, row, column, parent=QModelIndex()):
+        if not parent.isValid():
+            if not 0 <= row < len(self.order):
+                return QModelIndex()
+            return self.createIndex(row, column, self.GROUP_ID_BASE + self.order[row])
+        group = self.group_of(parent)
+        if group is None:
+            return QModelIndex()
+        rows = self.children_of(group)
+        if not 0 <= row < len(rows):
+            return QModelIndex()
+        return self.createIndex(row, column, rows[row])
+
+    def parent(self, index=QModelIndex()):
+        row = self.row_of(index)
+        if row is None:
+            return QModelIndex()
+        return self.index_of_group(self.groups.group_of_row[row])
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.order)
+        group = self.group_of(parent)
+        if group is None or parent.column() > 0:
+            return 0
+        return len(self.groups.members[group])
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.order)
+        return parent.column() == 0 and self.group_of(parent) is not None
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        source = self.source
+        group = self.group_of(index)
+        column = index.column()
+        if len(self.groups.group_of_row) != len(source.pids):
+            # 源模型已变化而尚未重新分组(重新分组在下一轮事件中进行)
+            return None
+        if group is not None:
+            if role == Qt.DisplayRole:
+                if column == 0:
+                    return self.group_name(group)
+                if column == 1:
+                    return str(len(self.groups.members[group]))
+                if column == 2:
+                    return f"{self.groups.cpu[group]:.1f}"
+                if column == 3:
+                    return format_bytes(self.groups.rss[group])
+                return self.titles_of(group)
+            if role == Qt.TextAlignmentRole and 1 <= column <= 3:
+                return Qt.AlignRight | Qt.AlignVCenter
+            if role == Qt.FontRole and column == 0:
+                return self.group_font
+            return None
+
+        row = index.internalId()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                name = source.name_at(row)
+                return HIDDEN_MARK + name if source.hidden[row] else name
+            if column == 1:
+                return str(source.pids[row])
+            if column == 2:
+                return f"{source.cpu_percents[row]:.1f}"
+            if column == 3:
+                return format_bytes(source.rss[row])
+            return source.title_at(row)
+        if role == Qt.TextAlignmentRole and 1 <= column <= 3:
+            return Qt.AlignRight | Qt.AlignVCenter
+        if role == Qt.ForegroundRole:
+            return HIDDEN_COLOR if source.hidden[row] else None
+        if role == Qt.UserRole:
+            return source.pids[row]
+        return None
+
+
+class QueryError(ValueError):
+    """查询语法错误"""
+
+
+# 查询项: [-|!][字段 运算符]值，值可以是 "带空格的文本" 或 /正则/标志
+QUERY_TERM_RE = re.compile(r'''
+    \s*
+    (?P<negate>[-!])?
+    (?:(?P<field>[A-Za-z_]+)(?P<op>>=|<=|!=|==|=|>|<|:))?
+    (?P<value>"[^"]*"|/(?:\\.|[^/\\])+/[a-z]*|\S+)
+''', re.VERBOSE)
+
+QUERY_SIZE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([kmg]?)b?%?')
+QUERY_SIZE_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+# 文本字段: 字段名 -> (小写文本访问方法, 原始文本访问方法)
+QUERY_TEXT_FIELDS = {
+    'name': ('name_key_at', 'name_at'),
+    'title': ('title_key_at', 'title_at'),
+    'user': ('user_key_at', 'user_at'),
+    'host': ('host_key_at', 'host_at'),
+}
+# 数值字段: 字段名 -> 模型中的数组属性
+QUERY_NUMBER_FIELDS = {'pid': 'pids', 'cpu': 'cpu_percents', 'rss': 'rss', 'mem': 'rss', 'threads': 'threads',
+                       'read': 'read_rates', 'write': 'write_rates'}
+QUERY_SIZE_FIELDS = {'rss', 'mem', 'read', 'write'}
+QUERY_METRIC_FIELDS = {'cpu', 'rss', 'mem', 'threads', 'read', 'write'}
+QUERY_REGEX_FLAGS = {'i': re.IGNORECASE, 'm': re.MULTILINE, 's': re.DOTALL}
+QUERY_OPERATORS = {
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+    '=': operator.eq, '==': operator.eq, ':': operator.eq, '!=': operator.ne,
+}
+
+
+def query_help_text():
+    """查询语法说明(字段列表取自 QUERY_TEXT_FIELDS / QUERY_NUMBER_FIELDS / QUERY_SIZE_FIELDS)"""
+    size_fields = [field for field in QUERY_NUMBER_FIELDS if field in QUERY_SIZE_FIELDS]
+    return ("查询语法示例: name:chrome cpu>20 rss>500M user:svc title:/error/i -name:helper\n"
+            f"字段: {', '.join(QUERY_TEXT_FIELDS)} (: 包含, = 等于, != 不等于, /正则/i)\n"
+            f"      {', '.join(QUERY_NUMBER_FIELDS)} (> >= < <= = !=，"
+            f"{', '.join(size_fields)} 支持 K/M/G 单位)\n"
+            "多个条件同时满足，前加 - 表示取反，不带字段的词按普通搜索匹配")
+
+
+def make_text_matcher(search_text, exact_match):
+    """普通搜索: 匹配进程名、窗口标题、拼音全拼或拼音首字母(search_text 需为小写)"""
+
+    def matches(model, row):
+        process_name = model.name_key_at(row)
+        window_titles = model.title_key_at(row)
+        
+        # 检查匹配条件
+        if exact_match:
+            return (search_text == process_name or 
+                    search_text == window_titles)
+        # 模糊匹配：进程名、窗口标题、拼音全拼或拼音首字母
+        if search_text in process_name or search_text in window_titles:
+            return True
+        full_pinyin, pinyin_initials = model.name_pinyin_at(row)
+        return search_text in pinyin_initials or search_text in full_pinyin
+
+    return matches
+
+
+def parse_query(text):
+    """把查询文本拆分为 (是否取反, 字段, 运算符, 值) 列表"""
+    terms = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = QUERY_TERM_RE.match(text, pos)
+        if not match:
+            raise QueryError(f"无法解析: {text[pos:]}")
+        pos = match.end()
+        field = match.group('field')
+        terms.append((bool(match.group('negate')), field.lower() if field else None,
+                      match.group('op'), match.group('value')))
+    return terms
+
+
+def parse_query_number(field, value):
+    """解析数值，内存字段支持 K/M/G 单位"""
+    match = QUERY_SIZE_RE.fullmatch(value.lower())
+    if not match or (match.group(2) and field not in QUERY_SIZE_FIELDS):
+        raise QueryError(f"{field} 需要数值: {value}")
+    return float(match.group(1)) * QUERY_SIZE_UNITS[match.group(2)]
+
+
+def compile_query_term(field, op, value):
+    """编译单个查询项，返回 (代价, 判断函数)；代价低的先判断"""
+    if field is None:
+        if value.startswith('"') and value.endswith('"') and len(value) > 1:
+            value = value[1:-1]
+        return 4, make_text_matcher(value.lower(), False)
+
+    if field in QUERY_NUMBER_FIELDS:
+        compare = QUERY_OPERATORS[op]
+        number = parse_query_number(field, value)
+        column = operator.attrgetter(QUERY_NUMBER_FIELDS[field])
+        return 0, lambda model, row: compare(column(model)[row], number)
+
+    if field not in QUERY_TEXT_FIELDS:
+        raise QueryError(f"未知字段: {field}")
+    if op not in (':', '=', '==', '!='):
+        raise QueryError(f"{field} 不支持运算符 {op}")
+    key_at, text_at = (getattr(ProcessTableModel, name) for name in QUERY_TEXT_FIELDS[field])
+
+    if value.startswith('/') and value.rfind('/') > 0:
+        # 正则在原始文本上匹配
+        end = value.rfind('/')
+        flags = 0
+        for flag in value[end + 1:]:
+            if flag not in QUERY_REGEX_FLAGS:
+                raise QueryError(f"不支持的正则标志: {flag}")
+            flags |= QUERY_REGEX_FLAGS[flag]
+        try:
+            search = re.compile(value[1:end], flags).search
+        except re.error as e:
+            raise QueryError(f"正则表达式错误: {e}")
+        if op == '!=':
+            return 3, lambda model, row: search(text_at(model, row)) is None
+        return 3, lambda model, row: search(text_at(model, row)) is not None
+
+    if value.startswith('"') and value.endswith('"') and len(value) > 1:
+        value = value[1:-1]
+    value = value.lower()
+    if op == ':':
+        return 2, lambda model, row: value in key_at(model, row)
+    if op == '!=':
+        return 1, lambda model, row: key_at(model, row) != value
+    return 1, lambda model, row: key_at(model, row) == value
+
+
+@lru_cache(maxsize=64)
+def compile_query(text):
+    """把查询文本编译为过滤函数 matches(model, row)，各项之间为"与"关系
+
+    例: name:chrome cpu>20 rss>500M user:svc title:/error/i -name:helper
+    """
+    terms = []
+    uses_metrics = False
+    for negate, field, op, value in parse_query(text):
+        cost, predicate = compile_query_term(field, op, value)
+        if negate:
+            predicate = (lambda predicate: lambda model, row: not predicate(model, row))(predicate)
+        terms.append((cost, predicate))
+        uses_metrics = uses_metrics or field in QUERY_METRIC_FIELDS
+    terms.sort(key=operator.itemgetter(0))
+    predicates = tuple(predicate for cost, predicate in terms)
+
+    if len(predicates) == 1:
+        matches = predicates[0]
+    else:
+        def matches(model, row):
+            for predicate in predicates:
+                if not predicate(model, row):
+                    return False
+            return True
+    # 过滤函数是否依赖随快照变化的资源字段(每次刷新都需要重新过滤)
+    matches.uses_metrics = uses_metrics
+    return matches
+
+
+class CollectorWorker(QObject):
+    """运行在采集线程中的工作对象，结果通过信号交给界面线程"""
+
+    snapshot_ready = pyqtSignal(object)
+    details_ready = pyqtSignal(object, object, str)  # 进程键, 详细信息, 错误信息
+
+    def __init__(self, collector):
+        super().__init__()
+        self.collector = collector
+        self.recorder = None  # 录制时每个快照都追加到录制文件(在采集线程中写入)
+
+    @pyqtSlot(object)
+    def collect(self, options):
+        hidden_keys, show_hidden, rules = options
+        try:
+            snapshot = self.collector.collect(hidden_keys, show_hidden, rules)
+        except Exception as e:
+            snapshot = ProcessSnapshot(None, time.time(), 0.0, 0.0, 0.0, (f"采集进程列表失败: {str(e)}",))
+        recorder = self.recorder
+        if recorder is not None and snapshot.rows is not None and not isinstance(self.collector, ReplayCollector):
+            try:
+                recorder.write(snapshot)
+            except Exception as e:
+                snapshot = snapshot._replace(errors=snapshot.errors + (f"写入录制文件失败: {str(e)}",))
+        self.snapshot_ready.emit(snapshot)
+
+    @pyqtSlot(object)
+    def collect_details(self, key):
+        """采集进程键对应进程的详细信息，PID 已被其他进程复用时视为已退出"""
+        pid, create_time = key
+        try:
+            info = self.collector.collect_details(pid)
+        except psutil.NoSuchProcess:
+            self.details_ready.emit(key, None, "进程已退出")
+        except Exception as e:
+            self.details_ready.emit(key, None, str(e))
+        else:
+            if abs(info['create_time'] - create_time) > 0.01:
+                self.details_ready.emit(key, None, "进程已退出")
+            else:
+                self.details_ready.emit(key, info, "")
+
+    @pyqtSlot(object)
+    def run_task(self, task):
+        """在采集线程中执行(排在已请求的采集之后)，用于关闭采集线程正在使用的文件"""
+        task()
+
+
+HISTORY_SAMPLES = 600     # 每个进程保留的采样数
+HISTORY_MAX_SLOTS = 8192  # 最多同时记录的进程数
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+# 指标 -> (表格模型中的数组名, 存储类型, 存储时的缩放)
+# CPU % 以 0.1% 为单位存为 uint16，线程数存为 uint16，其余为 float32，每个采样共16字节
+HISTORY_METRICS = {
+    'cpu': ('cpu_percents', 'uint16', 10.0),
+    'rss': ('rss', 'float32', 1.0),
+    'threads': ('threads', 'uint16', 1.0),
+    'read_rate': ('read_rates', 'float32', 1.0),
+    'write_rate': ('write_rates', 'float32', 1.0),
+}
+
+
+class MetricHistory:
+    """所有存活进程的资源历史: 预分配的 NumPy 环形缓冲区 + 槽位表
+
+    每个指标是一个 (槽位数, 采样数) 的二维数组，所有进程共用同一个写入列，
+    每次刷新对每个指标只做一次向量化赋值。进程退出后槽位回收给新进程使用；
+    槽位不够时按 1024 个对齐扩容，内存占用 = 槽位数 x 采样数 x 16字节
+    (5000个进程 x 600个采样约46MB)。
+    """
+
+    def __init__(self, samples=HISTORY_SAMPLES, initial_slots=1024, max_slots=HISTORY_MAX_SLOTS):
+        # NumPy 导入较慢，创建历史记录时才导入(界面启动后在后台预热)
+        import numpy
+        self.np = numpy
+        self.samples = samples
+        self.max_slots = max_slots
+        self.slot_of = {}        # (pid, create_time) -> 槽位
+        self.free_slots = []
+        self.capacity = 0
+        self.data = {}
+        self.born = numpy.zeros(0, dtype=numpy.int64)  # 槽位分配时的总采样数
+        self.times = numpy.zeros(samples, dtype=numpy.float64)
+        self.last_rows = numpy.zeros(0, dtype=numpy.intp)
+        self.last_slots = numpy.zeros(0, dtype=numpy.intp)
+        self.cursor = 0          # 下一次写入的列
+        self.count = 0           # 累计写入次数
+        self.grow(min(initial_slots, max_slots))
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.data.values()) + self.born.nbytes + self.times.nbytes
+
+    def grow(self, capacity):
+        """扩容到 capacity 个槽位(保留已有数据)"""
+        np = self.np
+        for metric, (_, dtype, _) in HISTORY_METRICS.items():
+            array = np.zeros((capacity, self.samples), dtype=dtype)
+            if metric in self.data:
+                array[:self.capacity] = self.data[metric]
+            self.data[metric] = array
+        born = np.zeros(capacity, dtype=np.int64)
+        born[:self.capacity] = self.born
+        self.born = born
+        self.free_slots.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+
+    def append(self, model, now=None):
+        """按表格模型当前的行追加一次采样，已退出进程的槽位被回收"""
+        np = self.np
+        slot_of = self.slot_of
+        count = len(model.pids)
+        slots = np.zeros(count, dtype=np.intp)
+        seen = {}
+        new_rows = []
+        for row, key in enumerate(model.iter_keys()):
+            slot = slot_of.get(key)
+            if slot is None:
+                new_rows.append((row, key))
+            else:
+                seen[key] = slot
+                slots[row] = slot
+        # 先回收已退出进程的槽位，再给新进程分配；不够时按 1024 个槽位对齐扩容
+        self.free_slots.extend(slot for key, slot in slot_of.items() if key not in seen)
+        shortage = len(new_rows) - len(self.free_slots)
+        if shortage > 0 and self.capacity < self.max_slots:
+            self.grow(min(-(-(self.capacity + shortage) // 1024) * 1024, self.max_slots))
+        tracked = np.ones(count, dtype=bool)
+        for row, key in new_rows:
+            if not self.free_slots:
+                tracked[row] = False
+                continue
+            slot = self.free_slots.pop()
+            self.born[slot] = self.count
+            seen[key] = slot
+            slots[row] = slot
+        self.slot_of = seen
+
+        rows = np.arange(count)
+        if not tracked.all():
+            slots = slots[tracked]
+            rows = rows[tracked]
+        # 最近一次采样中表格行与槽位的对应关系(资源监控按槽位保存每个进程的状态)
+        self.last_rows = rows
+        self.last_slots = slots
+        column = self.cursor
+        for metric, (attribute, dtype, scale) in HISTORY_METRICS.items():
+            # 表格模型的 array 数组直接作为 NumPy 数组使用，不复制
+            source = getattr(model, attribute)
+            values = np.frombuffer(source, dtype=source.typecode) if count else np.zeros(0)
+            if not tracked.all():
+                values = values[tracked]
+            if scale != 1.0:
+                values = values * scale
+            if dtype == 'uint16':
+                values = np.clip(values, 0, 65535)
+            self.data[metric][slots, column] = values
+        self.times[column] = time.time() if now is None else now
+        self.cursor = (column + 1) % self.samples
+        self.count += 1
+
+    def series(self, key, metric):
+        """返回进程某项指标按时间顺序的 (时间数组, 数值数组)，没有记录时返回 None"""
+        slot = self.slot_of.get(key)
+        if slot is None:
+            return None
+        np = self.np
+        length = min(self.count - int(self.born[slot]), self.samples)
+        if length <= 0:
+            return None
+        columns = (np.arange(self.cursor - length, self.cursor)) % self.samples
+        values = self.data[metric][slot, columns].astype(np.float64)
+        scale = HISTORY_METRICS[metric][2]
+        if scale != 1.0:
+            values /= scale
+        return self.times[columns], values
+
+    def summary(self, key, metric, width=40):
+        """(迷你折线图, 最小值, 最大值, 平均值, 采样数)，没有记录时返回 None"""
+        series = self.series(key, metric)
+        if series is None:
+            return None
+        values = series[1]
+        return sparkline(values, width, self.np), values.min(), values.max(), values.mean(), len(values)
+
+
+def sparkline(values, width=40, np=None):
+    """把数值序列画成一行字符折线图，超过 width 个点时每段取最大值(保留尖峰)"""
+    if np is None:
+        import numpy as np
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) > width:
+        edges = np.linspace(0, len(values), width + 1).astype(np.intp)[:-1]
+        values = np.maximum.reduceat(values, edges)
+    low, high = values.min(), values.max()
+    if high - low <= 0:
+        return SPARK_CHARS[0] * len(values)
+    levels = ((values - low) / (high - low) * (len(SPARK_CHARS) - 1)).round().astype(np.intp)
+    return "".join(SPARK_CHARS[level] for level in levels)
+
+
+WATCH_GROWTH_MIN_INTERVAL = 1.0  # 计算增长量的最短采样间隔(秒)
+
+
+class Watchdog:
+    """资源监控: 每个快照用 NumPy 对所有规则和进程一次性判断阈值条件
+
+    规则的指标、阈值和持续时间编译为数组，条件矩阵为 (进程数, 规则数)，不逐个进程循环；
+    计时状态只对满足条件或正在计时的少数进程更新。
+    每个进程的状态(条件已持续的秒数和采样数、是否已触发)按资源历史的槽位保存，
+    进程退出后槽位被新进程复用时状态随之清零。条件持续成立期间每条规则对每个进程只触发一次，
+    条件中断后重新计时。只判断本机进程。
+    """
+
+    def __init__(self, rules):
+        import numpy
+        self.np = np = numpy
+        self.rules = tuple(rule for rule in rules if rule.enabled)
+        # 需要取值的指标，增长量由同一指标相邻两次采样计算
+        self.metrics = sorted({rule.metric for rule in self.rules})
+        self.metric_index = np.array([self.metrics.index(rule.metric) for rule in self.rules], dtype=np.intp)
+        # "<" 规则取反后统一按 "值 * 符号 > 阈值 * 符号" 判断
+        self.signs = np.array([1.0 if rule.op == '>' else -1.0 for rule in self.rules])
+        self.thresholds = np.array([rule.threshold for rule in self.rules]) * self.signs
+        self.durations = np.array([rule.duration for rule in self.rules])
+        self.by_samples = np.array([rule.unit == 'samples' for rule in self.rules], dtype=np.float64)
+        self.capacity = 0
+        count = len(self.rules)
+        self.held = np.zeros((0, count))                   # 条件已持续的秒数(从第一次成立的采样算起)
+        self.streak = np.zeros((0, count), dtype=np.int32)  # 条件连续成立的采样数
+        self.fired = np.zeros((0, count), dtype=bool)       # 本次条件成立期间是否已触发
+        self.active = np.zeros(0, dtype=bool)               # 是否有任一规则的条件正在成立
+        self.previous = {}  # 增长量指标 -> 各槽位上一次计算增长量时的值
+        self.growth = {}    # 增长量指标 -> 各槽位最近一次计算的增长量(每分钟)
+        self.previous_time = None  # 上一次计算增长量的时间
+        self.last_time = None      # 上一次判断的时间
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def grow(self, capacity):
+        np = self.np
+        extra = capacity - self.capacity
+        count = len(self.rules)
+        self.held = np.concatenate([self.held, np.zeros((extra, count))])
+        self.streak = np.concatenate([self.streak, np.zeros((extra, count), dtype=np.int32)])
+        self.fired = np.concatenate([self.fired, np.zeros((extra, count), dtype=bool)])
+        self.active = np.concatenate([self.active, np.zeros(extra, dtype=bool)])
+        for arrays in (self.previous, self.growth):
+            for metric, values in arrays.items():
+                arrays[metric] = np.concatenate([values, np.full(extra, np.nan)])
+        self.capacity = capacity
+
+    def metric_values(self, model, rows, slots, fresh, now):
+        """返回 (进程数, 指标数) 的指标值矩阵，增长量为每分钟的变化，无法计算时为 NaN"""
+        np = self.np
+        elapsed = now - self.previous_time if self.previous_time is not None else None
+        # 两次采样间隔太短(例如自动刷新后紧接着手动刷新)时增长量误差大，沿用上一次计算的增长量
+        update_growth = elapsed is None or elapsed >= WATCH_GROWTH_MIN_INTERVAL
+        values = np.empty((len(rows), len(self.metrics)))
+        for index, metric in enumerate(self.metrics):
+            growth = metric.endswith('_growth')
+            base = metric[:-len('_growth')] if growth else metric
+            source = getattr(model, HISTORY_METRICS[base][0])
+            current = np.frombuffer(source, dtype=source.typecode)[rows]
+            if not growth:
+                values[:, index] = current
+                continue
+            if metric not in self.previous:
+                self.previous[metric] = np.full(self.capacity, np.nan)
+                self.growth[metric] = np.full(self.capacity, np.nan)
+            previous = self.previous[metric]
+            growth_values = self.growth[metric]
+            if update_growth:
+                # 比较 NaN 结果为 False，新进程和第一次采样不会满足条件
+                last = previous[slots]
+                last[fresh] = np.nan
+                growth_values[slots] = (current - last) / elapsed * 60 if elapsed else np.nan
+                previous[slots] = current
+            else:
+                growth_values[slots[fresh]] = np.nan
+                previous[slots[fresh]] = current[fresh]
+            values[:, index] = growth_values[slots]
+        if update_growth:
+            self.previous_time = now
+        return values
+
+    def evaluate(self, history, model, now):
+        """按资源历史最近一次采样判断所有规则，返回新触发的 (规则, 表格行) 列表"""
+        np = self.np
+        rows = history.last_rows
+        slots = history.last_slots
+        if not self.rules or not len(rows):
+            return []
+        if self.capacity < history.capacity:
+            self.grow(history.capacity)
+        # 本次新分配的槽位属于新进程，之前的状态作废
+        fresh = slots[history.born[slots] == history.count - 1]
+        self.held[fresh] = 0.0
+        self.streak[fresh] = 0
+        self.fired[fresh] = False
+        self.active[fresh] = False
+        elapsed = now - self.last_time if self.last_time is not None else 0.0
+        self.last_time = now
+
+        values = self.metric_values(model, rows, slots, history.born[slots] == history.count - 1, now)
+        condition = values[:, self.metric_index] * self.signs > self.thresholds
+        local = np.frombuffer(model.host_ids, dtype=model.host_ids.typecode)[rows] == model.local_host_id
+        if not local.all():
+            condition &= local[:, None]
+
+        # 大多数进程不满足任何条件、也没有进行中的计时，只更新满足条件或有状态的进程
+        selected = np.flatnonzero(condition.any(axis=1) | self.active[slots])
+        if not len(selected):
+            return []
+        condition = condition[selected]
+        selected_slots = slots[selected]
+        # 条件成立: 持续时间累加(上一次也成立时才加上间隔)；不成立: 清零
+        streak = self.streak[selected_slots]
+        held = self.held[selected_slots]
+        held += elapsed * (streak > 0)
+        held *= condition
+        streak += 1
+        streak *= condition
+        fired = self.fired[selected_slots]
+        # 按采样数的规则比较采样数，按秒的规则比较秒数
+        sustained = streak * self.by_samples + held * (1.0 - self.by_samples) >= self.durations
+        sustained &= condition
+        triggered = sustained & ~fired
+        self.held[selected_slots] = held
+        self.streak[selected_slots] = streak
+        self.fired[selected_slots] = (fired | sustained) & condition
+        self.active[selected_slots] = condition.any(axis=1)
+
+        columns, rule_indexes = np.nonzero(triggered)
+        return [(self.rules[rule], int(rows[selected[column]])) for column, rule in zip(columns, rule_indexes)]
+
+
+class EventLoopMonitor(QObject):
+    """事件循环延迟监测: 定时器实际触发时间比预期晚多少，界面线程就被阻塞了多久"""
+
+    def __init__(self, interval_ms=10, parent=None):
+        super().__init__(parent)
+        self.interval = interval_ms / 1000
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.tick)
+        self.last_tick = 0.0
+        self.max_lag = 0.0
+
+    def start(self):
+        if not self.timer.isActive():
+            self.last_tick = time.perf_counter()
+            self.max_lag = 0.0
+            self.timer.start()
+
+    def stop(self):
+        """停止监测，返回期间的最大延迟(秒)"""
+        self.timer.stop()
+        self.tick()
+        return self.max_lag
+
+    def tick(self):
+        now = time.perf_counter()
+        self.max_lag = max(self.max_lag, now - self.last_tick - self.interval)
+        self.last_tick = now
+
+
+# 性能页中的各阶段: 阶段 -> (名称, 单位)
+PERF_STAGES = {
+    'scan': ("进程扫描", "ms"),
+    'window': ("窗口枚举", "ms"),
+    'rules': ("规则匹配", "ms"),
+    'watch': ("资源监控", "ms"),
+    'apply': ("表格更新", "ms"),
+    'filter': ("过滤", "ms"),
+    'sort': ("排序", "ms"),
+    'loop_lag': ("事件循环延迟", "ms"),
+    'rss': ("本程序内存(RSS)", "MB"),
+}
+PERF_WINDOW = 300  # 每个阶段保留最近的采样数
+
+
+class PerfProbes:
+    """性能探针: 每个阶段在滑动窗口中保留最近的 (时间, 数值) 采样
+
+    每次刷新的扫描、窗口枚举、规则和表格更新耗时本来就会计算，总是记录(只是一次 deque 追加)；
+    过滤和排序需要额外计时，只在 enabled(性能页打开)时记录。
+    """
+
+    def __init__(self, window=PERF_WINDOW):
+        self.enabled = False
+        self.samples = {stage: deque(maxlen=window) for stage in PERF_STAGES}
+        self.counts = dict.fromkeys(PERF_STAGES, 0)
+
+    def record(self, stage, seconds):
+        """记录一次耗时(秒)，内存阶段直接记录字节数"""
+        self.samples[stage].append((time.time(), seconds))
+        self.counts[stage] += 1
+
+    def clear(self):
+        for samples in self.samples.values():
+            samples.clear()
+        self.counts = dict.fromkeys(PERF_STAGES, 0)
+
+    @staticmethod
+    def scale(stage):
+        return 1000.0 if PERF_STAGES[stage][1] == "ms" else 1.0 / (1024 * 1024)
+
+    def stats(self, stage):
+        """返回 (总次数, 最近值, P50, P95, 最大值)，按阶段的单位换算；没有采样时返回 None"""
+        samples = self.samples[stage]
+        if not samples:
+            return None
+        scale = self.scale(stage)
+        values = sorted(value for _, value in samples)
+        percentile = lambda fraction: values[min(int(fraction * len(values)), len(values) - 1)] * scale
+        return (self.counts[stage], samples[-1][1] * scale, percentile(0.5), percentile(0.95), values[-1] * scale)
+
+    def write_csv(self, f):
+        """按时间顺序导出所有采样: 时间, 阶段, 数值, 单位"""
+        import csv
+        from datetime import datetime
+        writer = csv.writer(f)
+        writer.writerow(["time", "stage", "value", "unit"])
+        rows = [(timestamp, stage, value * self.scale(stage), PERF_STAGES[stage][1])
+                for stage, samples in self.samples.items() for timestamp, value in samples]
+        rows.sort()
+        for timestamp, stage, value, unit in rows:
+            writer.writerow([datetime.fromtimestamp(timestamp).isoformat(timespec='milliseconds'), stage,
+                             f"{value:.3f}", unit])
+        return len(rows)
+
+
+class AdaptiveRefreshPolicy:
+    """自动刷新间隔策略
+
+    - 采集耗时(CPU时间)占刷新间隔的比例不超过 cpu_budget，扫描变慢时自动拉长间隔
+    - 窗口最小化或隐藏时退避到 hidden_interval
+    - 进程变化频繁时缩短间隔，变化平缓时逐步回到用户设置的基础间隔
+    """
+
+    def __init__(self, base_interval=2.0, min_interval=0.5, max_interval=60.0,
+                 hidden_interval=30.0, cpu_budget=0.02, churn_threshold=0.02):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.hidden_interval = hidden_interval
+        self.cpu_budget = cpu_budget
+        self.churn_threshold = churn_threshold
+        self.interval = base_interval
+
+    def reset(self, base_interval=None):
+        if base_interval is not None:
+            self.base_interval = base_interval
+        self.interval = self.base_interval
+
+    def next_interval(self, scan_cost, churn, visible=True):
+        """根据本次扫描的CPU耗时(秒)、进程变化率和窗口是否可见，计算下次刷新间隔(秒)"""
+        if not visible:
+            interval = max(self.hidden_interval, self.base_interval)
+        elif churn >= self.churn_threshold:
+            interval = self.interval / 2
+        else:
+            interval = self.interval + (self.base_interval - self.interval) / 2
+        # CPU预算: 扫描耗时 / 间隔 <= cpu_budget
+        interval = max(interval, scan_cost / self.cpu_budget)
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        return self.interval
+
+
+LOG_LEVELS = {logging.INFO: "INFO", logging.ERROR: "ERROR"}
+LOG_CAPACITY = 5000  # 内存中和日志页中保留的最大条数
+LOG_RENDER_INTERVAL_MS = 100
+LOG_FILE_MAX_BYTES = 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+LogRecord = namedtuple('LogRecord', ['created', 'level', 'message'])
+
+
+class LogBuffer:
+    """定长环形日志缓冲区
+
+    records 保存最近 capacity 条日志；pending 保存尚未显示到界面的日志，
+    同样有上限，界面长时间不刷新也不会无限增长。
+    """
+
+    def __init__(self, capacity=LOG_CAPACITY):
+        self.records = deque(maxlen=capacity)
+        self.pending = deque(maxlen=capacity)
+
+    @property
+    def capacity(self):
+        return self.records.maxlen
+
+    def set_capacity(self, capacity):
+        self.records = deque(self.records, maxlen=capacity)
+        self.pending = deque(self.pending, maxlen=capacity)
+
+    def append(self, level, message):
+        record = LogRecord(time.time(), level, message)
+        self.records.append(record)
+        self.pending.append(record)
+        return record
+
+    def take_pending(self):
+        """取出并清空待显示的日志"""
+        pending = list(self.pending)
+        self.pending.clear()
+        return pending
+
+    def clear(self):
+        self.records.clear()
+        self.pending.clear()
+
+    @staticmethod
+    def format(record):
+        return (f"{time.strftime('%H:%M:%S', time.localtime(record.created))} "
+                f"[{LOG_LEVELS.get(record.level, 'INFO')}] {record.message}")
+
+
+def default_log_path():
+    """日志文件默认放在程序所在目录"""
+    return os.path.join(os.path.dirname(os.path.abspath(sys.argv[0] or __file__)), "ProcessManager.log")
+
+
+def start_file_logging(path, max_bytes=LOG_FILE_MAX_BYTES, backups=LOG_FILE_BACKUPS):
+    """通过队列把日志写入滚动文件，写文件在监听线程中进行，不阻塞界面线程
+
+    返回 (logger, listener)，退出时需调用 listener.stop()。
+    """
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                  encoding='utf-8', delay=True)
+    handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+
+    logger = logging.getLogger("ProcessManager")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+    logger.addHandler(QueueHandler(log_queue))
+    return logger, listener
+
+
+class ProcessManager(QMainWindow):
+    # 发往采集线程的请求
+    scan_requested = pyqtSignal(object)
+    details_requested = pyqtSignal(object)
+    worker_task_requested = pyqtSignal(object)
+    # 后台进程操作完成(从操作线程池发回界面线程)
+    action_finished = pyqtSignal(object)
+
+    def __init__(self, window_provider=None, collector=None, log_file=None, profile_startup=False,
+                 state_file=None, backend=None):
         super().__init__()
         self.setWindowTitle(f"进程管理工具 v{__version__} (Build {__build_date__})")
         self.resize(500, 700)
@@ -37,8 +1756,113 @@ class ProcessManager(QMainWindow):
             }
         """)
         
-        # 初始化隐藏进程字典
-        self.hidden_processes = {}  # 先初始化这个属性
+        self.profile_startup = profile_startup
+        self.first_snapshot_applied = False
+
+        # 日志: 内存环形缓冲区 + 定时批量显示 + 队列写入滚动文件
+        self.log_buffer = LogBuffer()
+        self.log_render_timer = QTimer(self)
+        self.log_render_timer.setSingleShot(True)
+        self.log_render_timer.setInterval(LOG_RENDER_INTERVAL_MS)
+        self.log_render_timer.timeout.connect(self.render_log)
+        try:
+            self.file_logger, self.log_listener = start_file_logging(log_file or default_log_path())
+        except OSError as e:
+            self.file_logger, self.log_listener = None, None
+            self.log(f"无法写入日志文件: {str(e)}", error=True)
+
+        # 自动操作规则和隐藏/挂起的进程，进程按 (pid, create_time) 记录，PID 被复用时不会误判
+        self.state_file = state_file or default_state_path()
+        (self.rules, self.hidden_keys, self.suspended_keys, agents, self.watch_rules,
+         state_errors) = load_state(self.state_file)
+        self.rule_set = RuleSet(self.rules)
+        self.rule_applied = {}  # 进程键 -> 已对其执行过的规则操作，避免每次快照重复执行
+        # 资源监控(需要 NumPy 和资源历史，后台预热完成后创建)
+        self.watchdog = None
+        self.tray_icon = None  # 首次发出提醒时创建
+
+        # 资源历史(NumPy 在后台预热后才创建，之前的采样不记录)
+        self.metric_history = None
+
+        # 快照录制和回放
+        self.recorder = None
+        self.replay_collector = None
+        self.exporter = None  # 连续导出时每次快照都把表格中的进程提交给导出线程
+        self.snapshot_time = 0.0  # 最近一次应用的快照的采集时间
+        self.replay_timer = QTimer(self)
+        self.replay_timer.setInterval(200)
+        self.replay_timer.timeout.connect(self.on_replay_tick)
+
+        # 进程详情: 不变的字段按进程键缓存(进程退出时清除)，随时间变化的字段取自最新快照
+        self.details_key = None  # 详情页当前显示的进程键
+        self.details_cache = {}  # 进程键 -> 详细信息字典(采集失败时不缓存，下次选中时重新获取)
+        self.details_error = None  # (进程键, 错误信息): 最近一次采集失败，只用于显示
+        self.details_pending = set()  # 已请求、尚未返回的进程键
+        # 用方向键连续切换行时，停下来后才请求详细信息
+        self.details_timer = QTimer(self)
+        self.details_timer.setSingleShot(True)
+        self.details_timer.setInterval(100)
+        self.details_timer.timeout.connect(self.request_details)
+        for error in state_errors:
+            self.log(error, error=True)
+
+        # 后台采集线程: 扫描进程和枚举窗口都不在界面线程中进行
+        self.collector = collector or ProcessCollector(window_provider, backend)
+        # 进程枚举、窗口操作和挂起/恢复的平台后端
+        self.backend = getattr(self.collector, 'backend', None)
+        # 连接采集代理后，self.collector 换成合并本机和远程主机的 MultiHostCollector
+        self.multi_host_collector = None
+        self.host_labels = ()
+        self.window_index = self.collector.window_index
+        self.scan_running = False
+        self.scan_pending = False
+        self.loop_monitor = EventLoopMonitor(parent=self)
+        self.perf_probes = PerfProbes()
+        self.collector_thread = QThread(self)
+        self.collector_worker = CollectorWorker(self.collector)
+        self.collector_worker.moveToThread(self.collector_thread)
+        self.scan_requested.connect(self.collector_worker.collect)
+        self.details_requested.connect(self.collector_worker.collect_details)
+        self.worker_task_requested.connect(self.collector_worker.run_task)
+        self.collector_worker.snapshot_ready.connect(self.apply_snapshot)
+        self.collector_worker.details_ready.connect(self.on_details_ready)
+        self.collector_thread.start()
+
+        # 自动刷新定时器(单次触发，每次快照应用后按策略重新计算间隔)
+        self.refresh_policy = AdaptiveRefreshPolicy()
+        self.auto_refresh_timer = QTimer(self)
+        self.auto_refresh_timer.setSingleShot(True)
+        self.auto_refresh_timer.timeout.connect(self.update_process_list)
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(self.shutdown_collector)
+
+        # 进程表格模型(按列存储) + 排序/过滤代理
+        self.process_model = ProcessTableModel(self)
+        self.proxy_model = ProcessSortFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.process_model)
+        self.proxy_model.probes = self.perf_probes
+
+        # 进程树模型(树形视图可见时才重建)
+        self.tree_model = ProcessTreeModel(self.process_model, self)
+        self.tree_expanded_keys = set()
+        self.tree_rebuild_timer = QTimer(self)
+        self.tree_rebuild_timer.setSingleShot(True)
+        self.tree_rebuild_timer.timeout.connect(self.rebuild_process_tree)
+        self.proxy_model.layoutChanged.connect(self.schedule_tree_rebuild)
+
+        # 按进程名分组的模型(分组视图可见时才重建)
+        self.group_model = ProcessGroupModel(self.process_model, self)
+        self.group_expanded_keys = set()  # 已展开分组的 (主机名, 进程名)
+        self.group_rebuild_timer = QTimer(self)
+        self.group_rebuild_timer.setSingleShot(True)
+        self.group_rebuild_timer.timeout.connect(self.rebuild_process_groups)
+        # 源模型的行号在重新分组之前就会变化，当前行要在变化前按进程键记下
+        self.group_saved_current = None
+        self.proxy_model.layoutAboutToBeChanged.connect(self.save_group_current)
+
+        # 结束进程树等耗时操作在线程池中执行
+        self.action_pool = ThreadPoolExecutor(max_workers=2)
+        self.action_finished.connect(lambda callback: callback())
 
         # 排序控制变量
         self.current_sort_column = 0  # 当前排序列
@@ -46,8 +1870,11 @@ class ProcessManager(QMainWindow):
         self.sort_methods = {
             0: self.sort_by_pid,      # PID列
             1: self.sort_by_name,     # 进程列
-            2: self.sort_by_title     # 窗口标题列
+            2: self.sort_by_title,    # 窗口标题列
+            ProcessTableModel.HOST_COLUMN: self.sort_by_host,  # 主机列
         }
+        for column in ProcessTableModel.METRIC_COLUMNS:  # 资源列
+            self.sort_methods[column] = lambda order, column=column: self.sort_by_metric(column, order)
 
         # 主窗口布局
         self.main_widget = QWidget()
@@ -67,6 +1894,13 @@ class ProcessManager(QMainWindow):
         self.toggle_button.clicked.connect(self.toggle_control_panel)
         self.top_layout.addWidget(self.toggle_button)
         
+        # 搜索防抖: 停止输入一段时间后才过滤
+        self.last_search = None  # (搜索文本, 是否精确匹配)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.filter_process_list)
+
         # 添加搜索框
         self.search_container = QWidget()
         self.search_layout = QHBoxLayout(self.search_container)
@@ -75,144 +1909,1179 @@ class ProcessManager(QMainWindow):
         self.search_input = QTextEdit()
         self.search_input.setMaximumHeight(28)  # 稍微降低高度
         self.search_input.setPlaceholderText("输入进程名/窗口标题/拼音首字母搜索...")
-        self.search_input.textChanged.connect(self.filter_process_list)
+        self.search_input.textChanged.connect(self.search_timer.start)
         self.search_input.setStyleSheet("QTextEdit { padding: 1px; }")  # 减少内边距
         self.search_layout.addWidget(self.search_input)
         # 添加搜索选项
         self.search_options = QComboBox()
         self.search_options.setMaximumHeight(28)  # 设置与输入框相同高度
-        self.search_options.addItems(["模糊搜索", "精确匹配"])
+        self.search_options.addItems(["模糊搜索", "精确匹配", "查询语法"])
+        self.search_options.setToolTip(query_help_text())
         self.search_options.currentIndexChanged.connect(self.filter_process_list)
         self.search_layout.addWidget(self.search_options)
+        # 按主机过滤(连接了采集代理时才显示)
+        self.host_filter_combo = QComboBox()
+        self.host_filter_combo.setMaximumHeight(28)
+        self.host_filter_combo.addItem("全部主机")
+        self.host_filter_combo.currentIndexChanged.connect(self.filter_process_list)
+        self.host_filter_combo.setVisible(False)
+        self.search_layout.addWidget(self.host_filter_combo)
         # 设置搜索容器的最小高度
         self.search_container.setMaximumHeight(30)
         self.top_layout.addWidget(self.search_container)
         self.top_layout.setSpacing(5)  # 设置顶部布局的控件间距
 
-        # 进程列表 - 改为表格形式
-        self.process_list = QTableWidget()
-        self.process_list.setFont(QFont("Microsoft YaHei", 10))
-        self.process_list.setColumnCount(3)
-        self.process_list.setHorizontalHeaderLabels(["PID", "进程名", "窗口标题"])
-        self.process_list.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        self.process_list.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.process_list.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.process_list.setSelectionBehavior(QTableWidget.SelectRows)
-        self.process_list.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.process_list.customContextMenuRequested.connect(self.show_context_menu)
-        self.process_list.itemClicked.connect(self.show_process_details)
-        self.process_list.setSortingEnabled(True)  # 启用排序
+        # 进程列表 - 改为表格形式
+        # 首次快照到达前显示的占位提示
+        self.loading_label = QLabel("正在加载进程列表...")
+        self.loading_label.setAlignment(Qt.AlignCenter)
+        self.loading_label.setStyleSheet("color: #888;")
+        self.top_layout.addWidget(self.loading_label)
+
+        self.process_list = QTableView()
+        self.process_list.setModel(self.proxy_model)
+        self.process_list.setFont(QFont("Microsoft YaHei", 10))
+        self.process_list.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.process_list.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.process_list.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        for column in ProcessTableModel.METRIC_COLUMNS:
+            self.process_list.horizontalHeader().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+            self.process_list.setColumnHidden(column, True)  # 资源列默认隐藏
+        self.process_list.horizontalHeader().setSectionResizeMode(ProcessTableModel.HOST_COLUMN,
+                                                                  QHeaderView.ResizeToContents)
+        self.process_list.setColumnHidden(ProcessTableModel.HOST_COLUMN, True)
+        self.process_list.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.process_list.setSelectionMode(QAbstractItemView.ExtendedSelection)  # 按住Ctrl/Shift多选
+        self.process_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.process_list.customContextMenuRequested.connect(self.show_context_menu)
+        self.process_list.clicked.connect(self.show_process_details)
+        self.process_list.selectionModel().currentRowChanged.connect(self.on_current_row_changed)
+        # 排序由代理模型完成，表头点击统一走 on_header_clicked
+
+        self.process_list.horizontalHeader().sectionClicked.connect(self.on_header_clicked) 
+
+        # 设置表头样式
+        header = self.process_list.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(0, Qt.AscendingOrder)  # 默认按PID升序
+        self.top_layout.addWidget(self.process_list)  # 最后添加到布局
+
+        # 进程树视图(与表格切换显示)
+        self.process_tree = QTreeView()
+        self.process_tree.setModel(self.tree_model)
+        self.process_tree.setFont(QFont("Microsoft YaHei", 10))
+        self.process_tree.setUniformRowHeights(True)
+        self.process_tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.process_tree.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.process_tree.customContextMenuRequested.connect(self.show_context_menu)
+        self.process_tree.clicked.connect(self.show_process_details)
+        self.process_tree.selectionModel().currentRowChanged.connect(self.on_current_row_changed)
+        self.process_tree.expanded.connect(self.on_tree_expanded)
+        self.process_tree.collapsed.connect(self.on_tree_collapsed)
+        self.process_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, len(ProcessTreeModel.COLUMNS)):
+            self.process_tree.header().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.process_tree.setVisible(False)
+        self.top_layout.addWidget(self.process_tree)
+
+        # 分组视图(与表格切换显示)
+        self.group_view = QTreeView()
+        self.group_view.setModel(self.group_model)
+        self.group_view.setFont(QFont("Microsoft YaHei", 10))
+        self.group_view.setUniformRowHeights(True)
+        self.group_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.group_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.group_view.customContextMenuRequested.connect(self.show_context_menu)
+        self.group_view.clicked.connect(self.show_process_details)
+        self.group_view.selectionModel().currentRowChanged.connect(self.on_current_row_changed)
+        self.group_view.expanded.connect(self.on_group_expanded)
+        self.group_view.collapsed.connect(self.on_group_collapsed)
+        self.group_view.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, len(ProcessGroupModel.COLUMNS)):
+            self.group_view.header().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.group_view.header().setSortIndicator(self.group_model.sort_column, self.group_model.sort_order)
+        self.group_view.setSortingEnabled(True)
+        self.group_view.setVisible(False)
+        self.top_layout.addWidget(self.group_view)
+
+
+        
+        # 下部区域 - 控制面板
+        self.bottom_widget = QWidget()
+        self.bottom_layout = QVBoxLayout(self.bottom_widget)
+        
+        # 控制面板内容
+        self.control_panel = QTabWidget()
+        self.control_panel.setVisible(False)  # 默认收起
+        
+        # 创建各个标签页
+        self.create_common_tab()      # 标签1: 常用
+        self.create_details_tab()     # 标签2: 进程详情
+        self.create_rules_tab()       # 标签3: 自动规则
+        self.create_watch_tab()       # 标签4: 资源监控
+        self.create_recording_tab()   # 标签5: 录制与回放
+        self.create_hosts_tab(agents) # 标签6: 远程主机
+        self.create_performance_tab() # 标签7: 性能
+        self.create_log_tab()         # 标签8: 日志
+        
+        self.control_panel.currentChanged.connect(self.update_perf_enabled)
+        self.bottom_layout.addWidget(self.control_panel)
+        
+        # 将上下部分添加到分割器
+        self.splitter.addWidget(self.top_container)
+        self.splitter.addWidget(self.bottom_widget)
+        
+        # 设置初始分割器位置
+        self.splitter.setSizes([500, 100])
+
+        # 窗口显示后再请求首次快照，采集在后台线程中进行
+        QTimer.singleShot(0, self.update_process_list)
+        
+        # 日志记录
+        self.log("程序启动成功")
+        if self.backend is not None:
+            self.log(f"进程枚举后端: {self.backend.name}")
+
+    def get_window_titles(self, pid):
+        """获取进程的所有窗口标题(从窗口标题索引中查询)"""
+        return self.window_index.get(pid)
+
+    def shutdown_collector(self):
+        """停止后台采集线程、操作线程池和日志文件线程"""
+        self.collector_worker.recorder = None
+        self.action_pool.shutdown(wait=False)
+        if self.log_listener is not None:
+            self.log_listener.stop()
+            self.log_listener = None
+        if self.collector_thread.isRunning():
+            self.collector_thread.quit()
+            self.collector_thread.wait()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.exporter is not None:
+            self.exporter.on_finished = None
+            self.exporter.close(wait=True)
+            self.exporter = None
+        if self.multi_host_collector is not None:
+            self.multi_host_collector.close()
+        if self.tray_icon is not None:
+            self.tray_icon.hide()
+
+    def closeEvent(self, event):
+        self.shutdown_collector()
+        super().closeEvent(event)
+    
+    def create_common_tab(self):
+        """创建常用标签页"""
+        self.common_tab = QWidget()
+        layout = QVBoxLayout(self.common_tab)
+        
+        # 显示隐藏进程选项
+        self.show_hidden_checkbox = QCheckBox("显示隐藏进程")
+        self.show_hidden_checkbox.setChecked(False)
+        self.show_hidden_checkbox.stateChanged.connect(self.update_process_list)
+        layout.addWidget(self.show_hidden_checkbox)
+
+        # 树形视图选项
+        self.tree_view_checkbox = QCheckBox("树形视图")
+        self.tree_view_checkbox.setChecked(False)
+        self.tree_view_checkbox.stateChanged.connect(self.toggle_tree_view)
+        layout.addWidget(self.tree_view_checkbox)
+
+        # 分组视图选项(与树形视图互斥)
+        self.group_view_checkbox = QCheckBox("按进程名分组")
+        self.group_view_checkbox.setChecked(False)
+        self.group_view_checkbox.stateChanged.connect(self.toggle_group_view)
+        layout.addWidget(self.group_view_checkbox)
+
+        # 显示资源列选项(CPU、内存、线程数、读写速率)
+        self.show_metrics_checkbox = QCheckBox("显示资源列")
+        self.show_metrics_checkbox.setChecked(False)
+        self.show_metrics_checkbox.stateChanged.connect(self.toggle_metric_columns)
+        layout.addWidget(self.show_metrics_checkbox)
+        
+        # 添加一些常用按钮
+        self.refresh_btn = QPushButton("刷新进程列表")
+        self.refresh_btn.clicked.connect(self.on_refresh_clicked)
+        layout.addWidget(self.refresh_btn)
+
+        # 自动刷新选项
+        auto_refresh_layout = QHBoxLayout()
+        self.auto_refresh_checkbox = QCheckBox("自动刷新")
+        self.auto_refresh_checkbox.setChecked(False)
+        self.auto_refresh_checkbox.stateChanged.connect(self.on_auto_refresh_changed)
+        auto_refresh_layout.addWidget(self.auto_refresh_checkbox)
+        self.refresh_interval_spin = QSpinBox()
+        self.refresh_interval_spin.setRange(1, 60)
+        self.refresh_interval_spin.setValue(int(self.refresh_policy.base_interval))
+        self.refresh_interval_spin.setSuffix(" 秒")
+        self.refresh_interval_spin.valueChanged.connect(self.on_refresh_interval_changed)
+        auto_refresh_layout.addWidget(QLabel("基础间隔:"))
+        auto_refresh_layout.addWidget(self.refresh_interval_spin)
+        auto_refresh_layout.addStretch()
+        layout.addLayout(auto_refresh_layout)
+        
+        # 结束所有隐藏进程按钮
+        self.kill_hidden_btn = QPushButton("结束所有隐藏进程")
+        self.kill_hidden_btn.clicked.connect(self.kill_all_hidden_processes)
+        layout.addWidget(self.kill_hidden_btn)
+        
+        layout.addStretch()
+        self.control_panel.addTab(self.common_tab, "常用")
+    
+    def on_refresh_clicked(self):
+        """刷新按钮点击事件"""
+        self.refresh_btn.setEnabled(False)  # 禁用按钮，快照应用后重新启用
+        self.update_process_list()
+
+    def toggle_tree_view(self):
+        """切换表格/树形视图"""
+        tree_mode = self.tree_view_checkbox.isChecked()
+        if tree_mode:
+            self.group_view_checkbox.setChecked(False)
+        self.process_list.setVisible(not tree_mode and not self.group_view_checkbox.isChecked())
+        self.process_tree.setVisible(tree_mode)
+        self.update_table_resize_mode()
+        if tree_mode:
+            self.rebuild_process_tree()
+            if not self.tree_expanded_keys:
+                self.process_tree.expandToDepth(0)
+
+    def toggle_group_view(self):
+        """切换表格/分组视图"""
+        group_mode = self.group_view_checkbox.isChecked()
+        if group_mode:
+            self.tree_view_checkbox.setChecked(False)
+        self.process_list.setVisible(not group_mode and not self.tree_view_checkbox.isChecked())
+        self.group_view.setVisible(group_mode)
+        self.update_table_resize_mode()
+        if group_mode:
+            self.rebuild_process_groups()
+
+    def update_table_resize_mode(self):
+        """表格隐藏时不按内容调整列宽: 隐藏的表格在每次刷新后仍会遍历各行计算列宽"""
+        mode = QHeaderView.Interactive if self.process_list.isHidden() else QHeaderView.ResizeToContents
+        header = self.process_list.horizontalHeader()
+        for column in (0, *ProcessTableModel.METRIC_COLUMNS, ProcessTableModel.HOST_COLUMN):
+            if header.sectionResizeMode(column) != mode:
+                header.setSectionResizeMode(column, mode)
+
+    def current_view(self):
+        """当前显示的进程视图(表格、树形或分组)"""
+        if self.process_tree.isVisible():
+            return self.process_tree
+        if self.group_view.isVisible():
+            return self.group_view
+        return self.process_list
+
+    def schedule_tree_rebuild(self):
+        """合并同一轮事件中的多次重建请求"""
+        if self.process_tree.isVisible():
+            self.tree_rebuild_timer.start(0)
+        if self.group_view.isVisible():
+            self.group_rebuild_timer.start(0)
+
+    def rebuild_process_tree(self):
+        """按当前快照和搜索条件重建进程树，保持展开状态和当前选中的进程"""
+        source = self.process_model
+        current = self.process_tree.currentIndex()
+        current_key = source.key_at(current.internalId()) if current.isValid() else None
+
+        visible_rows = self.proxy_model.proxy_to_source if self.proxy_model.filter_func else None
+        self.tree_model.rebuild(visible_rows)
+
+        for key in list(self.tree_expanded_keys):
+            index = self.tree_model.index_of_row(source.key_to_row.get(key))
+            if index.isValid():
+                self.process_tree.setExpanded(index, True)
+            else:
+                self.tree_expanded_keys.discard(key)
+        if current_key is not None:
+            index = self.tree_model.index_of_row(source.key_to_row.get(current_key))
+            if index.isValid():
+                self.process_tree.setCurrentIndex(index)
+
+    def group_key(self, group):
+        row = self.group_model.groups.first_rows[group]
+        return (self.process_model.host_at(row), self.process_model.name_at(row))
+
+    def group_current(self):
+        """分组视图的当前行: ('group', (主机名, 进程名)) 或 ('row', 进程键)，没有时为 None"""
+        current = self.group_view.currentIndex()
+        group = self.group_model.group_of(current)
+        if group is not None:
+            return ('group', self.group_key(group))
+        row = self.group_model.row_of(current)
+        if row is not None:
+            return ('row', self.process_model.key_at(row))
+        return None
+
+    def save_group_current(self):
+        if self.group_view.isVisible() and self.group_saved_current is None:
+            self.group_saved_current = self.group_current() or ()
+
+    def rebuild_process_groups(self):
+        """按当前快照和搜索条件重新分组，保持展开的分组和当前选中的分组或进程"""
+        source = self.process_model
+        model = self.group_model
+        current = self.group_saved_current if self.group_saved_current is not None else self.group_current()
+        self.group_saved_current = None
+
+        visible_rows = self.proxy_model.proxy_to_source if self.proxy_model.filter_func else None
+        model.rebuild(visible_rows)
+
+        groups_by_key = {self.group_key(group): group for group in range(len(model.order))}
+        for key in list(self.group_expanded_keys):
+            index = model.index_of_group(groups_by_key.get(key))
+            if index.isValid():
+                self.group_view.setExpanded(index, True)
+            else:
+                self.group_expanded_keys.discard(key)
+        if current and current[0] == 'group':
+            index = model.index_of_group(groups_by_key.get(current[1]))
+        elif current:
+            index = model.index_of_row(source.key_to_row.get(current[1]))
+        else:
+            index = QModelIndex()
+        if index.isValid():
+            self.group_view.setCurrentIndex(index)
+
+    def on_group_expanded(self, index):
+        group = self.group_model.group_of(index)
+        if group is not None:
+            self.group_expanded_keys.add(self.group_key(group))
+
+    def on_group_collapsed(self, index):
+        group = self.group_model.group_of(index)
+        if group is not None:
+            self.group_expanded_keys.discard(self.group_key(group))
+
+    def on_tree_expanded(self, index):
+        self.tree_expanded_keys.add(self.process_model.key_at(index.internalId()))
+
+    def on_tree_collapsed(self, index):
+        self.tree_expanded_keys.discard(self.process_model.key_at(index.internalId()))
+
+    def toggle_metric_columns(self):
+        """显示/隐藏资源列"""
+        show = self.show_metrics_checkbox.isChecked()
+        for column in ProcessTableModel.METRIC_COLUMNS:
+            self.process_list.setColumnHidden(column, not show)
+        if show:
+            self.resize(max(self.width(), 900), self.height())
+
+    def on_auto_refresh_changed(self):
+        """开启/关闭自动刷新"""
+        self.refresh_policy.reset(self.refresh_interval_spin.value())
+        if self.auto_refresh_checkbox.isChecked():
+            self.log(f"自动刷新已开启 (基础间隔{self.refresh_policy.base_interval:.0f}秒, "
+                     f"CPU占用上限{self.refresh_policy.cpu_budget:.0%})")
+            self.update_process_list()
+        else:
+            self.auto_refresh_timer.stop()
+            self.log("自动刷新已关闭")
+
+    def on_refresh_interval_changed(self, value):
+        """修改自动刷新的基础间隔"""
+        self.refresh_policy.reset(value)
+        if self.auto_refresh_timer.isActive():
+            self.auto_refresh_timer.start(int(self.refresh_policy.interval * 1000))
+
+    def schedule_auto_refresh(self, scan_cost, churn):
+        """按扫描耗时、变化率和窗口状态安排下一次自动刷新"""
+        if not self.auto_refresh_checkbox.isChecked():
+            return
+        visible = self.isVisible() and not self.isMinimized()
+        interval = self.refresh_policy.next_interval(scan_cost, churn, visible)
+        self.auto_refresh_timer.start(int(interval * 1000))
+        self.log(f"自动刷新: 扫描CPU耗时{scan_cost * 1000:.1f}ms, 变化率{churn:.1%}, "
+                 f"下次间隔{interval:.1f}秒{'' if visible else ' (窗口不可见)'}")
+
+    def changeEvent(self, event):
+        """窗口从最小化恢复时立即刷新一次"""
+        super().changeEvent(event)
+        if (event.type() == QEvent.WindowStateChange and not self.isMinimized()
+                and self.auto_refresh_checkbox.isChecked()
+                and self.auto_refresh_timer.remainingTime() > self.refresh_policy.base_interval * 1000):
+            self.refresh_policy.reset()
+            self.update_process_list()
+    
+    def create_details_tab(self):
+        """创建进程详情标签页: 显示表格中当前行的进程"""
+        self.details_tab = QWidget()
+        layout = QVBoxLayout(self.details_tab)
+        self.details_text = QPlainTextEdit()
+        self.details_text.setReadOnly(True)
+        self.details_text.setFont(QFont("Microsoft YaHei", 9))
+        self.details_text.setPlaceholderText("在进程列表中选择一个进程查看详细信息")
+        layout.addWidget(self.details_text)
+        self.control_panel.addTab(self.details_tab, "详情")
+
+    def create_rules_tab(self):
+        """创建自动规则标签页"""
+        self.rules_tab = QWidget()
+        layout = QVBoxLayout(self.rules_tab)
+
+        # 规则列表(勾选框表示是否启用)
+        self.rule_list = QListWidget()
+        self.rule_list.itemChanged.connect(self.on_rule_item_changed)
+        layout.addWidget(self.rule_list)
+
+        # 新规则: 操作 + 字段 + 匹配内容
+        form_layout = QHBoxLayout()
+        self.rule_action_combo = QComboBox()
+        self.rule_action_combo.addItems(RULE_ACTIONS.values())
+        form_layout.addWidget(self.rule_action_combo)
+        self.rule_field_combo = QComboBox()
+        self.rule_field_combo.addItems(RULE_FIELDS.values())
+        form_layout.addWidget(self.rule_field_combo)
+        self.rule_pattern_input = QLineEdit()
+        self.rule_pattern_input.setPlaceholderText("完全匹配的内容，勾选正则后为正则表达式")
+        self.rule_pattern_input.returnPressed.connect(self.on_add_rule_clicked)
+        form_layout.addWidget(self.rule_pattern_input)
+        self.rule_regex_checkbox = QCheckBox("正则")
+        form_layout.addWidget(self.rule_regex_checkbox)
+        layout.addLayout(form_layout)
+
+        button_layout = QHBoxLayout()
+        add_btn = QPushButton("添加规则")
+        add_btn.clicked.connect(self.on_add_rule_clicked)
+        button_layout.addWidget(add_btn)
+        remove_btn = QPushButton("删除选中规则")
+        remove_btn.clicked.connect(self.on_remove_rule_clicked)
+        button_layout.addWidget(remove_btn)
+        layout.addLayout(button_layout)
+
+        self.control_panel.addTab(self.rules_tab, "规则")
+        self.refresh_rule_list()
+
+    def refresh_rule_list(self):
+        """按 self.rules 重建规则列表"""
+        self.rule_list.blockSignals(True)
+        self.rule_list.clear()
+        for rule in self.rules:
+            item = QListWidgetItem(describe_rule(rule))
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if rule.enabled else Qt.Unchecked)
+            self.rule_list.addItem(item)
+        self.rule_list.blockSignals(False)
+
+    def on_add_rule_clicked(self):
+        pattern = self.rule_pattern_input.text().strip()
+        if not pattern:
+            return
+        rule = ProcessRule(list(RULE_FIELDS)[self.rule_field_combo.currentIndex()], pattern,
+                           list(RULE_ACTIONS)[self.rule_action_combo.currentIndex()],
+                           self.rule_regex_checkbox.isChecked())
+        if self.add_rule(rule):
+            self.rule_pattern_input.clear()
+
+    def on_remove_rule_clicked(self):
+        rows = sorted({index.row() for index in self.rule_list.selectedIndexes()}, reverse=True)
+        if not rows:
+            return
+        rules = list(self.rules)
+        for row in rows:
+            self.log(f"已删除规则: {describe_rule(rules.pop(row))}")
+        self.set_rules(rules)
+
+    def on_rule_item_changed(self, item):
+        row = self.rule_list.row(item)
+        enabled = item.checkState() == Qt.Checked
+        if 0 <= row < len(self.rules) and self.rules[row].enabled != enabled:
+            rules = list(self.rules)
+            rules[row] = rules[row]._replace(enabled=enabled)
+            self.set_rules(rules)
+
+    def add_rule(self, rule):
+        """校验并添加一条自动规则，返回是否已添加"""
+        try:
+            rule = rule_from_dict(rule._asdict())
+        except (ValueError, re.error) as e:
+            self.log(f"规则无效: {str(e)}", error=True)
+            return False
+        if rule.action == 'kill':
+            reply = QMessageBox.question(
+                self, '确认', 
+                f"添加后所有匹配的进程都会被自动结束，确定要添加规则\"{describe_rule(rule)}\"吗?", 
+                QMessageBox.Yes | QMessageBox.No, 
+                QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return False
+        self.log(f"已添加规则: {describe_rule(rule)}")
+        self.set_rules(self.rules + [rule])
+        return True
+
+    def set_rules(self, rules):
+        """替换规则集合: 重新编译、保存，并立即对当前进程生效"""
+        self.rules = list(rules)
+        self.rule_set = RuleSet(self.rules)
+        self.rule_applied = {}
+        self.save_state()
+        self.refresh_rule_list()
+        self.update_process_list()
+
+    def save_state(self):
+        """保存规则和隐藏/挂起的进程"""
+        try:
+            save_state(self.state_file, self.rules, self.hidden_keys, self.suspended_keys,
+                       list(self.multi_host_collector.connections) if self.multi_host_collector else (),
+                       self.watch_rules)
+        except OSError as e:
+            self.log(f"保存状态文件失败: {str(e)}", error=True)
+
+    def apply_rule_matches(self, matches):
+        """执行快照中新命中的规则操作(每个进程的每种操作只执行一次)"""
+        pending = {action: [] for action in RULE_ACTIONS}
+        applied = {}
+        for key, actions in matches.items():
+            done = self.rule_applied.get(key, frozenset())
+            applied[key] = done | actions
+            for action in actions - done:
+                pending[action].append(key)
+        # 只保留仍然命中的进程，已退出进程的记录随之丢弃
+        self.rule_applied = applied
+        self.apply_auto_actions(pending, "规则")
+
+    def apply_auto_actions(self, pending, source):
+        """执行自动操作: pending 为 操作 -> 进程键列表，source 为日志中的来源("规则"或"资源监控")"""
+        hide_keys = [key for key in pending.get('hide', ()) if key not in self.hidden_keys]
+        if hide_keys:
+            self.set_processes_hidden(hide_keys, True)
+            self.log(f"{source}自动隐藏{len(hide_keys)}个进程")
+            self.scan_pending = True  # 重新采集以更新隐藏标记
+        suspend_keys = [key for key in pending.get('suspend', ()) if key not in self.suspended_keys]
+        if suspend_keys:
+            self.log(f"{source}自动挂起{len(suspend_keys)}个进程")
+            self.start_bulk_action('suspend', suspend_keys)
+        if pending.get('kill'):
+            self.log(f"{source}自动结束{len(pending['kill'])}个进程")
+            self.start_bulk_action('terminate', pending['kill'])
+
+    def create_watch_tab(self):
+        """创建资源监控标签页: 资源超过阈值并持续一段时间后提醒或自动处理"""
+        self.watch_tab = QWidget()
+        layout = QVBoxLayout(self.watch_tab)
+
+        self.watch_rule_list = QListWidget()
+        self.watch_rule_list.itemChanged.connect(self.on_watch_rule_item_changed)
+        layout.addWidget(self.watch_rule_list)
+
+        # 新规则: 操作 + 指标 + 比较 + 阈值 + 持续时间
+        form_layout = QHBoxLayout()
+        self.watch_action_combo = QComboBox()
+        self.watch_action_combo.addItems(WATCH_ACTIONS.values())
+        form_layout.addWidget(self.watch_action_combo)
+        self.watch_metric_combo = QComboBox()
+        self.watch_metric_combo.addItems(label for label, _ in WATCH_METRICS.values())
+        form_layout.addWidget(self.watch_metric_combo)
+        self.watch_op_combo = QComboBox()
+        self.watch_op_combo.addItems(WATCH_OPERATORS)
+        form_layout.addWidget(self.watch_op_combo)
+        self.watch_threshold_input = QLineEdit()
+        self.watch_threshold_input.setPlaceholderText("阈值，如 90 或 2G")
+        self.watch_threshold_input.returnPressed.connect(self.on_add_watch_rule_clicked)
+        form_layout.addWidget(self.watch_threshold_input)
+        form_layout.addWidget(QLabel("持续"))
+        self.watch_duration_spin = QSpinBox()
+        self.watch_duration_spin.setRange(0, 86400)
+        self.watch_duration_spin.setValue(60)
+        form_layout.addWidget(self.watch_duration_spin)
+        self.watch_unit_combo = QComboBox()
+        self.watch_unit_combo.addItems(WATCH_UNITS.values())
+        form_layout.addWidget(self.watch_unit_combo)
+        layout.addLayout(form_layout)
+
+        button_layout = QHBoxLayout()
+        add_btn = QPushButton("添加监控规则")
+        add_btn.clicked.connect(self.on_add_watch_rule_clicked)
+        button_layout.addWidget(add_btn)
+        remove_btn = QPushButton("删除选中规则")
+        remove_btn.clicked.connect(self.on_remove_watch_rule_clicked)
+        button_layout.addWidget(remove_btn)
+        layout.addLayout(button_layout)
+
+        self.control_panel.addTab(self.watch_tab, "监控")
+        self.refresh_watch_rule_list()
+
+    def refresh_watch_rule_list(self):
+        """按 self.watch_rules 重建监控规则列表"""
+        self.watch_rule_list.blockSignals(True)
+        self.watch_rule_list.clear()
+        for rule in self.watch_rules:
+            item = QListWidgetItem(describe_watch_rule(rule))
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if rule.enabled else Qt.Unchecked)
+            self.watch_rule_list.addItem(item)
+        self.watch_rule_list.blockSignals(False)
+
+    def on_add_watch_rule_clicked(self):
+        text = self.watch_threshold_input.text().strip()
+        if not text:
+            return
+        metric = list(WATCH_METRICS)[self.watch_metric_combo.currentIndex()]
+        match = QUERY_SIZE_RE.fullmatch(text.lower())
+        if not match or (match.group(2) and not WATCH_METRICS[metric][1]):
+            self.log(f"监控规则的阈值需要数值: {text}", error=True)
+            return
+        rule = WatchRule(metric, self.watch_op_combo.currentText(),
+                         float(match.group(1)) * QUERY_SIZE_UNITS[match.group(2)],
+                         float(self.watch_duration_spin.value()),
+                         list(WATCH_UNITS)[self.watch_unit_combo.currentIndex()],
+                         list(WATCH_ACTIONS)[self.watch_action_combo.currentIndex()])
+        if self.add_watch_rule(rule):
+            self.watch_threshold_input.clear()
+
+    def add_watch_rule(self, rule):
+        """添加一条资源监控规则，返回是否已添加"""
+        if rule.action == 'kill':
+            reply = QMessageBox.question(
+                self, '确认',
+                f"添加后满足条件的进程都会被自动结束，确定要添加监控规则\"{describe_watch_rule(rule)}\"吗?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return False
+        self.log(f"已添加监控规则: {describe_watch_rule(rule)}")
+        self.set_watch_rules(self.watch_rules + [rule])
+        return True
+
+    def on_remove_watch_rule_clicked(self):
+        rows = sorted({index.row() for index in self.watch_rule_list.selectedIndexes()}, reverse=True)
+        if not rows:
+            return
+        rules = list(self.watch_rules)
+        for row in rows:
+            self.log(f"已删除监控规则: {describe_watch_rule(rules.pop(row))}")
+        self.set_watch_rules(rules)
+
+    def on_watch_rule_item_changed(self, item):
+        row = self.watch_rule_list.row(item)
+        enabled = item.checkState() == Qt.Checked
+        if 0 <= row < len(self.watch_rules) and self.watch_rules[row].enabled != enabled:
+            rules = list(self.watch_rules)
+            rules[row] = rules[row]._replace(enabled=enabled)
+            self.set_watch_rules(rules)
+
+    def set_watch_rules(self, rules):
+        """替换监控规则: 保存并重新编译(各进程的持续时间重新计算)"""
+        self.watch_rules = list(rules)
+        self.save_state()
+        self.refresh_watch_rule_list()
+        self.rebuild_watchdog()
+
+    def rebuild_watchdog(self):
+        """有启用的监控规则且资源历史可用时创建资源监控"""
+        if self.metric_history is None or not any(rule.enabled for rule in self.watch_rules):
+            self.watchdog = None
+            return
+        self.watchdog = Watchdog(self.watch_rules)
+
+    def apply_watch_alerts(self, alerts):
+        """记录新触发的监控规则，发出托盘提醒并执行规则的操作"""
+        model = self.process_model
+        pending = {action: [] for action in WATCH_ACTIONS}
+        messages = []
+        for rule, row in alerts:
+            key = model.key_at(row)
+            pending[rule.action].append(key)
+            message = f"{model.name_at(row)} (PID: {key[0]}) {describe_watch_rule(rule)}"
+            messages.append(message)
+            self.log(f"资源监控: {message}", error=True)
+        self.notify("资源监控", "\n".join(messages[:5]) + (f"\n等{len(messages)}项" if len(messages) > 5 else ""))
+        self.apply_auto_actions(pending, "资源监控")
+
+    def notify(self, title, message):
+        """在系统托盘显示提醒(系统不支持托盘时只记录日志)"""
+        if self.tray_icon is None:
+            if not QSystemTrayIcon.isSystemTrayAvailable():
+                return
+            self.tray_icon = QSystemTrayIcon(self.windowIcon(), self)
+            self.tray_icon.setToolTip(self.windowTitle())
+            self.tray_icon.activated.connect(lambda reason: (self.showNormal(), self.activateWindow()))
+            self.tray_icon.show()
+        self.tray_icon.showMessage(title, message, QSystemTrayIcon.Warning, 10000)
+
+    def create_recording_tab(self):
+        """创建录制与回放标签页"""
+        self.recording_tab = QWidget()
+        layout = QVBoxLayout(self.recording_tab)
+
+        # 录制: 每次刷新的快照追加到录制文件
+        record_layout = QHBoxLayout()
+        self.record_btn = QPushButton("开始录制")
+        self.record_btn.clicked.connect(self.toggle_recording)
+        record_layout.addWidget(self.record_btn)
+        self.record_label = QLabel("未录制")
+        record_layout.addWidget(self.record_label, 1)
+        layout.addLayout(record_layout)
+
+        # 回放: 用录制文件代替实时采集，表格、搜索和排序照常使用
+        replay_layout = QHBoxLayout()
+        self.replay_open_btn = QPushButton("打开录制文件回放...")
+        self.replay_open_btn.clicked.connect(self.on_open_replay_clicked)
+        replay_layout.addWidget(self.replay_open_btn)
+        self.replay_play_btn = QPushButton("播放")
+        self.replay_play_btn.clicked.connect(self.toggle_replay_playing)
+        replay_layout.addWidget(self.replay_play_btn)
+        self.replay_speed_combo = QComboBox()
+        self.replay_speed_combo.addItems(["1x", "10x", "60x", "600x"])
+        replay_layout.addWidget(self.replay_speed_combo)
+        self.replay_stop_btn = QPushButton("退出回放")
+        self.replay_stop_btn.clicked.connect(self.stop_replay)
+        replay_layout.addWidget(self.replay_stop_btn)
+        layout.addLayout(replay_layout)
+
+        self.replay_slider = QSlider(Qt.Horizontal)
+        self.replay_slider.valueChanged.connect(self.on_replay_slider_changed)
+        layout.addWidget(self.replay_slider)
+        self.replay_label = QLabel("")
+        layout.addWidget(self.replay_label)
+
+        # 导出: 表格中当前显示的进程(按搜索条件过滤、按当前排序)写入 CSV/JSON Lines/Parquet
+        export_layout = QHBoxLayout()
+        self.export_btn = QPushButton("导出当前列表...")
+        self.export_btn.clicked.connect(self.on_export_clicked)
+        export_layout.addWidget(self.export_btn)
+        self.live_export_btn = QPushButton("开始连续导出...")
+        self.live_export_btn.clicked.connect(self.toggle_live_export)
+        export_layout.addWidget(self.live_export_btn)
+        self.export_recording_btn = QPushButton("导出录制文件...")
+        self.export_recording_btn.clicked.connect(self.on_export_recording_clicked)
+        export_layout.addWidget(self.export_recording_btn)
+        export_layout.addStretch()
+        layout.addLayout(export_layout)
+        self.export_label = QLabel("")
+        layout.addWidget(self.export_label)
+        layout.addStretch()
+
+        self.control_panel.addTab(self.recording_tab, "录制")
+        self.update_replay_controls()
+
+    def ask_export_path(self, title):
+        """选择导出文件，格式由扩展名决定"""
+        from datetime import datetime
+        default_path = os.path.join(os.path.dirname(default_state_path()),
+                                    datetime.now().strftime("ProcessManager-%Y%m%d-%H%M%S.csv"))
+        filters = ";;".join(f"{label} (*.{name})" for name, label in EXPORT_FORMATS.items())
+        path, _ = QFileDialog.getSaveFileName(self, title, default_path, filters)
+        return path
+
+    def create_exporter(self, path):
+        """打开导出文件，导出线程完成后在界面线程中记录结果"""
+        try:
+            return SnapshotExporter(path, on_finished=lambda result: self.action_finished.emit(
+                lambda: self.on_export_finished(result)))
+        except (OSError, ValueError, ImportError) as e:
+            self.log(f"无法导出到 {path}: {str(e)}", error=True)
+            return None
+
+    def export_table_frame(self, exporter, timestamp, block=False):
+        """把表格中当前显示的进程(过滤、排序后)作为一帧提交给导出线程"""
+        return exporter.submit(timestamp, self.process_model.export_columns(self.proxy_model.proxy_to_source),
+                               block)
+
+    def on_export_clicked(self):
+        path = self.ask_export_path("导出当前列表")
+        if path:
+            self.export_table(path)
+
+    def export_table(self, path):
+        """导出当前列表(一帧)，写文件在导出线程中进行"""
+        exporter = self.create_exporter(path)
+        if exporter is not None:
+            self.export_table_frame(exporter, self.snapshot_time or time.time(), block=True)
+            exporter.close()
+
+    def toggle_live_export(self):
+        """开始/停止连续导出: 之后每次刷新的列表都追加到导出文件"""
+        if self.exporter is not None:
+            self.stop_live_export()
+            return
+        path = self.ask_export_path("连续导出到文件")
+        if path:
+            self.start_live_export(path)
+
+    def start_live_export(self, path):
+        self.exporter = self.create_exporter(path)
+        if self.exporter is None:
+            return
+        self.live_export_btn.setText("停止连续导出")
+        self.export_label.setText(f"正在连续导出: {path}")
+        self.log(f"开始连续导出: {path}")
+        if self.snapshot_time:
+            self.export_table_frame(self.exporter, self.snapshot_time)
+
+    def stop_live_export(self):
+        exporter, self.exporter = self.exporter, None
+        self.live_export_btn.setText("开始连续导出...")
+        self.export_label.setText(f"正在写完: {exporter.path}")
+        exporter.close()
+
+    def on_export_recording_clicked(self):
+        recording, _ = QFileDialog.getOpenFileName(self, "选择要导出的录制文件", os.path.dirname(default_state_path()),
+                                                   "进程快照录制 (*.pmrec)")
+        if not recording:
+            return
+        path = self.ask_export_path("导出录制文件")
+        if path:
+            self.export_recording(recording, path)
+
+    def export_recording(self, recording, path):
+        """在线程池中逐帧解码录制文件并导出(不受搜索条件影响)"""
+        self.log(f"正在导出录制文件 {recording} 到 {path}...")
+        self.export_label.setText(f"正在导出: {path}")
+
+        def run():
+            try:
+                result = export_recording(recording, path)
+            except (OSError, ValueError, ImportError) as e:
+                message = f"导出录制文件失败: {str(e)}"
+                self.action_finished.emit(lambda: self.log(message, error=True))
+                return
+            self.action_finished.emit(lambda: self.on_export_finished(result))
+
+        self.action_pool.submit(run)
+
+    def on_export_finished(self, result):
+        """导出完成: 记录写入的数据量和吞吐量"""
+        if self.exporter is None or self.exporter.path != result.path:
+            self.export_label.setText("")
+        if result.error:
+            self.log(f"导出 {result.path} 失败: {result.error}", error=True)
+            return
+        self.log(f"已导出到 {result.path}: {describe_export(result)}")
+
+    def update_replay_controls(self):
+        replaying = self.replay_collector is not None
+        for widget in (self.replay_play_btn, self.replay_speed_combo, self.replay_stop_btn, self.replay_slider):
+            widget.setEnabled(replaying)
+        self.refresh_btn.setEnabled(not replaying)
+        self.auto_refresh_checkbox.setEnabled(not replaying)
+        if not replaying:
+            self.replay_label.setText("")
+            self.replay_play_btn.setText("播放")
+
+    def toggle_recording(self):
+        """开始/停止录制"""
+        if self.recorder is not None:
+            self.collector_worker.recorder = None
+            recorder, self.recorder = self.recorder, None
+            # 采集线程可能正在写入，由采集线程在写完后关闭文件
+            self.worker_task_requested.emit(recorder.close)
+            self.log(f"已停止录制: {recorder.path} (共{recorder.frames}帧)")
+            self.record_btn.setText("开始录制")
+            self.record_label.setText("未录制")
+            return
+
+        from datetime import datetime
+        default_path = os.path.join(os.path.dirname(default_state_path()),
+                                    datetime.now().strftime("ProcessManager-%Y%m%d-%H%M%S.pmrec"))
+        path, _ = QFileDialog.getSaveFileName(self, "录制到文件", default_path, "进程快照录制 (*.pmrec)")
+        if path:
+            self.start_recording(path)
+
+    def start_recording(self, path):
+        try:
+            self.recorder = SnapshotRecorder(path)
+        except OSError as e:
+            self.log(f"无法创建录制文件: {str(e)}", error=True)
+            return
+        self.collector_worker.recorder = self.recorder
+        self.record_btn.setText("停止录制")
+        self.record_label.setText(f"正在录制: {path}")
+        self.log(f"开始录制: {path}")
+        self.update_process_list()
+
+    def on_open_replay_clicked(self):
+        path, _ = QFileDialog.getOpenFileName(self, "打开录制文件", os.path.dirname(default_state_path()),
+                                              "进程快照录制 (*.pmrec)")
+        if path:
+            self.start_replay(path)
+
+    def start_replay(self, path):
+        """进入回放模式: 采集线程改为从录制文件读取快照"""
+        try:
+            collector = ReplayCollector(path, self.window_index)
+        except (OSError, ValueError) as e:
+            self.log(f"无法打开录制文件: {str(e)}", error=True)
+            return
+        if not len(collector.replayer):
+            self.log(f"录制文件中没有快照: {path}", error=True)
+            return
+        self.stop_replay()
+        self.replay_collector = collector
+        self.collector_worker.collector = collector
+        self.auto_refresh_checkbox.setChecked(False)
+        self.replay_slider.blockSignals(True)
+        self.replay_slider.setRange(0, len(collector.replayer) - 1)
+        self.replay_slider.setValue(0)
+        self.replay_slider.blockSignals(False)
+        self.update_replay_controls()
+        replayer = collector.replayer
+        self.log(f"开始回放: {path} (共{len(replayer)}帧, "
+                 f"{self.format_time(replayer.time_at(0))} ~ {self.format_time(replayer.time_at(len(replayer) - 1))})")
+        self.seek_replay(0)
+
+    def stop_replay(self):
+        """退出回放，恢复实时采集"""
+        if self.replay_collector is None:
+            return
+        self.replay_timer.stop()
+        collector, self.replay_collector = self.replay_collector, None
+        self.collector_worker.collector = self.collector
+        self.worker_task_requested.emit(collector.replayer.close)
+        self.update_replay_controls()
+        self.log("已退出回放")
+        self.update_process_list()
+
+    def seek_replay(self, frame):
+        """跳到第 frame 帧(按索引定位关键帧后解码，采集线程中进行)"""
+        collector = self.replay_collector
+        frame = min(max(frame, 0), len(collector.replayer) - 1)
+        collector.target = frame
+        self.replay_position_time = collector.replayer.time_at(frame)
+        self.replay_label.setText(f"第{frame + 1}/{len(collector.replayer)}帧  "
+                                  f"{self.format_time(self.replay_position_time)}")
+        if self.replay_slider.value() != frame:
+            self.replay_slider.blockSignals(True)
+            self.replay_slider.setValue(frame)
+            self.replay_slider.blockSignals(False)
+        self.update_process_list()
+
+    def on_replay_slider_changed(self, value):
+        if self.replay_collector is not None:
+            self.seek_replay(value)
+
+    def toggle_replay_playing(self):
+        if self.replay_timer.isActive():
+            self.replay_timer.stop()
+            self.replay_play_btn.setText("播放")
+        else:
+            self.replay_clock = time.monotonic()
+            self.replay_timer.start()
+            self.replay_play_btn.setText("暂停")
 
-        self.process_list.horizontalHeader().sectionClicked.connect(self.on_header_clicked) 
+    def on_replay_tick(self):
+        """按回放速度推进录制时间，定位到对应的帧"""
+        now = time.monotonic()
+        speed = float(self.replay_speed_combo.currentText().rstrip("x"))
+        self.replay_position_time += (now - self.replay_clock) * speed
+        self.replay_clock = now
+        replayer = self.replay_collector.replayer
+        frame = replayer.find(self.replay_position_time)
+        if frame != self.replay_collector.target:
+            position_time = self.replay_position_time
+            self.seek_replay(frame)
+            self.replay_position_time = position_time
+        if frame >= len(replayer) - 1:
+            self.toggle_replay_playing()
 
-        # 设置表头样式
-        header = self.process_list.horizontalHeader()
-        header.setSectionsClickable(True)
-        header.setSortIndicatorShown(True)
-        header.setSortIndicator(0, Qt.AscendingOrder)  # 默认按PID升序
-        self.top_layout.addWidget(self.process_list)  # 最后添加到布局
+    def create_hosts_tab(self, agents=()):
+        """创建远程主机标签页: 连接其他主机上运行的采集代理(process_cli.py agent)"""
+        self.hosts_tab = QWidget()
+        layout = QVBoxLayout(self.hosts_tab)
 
+        self.host_list = QListWidget()
+        layout.addWidget(self.host_list)
 
-        
-        # 下部区域 - 控制面板
-        self.bottom_widget = QWidget()
-        self.bottom_layout = QVBoxLayout(self.bottom_widget)
-        
-        # 控制面板内容
-        self.control_panel = QTabWidget()
-        self.control_panel.setVisible(False)  # 默认收起
-        
-        # 创建各个标签页
-        self.create_common_tab()      # 标签1: 常用
-        self.create_empty_tabs(2, 3)  # 标签2-8: 空标签
-        self.create_log_tab()         # 标签9: 日志
-        
-        self.bottom_layout.addWidget(self.control_panel)
-        
-        # 将上下部分添加到分割器
-        self.splitter.addWidget(self.top_container)
-        self.splitter.addWidget(self.bottom_widget)
-        
-        # 设置初始分割器位置
-        self.splitter.setSizes([500, 100])
-        
-        # 初始化进程列表
-        self.update_process_list()
-        
-        # 日志记录
-        self.log("程序启动成功")
+        form_layout = QHBoxLayout()
+        self.agent_address_input = QLineEdit()
+        self.agent_address_input.setPlaceholderText("代理地址，如 192.168.1.10:7711 或 unix:/tmp/agent.sock")
+        self.agent_address_input.returnPressed.connect(self.on_add_agent_clicked)
+        form_layout.addWidget(self.agent_address_input)
+        add_btn = QPushButton("连接")
+        add_btn.clicked.connect(self.on_add_agent_clicked)
+        form_layout.addWidget(add_btn)
+        remove_btn = QPushButton("断开选中主机")
+        remove_btn.clicked.connect(self.on_remove_agent_clicked)
+        form_layout.addWidget(remove_btn)
+        layout.addLayout(form_layout)
 
-    def get_window_titles(self, pid):
-        """获取进程的所有窗口标题"""
-        titles = []
+        self.show_local_checkbox = QCheckBox("显示本机进程")
+        self.show_local_checkbox.setChecked(True)
+        self.show_local_checkbox.stateChanged.connect(self.on_show_local_changed)
+        layout.addWidget(self.show_local_checkbox)
+
+        self.control_panel.addTab(self.hosts_tab, "主机")
+        for address in agents:
+            self.add_agent(address, save=False)
+
+    def on_add_agent_clicked(self):
+        address = self.agent_address_input.text().strip()
+        if address and self.add_agent(address):
+            self.agent_address_input.clear()
+
+    def on_remove_agent_clicked(self):
+        for address in [item.data(Qt.UserRole) for item in self.host_list.selectedItems()]:
+            self.remove_agent(address)
+
+    def on_show_local_changed(self):
+        if self.multi_host_collector is not None:
+            self.multi_host_collector.include_local = self.show_local_checkbox.isChecked()
+            self.update_process_list()
+
+    def add_agent(self, address, save=True):
+        """连接采集代理，返回是否已添加；首次添加时把采集器换成多主机采集器"""
+        if self.multi_host_collector is None:
+            # 只有连接远程主机时才需要网络模块
+            from process_agent import MultiHostCollector
+            self.multi_host_collector = MultiHostCollector(self.collector, self.show_local_checkbox.isChecked())
+            self.collector = self.multi_host_collector
+            if self.replay_collector is None:
+                self.collector_worker.collector = self.collector
         try:
-            def callback(hwnd, lparam):
-                window_pid = ctypes.c_ulong()
-                ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(window_pid))
-                if window_pid.value == pid:
-                    length = ctypes.windll.user32.GetWindowTextLengthW(hwnd)
-                    buff = ctypes.create_unicode_buffer(length + 1)
-                    ctypes.windll.user32.GetWindowTextW(hwnd, buff, length + 1)
-                    if buff.value:
-                        titles.append(buff.value)
-                return True
-            
-            ctypes.windll.user32.EnumWindows(ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_int, ctypes.POINTER(ctypes.c_int))(callback), 0)
-        except Exception as e:
-            self.log(f"获取窗口标题失败(PID: {pid}): {str(e)}", error=True)
-        return titles
-    
-    def create_common_tab(self):
-        """创建常用标签页"""
-        self.common_tab = QWidget()
-        layout = QVBoxLayout(self.common_tab)
-        
-        # 显示隐藏进程选项
-        self.show_hidden_checkbox = QCheckBox("显示隐藏进程")
-        self.show_hidden_checkbox.setChecked(False)
-        self.show_hidden_checkbox.stateChanged.connect(self.update_process_list)
-        layout.addWidget(self.show_hidden_checkbox)
-        
-        # 添加一些常用按钮
-        self.refresh_btn = QPushButton("刷新进程列表")
-        self.refresh_btn.clicked.connect(self.on_refresh_clicked)
-        layout.addWidget(self.refresh_btn)
-        
-        # 结束所有隐藏进程按钮
-        self.kill_hidden_btn = QPushButton("结束所有隐藏进程")
-        self.kill_hidden_btn.clicked.connect(self.kill_all_hidden_processes)
-        layout.addWidget(self.kill_hidden_btn)
-        
-        layout.addStretch()
-        self.control_panel.addTab(self.common_tab, "常用")
-    
-    def on_refresh_clicked(self):
-        """刷新按钮点击事件"""
-        self.refresh_btn.setEnabled(False)  # 禁用按钮
-        QApplication.processEvents()  # 立即更新UI
+            self.multi_host_collector.add_agent(address)
+        except ValueError as e:
+            self.log(str(e), error=True)
+            return False
+        self.log(f"正在连接采集代理: {address}")
+        if save:
+            self.save_state()
+        self.update_host_status()
+        return True
+
+    def remove_agent(self, address):
+        self.multi_host_collector.remove_agent(address)
+        self.log(f"已断开采集代理: {address}")
+        self.save_state()
+        self.update_host_status()
         self.update_process_list()
-        self.refresh_btn.setEnabled(True)  # 重新启用按钮
-    
-    def create_empty_tabs(self, start, end):
-        """创建空的标签页"""
-        for i in range(start, end+1):
-            tab = QWidget()
-            layout = QVBoxLayout(tab)
-            label = QLabel(f"标签页 {i} - 功能待实现")
-            label.setAlignment(Qt.AlignCenter)
-            layout.addWidget(label)
-            layout.addStretch()
-            self.control_panel.addTab(tab, f"标签{i}")
-    
+
+    def update_host_status(self):
+        """刷新主机列表的连接状态、主机列和按主机过滤的选项"""
+        connections = list(self.multi_host_collector.connections.values()) if self.multi_host_collector else []
+        if self.host_list.count() != len(connections):
+            self.host_list.clear()
+            for connection in connections:
+                item = QListWidgetItem()
+                item.setData(Qt.UserRole, connection.address)
+                self.host_list.addItem(item)
+        for row, connection in enumerate(connections):
+            item = self.host_list.item(row)
+            item.setData(Qt.UserRole, connection.address)
+            text = f"{connection.label} ({connection.address}): {connection.status}"
+            if connection.connected:
+                text += f", {len(connection.rows)}个进程, 已接收{format_bytes(connection.bytes_received)}"
+            item.setText(text)
+            item.setForeground(QColor(0, 0, 0) if connection.connected else HIDDEN_COLOR)
+
+        labels = tuple(sorted(connection.label for connection in connections if connection.connected))
+        self.process_list.setColumnHidden(ProcessTableModel.HOST_COLUMN, not connections)
+        self.host_filter_combo.setVisible(bool(connections))
+        if labels != self.host_labels:
+            self.host_labels = labels
+            current = self.host_filter_combo.currentText()
+            self.host_filter_combo.blockSignals(True)
+            self.host_filter_combo.clear()
+            self.host_filter_combo.addItems(["全部主机", "本机"] + list(labels))
+            self.host_filter_combo.setCurrentIndex(max(self.host_filter_combo.findText(current), 0))
+            self.host_filter_combo.blockSignals(False)
+            self.filter_process_list()
+
+    def create_performance_tab(self):
+        """创建性能标签页: 每次刷新各阶段的耗时统计，可导出为CSV"""
+        self.performance_tab = QWidget()
+        layout = QVBoxLayout(self.performance_tab)
+
+        self.perf_table = QTableWidget(len(PERF_STAGES), 6)
+        self.perf_table.setHorizontalHeaderLabels(["阶段", "次数", "最近", "P50", "P95", "最大"])
+        self.perf_table.verticalHeader().setVisible(False)
+        self.perf_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.perf_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for row, (stage, (label, unit)) in enumerate(PERF_STAGES.items()):
+            self.perf_table.setItem(row, 0, QTableWidgetItem(f"{label} ({unit})"))
+            for column in range(1, 6):
+                item = QTableWidgetItem("-")
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.perf_table.setItem(row, column, item)
+        layout.addWidget(self.perf_table)
+
+        self.perf_label = QLabel(f"统计最近{PERF_WINDOW}次采样")
+        layout.addWidget(self.perf_label)
+
+        button_layout = QHBoxLayout()
+        export_btn = QPushButton("导出CSV...")
+        export_btn.clicked.connect(self.on_export_perf_clicked)
+        button_layout.addWidget(export_btn)
+        clear_btn = QPushButton("清空统计")
+        clear_btn.clicked.connect(self.clear_perf_stats)
+        button_layout.addWidget(clear_btn)
+        layout.addLayout(button_layout)
+
+        # 性能页可见时每秒刷新一次统计并采样本程序内存
+        self.perf_timer = QTimer(self)
+        self.perf_timer.setInterval(1000)
+        self.perf_timer.timeout.connect(self.render_perf_stats)
+        self.control_panel.addTab(self.performance_tab, "性能")
+
+    def update_perf_enabled(self):
+        """性能页可见时才开启过滤/排序探针和统计刷新"""
+        enabled = self.control_panel.isVisible() and self.control_panel.currentWidget() is self.performance_tab
+        if enabled == self.perf_probes.enabled:
+            return
+        self.perf_probes.enabled = enabled
+        if enabled:
+            self.render_perf_stats()
+            self.perf_timer.start()
+        else:
+            self.perf_timer.stop()
+
+    def render_perf_stats(self):
+        """采样内存并刷新统计表格"""
+        probes = self.perf_probes
+        probes.record('rss', psutil.Process().memory_info().rss)
+        for row, stage in enumerate(PERF_STAGES):
+            stats = probes.stats(stage)
+            if stats is None:
+                continue
+            count, last, p50, p95, maximum = stats
+            for column, value in enumerate((count, last, p50, p95, maximum), 1):
+                self.perf_table.item(row, column).setText(str(value) if column == 1 else f"{value:.1f}")
+        info = f"统计最近{PERF_WINDOW}次采样, 表格共{self.process_model.rowCount()}行"
+        if self.metric_history is not None:
+            info += f", 资源历史缓冲区{format_bytes(self.metric_history.nbytes)}"
+        self.perf_label.setText(info)
+
+    def clear_perf_stats(self):
+        self.perf_probes.clear()
+        for row in range(self.perf_table.rowCount()):
+            for column in range(1, 6):
+                self.perf_table.item(row, column).setText("-")
+
+    def on_export_perf_clicked(self):
+        from datetime import datetime
+        default_path = os.path.join(os.path.dirname(default_state_path()),
+                                    datetime.now().strftime("ProcessManager-perf-%Y%m%d-%H%M%S.csv"))
+        path, _ = QFileDialog.getSaveFileName(self, "导出性能统计", default_path, "CSV 文件 (*.csv)")
+        if path:
+            self.export_perf_stats(path)
+
+    def export_perf_stats(self, path):
+        try:
+            with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+                count = self.perf_probes.write_csv(f)
+        except OSError as e:
+            self.log(f"导出性能统计失败: {str(e)}", error=True)
+            return
+        self.log(f"已导出{count}条性能采样: {path}")
+
     def create_log_tab(self):
         """创建日志标签页"""
         self.log_tab = QWidget()
         layout = QVBoxLayout(self.log_tab)
         
-        # 日志文本框
-        self.log_text = QTextEdit()
+        # 日志文本框(超过上限时自动丢弃最早的行)
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
         self.log_text.setFont(QFont("Microsoft YaHei", 9))
+        self.log_text.setMaximumBlockCount(self.log_buffer.capacity)
+        self.log_formats = {logging.INFO: QTextCharFormat(), logging.ERROR: QTextCharFormat()}
+        self.log_formats[logging.ERROR].setForeground(QColor(255, 0, 0))
         
         # 添加滚动区域
         scroll = QScrollArea()
@@ -220,10 +3089,20 @@ class ProcessManager(QMainWindow):
         scroll.setWidgetResizable(True)
         layout.addWidget(scroll)
         
-        # 添加清空日志按钮
+        # 保留条数设置和清空日志按钮
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addWidget(QLabel("最多保留"))
+        self.log_capacity_spin = QSpinBox()
+        self.log_capacity_spin.setRange(100, 100000)
+        self.log_capacity_spin.setSingleStep(1000)
+        self.log_capacity_spin.setSuffix(" 条")
+        self.log_capacity_spin.setValue(self.log_buffer.capacity)
+        self.log_capacity_spin.valueChanged.connect(self.set_log_capacity)
+        bottom_layout.addWidget(self.log_capacity_spin)
         clear_btn = QPushButton("清空日志")
         clear_btn.clicked.connect(self.clear_log)
-        layout.addWidget(clear_btn)
+        bottom_layout.addWidget(clear_btn)
+        layout.addLayout(bottom_layout)
         
         self.control_panel.addTab(self.log_tab, "日志")
     
@@ -237,85 +3116,159 @@ class ProcessManager(QMainWindow):
             self.control_panel.setVisible(True)
             self.toggle_button.setText("▲ 收起控制面板")
             self.splitter.setSizes([400, 200])  # 展开状态
+        self.update_perf_enabled()
     
     def update_process_list(self):
-        """更新进程列表"""
-        self.process_list.setSortingEnabled(False)  # 临时禁用排序
-        self.process_list.setRowCount(0)  # 清空表格
-        
-        show_hidden = self.show_hidden_checkbox.isChecked()
-        
-        for proc in psutil.process_iter(['pid', 'name', 'username', 'status']):
-            try:
-                pid = proc.info['pid']
-                
-                # 检查进程是否被隐藏
-                is_hidden = pid in self.hidden_processes and self.hidden_processes[pid]
-                
-                # 如果不显示隐藏进程且进程是隐藏状态，则跳过
-                if not show_hidden and is_hidden:
-                    continue
-                
-                # 获取窗口标题
-                window_titles = self.get_window_titles(pid)
-                title_info = ', '.join(window_titles) if window_titles else ""
-                
-                # 添加行
-                row = self.process_list.rowCount()
-                self.process_list.insertRow(row)
-                
-                # PID列
-                pid_item = QTableWidgetItem(str(pid))
-                pid_item.setData(Qt.UserRole, pid)
-                if is_hidden:
-                    pid_item.setForeground(QColor(255, 0, 0))
-                self.process_list.setItem(row, 0, pid_item)
-                
-                # 进程名列
-                name_item = QTableWidgetItem(proc.info['name'])
-                if is_hidden:
-                    name_item.setText("[隐藏] " + proc.info['name'])
-                    name_item.setForeground(QColor(255, 0, 0))
-                self.process_list.setItem(row, 1, name_item)
-                
-                # 窗口标题列
-                title_item = QTableWidgetItem(title_info)
-                if is_hidden:
-                    title_item.setForeground(QColor(255, 0, 0))
-                self.process_list.setItem(row, 2, title_item)
-                
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                continue
-        
-        self.process_list.setSortingEnabled(True)  # 重新启用排序
-        self.log("进程列表已更新")
+        """请求刷新进程列表(在后台线程采集，扫描中的重复请求合并为一次)"""
+        if self.scan_running:
+            self.scan_pending = True
+            return
+        self.scan_running = True
+        self.scan_pending = False
+        self.loop_monitor.start()
+        self.scan_requested.emit((frozenset(self.hidden_keys), self.show_hidden_checkbox.isChecked(), self.rule_set))
 
-        # 如果有搜索文本，应用过滤
-        if self.search_input.toPlainText().strip():
-            self.filter_process_list()
+    def refresh_now(self):
+        """在当前线程同步采集并应用一次快照(用于基准测试)"""
+        self.apply_snapshot(self.collector.collect(frozenset(self.hidden_keys),
+                                                   self.show_hidden_checkbox.isChecked(), self.rule_set))
+
+    def apply_snapshot(self, snapshot):
+        """把采集线程送来的快照应用到表格(只增删改有变化的行)"""
+        self.scan_running = False
+        loop_lag = self.loop_monitor.stop()
+        for error in snapshot.errors:
+            self.log(error, error=True)
 
+        added = removed = changed = ()
+        apply_time = 0.0
+        if snapshot.rows is not None:
+            start = time.perf_counter()
+            added, removed, changed = self.process_model.diff(snapshot.rows)
+            if added or removed or changed:
+                # 源模型的增删改合并为一次重新排序/过滤，选中行按进程键保留
+                self.proxy_model.begin_batch()
+                try:
+                    self.process_model.apply_diff(added, removed, changed)
+                    self.process_model.apply_metrics(snapshot.rows)
+                finally:
+                    self.proxy_model.end_batch()
+            else:
+                self.process_model.apply_metrics(snapshot.rows)
+            self.snapshot_time = snapshot.created_at
+            if self.exporter is not None:
+                self.export_table_frame(self.exporter, snapshot.created_at)
+            alerts = ()
+            if self.metric_history is not None and self.replay_collector is None:
+                self.metric_history.append(self.process_model, snapshot.created_at)
+                if self.watchdog is not None:
+                    watch_start = time.perf_counter()
+                    alerts = self.watchdog.evaluate(self.metric_history, self.process_model, snapshot.created_at)
+                    self.perf_probes.record('watch', time.perf_counter() - watch_start)
+            # 子树汇总值随每次快照变化
+            self.schedule_tree_rebuild()
+            apply_time = time.perf_counter() - start
 
-        # 恢复之前的排序状态
-        if hasattr(self, 'current_sort_column'):
-            sort_method = self.sort_methods.get(self.current_sort_column, self.sort_by_pid)
-            sort_method(self.sort_order)
-            self.process_list.horizontalHeader().setSortIndicator(self.current_sort_column, self.sort_order)
+            probes = self.perf_probes
+            probes.record('scan', max(snapshot.scan_time - snapshot.window_time - snapshot.rule_time, 0.0))
+            probes.record('window', snapshot.window_time)
+            if self.rule_set:
+                probes.record('rules', snapshot.rule_time)
+            probes.record('apply', apply_time)
+            probes.record('loop_lag', loop_lag)
+
+            rule_info = (f", {len(self.rule_set)}条规则匹配{len(snapshot.rule_matches)}个进程"
+                         f"耗时{snapshot.rule_time * 1000:.1f}ms" if self.rule_set else "")
+            self.log(f"进程列表已更新 (新增{len(added)}, 结束{len(removed)}, 变化{len(changed)}; "
+                     f"扫描{snapshot.scan_time * 1000:.0f}ms, 其中窗口枚举{snapshot.window_time * 1000:.0f}ms, "
+                     f"应用{apply_time * 1000:.1f}ms, 事件循环最大延迟{loop_lag * 1000:.1f}ms{rule_info})")
+            if self.multi_host_collector is not None:
+                self.update_host_status()
+            # 只丢弃已退出进程的缓存: 被隐藏的进程不在快照中，但重新显示时仍可使用
+            for key in removed:
+                if key not in self.hidden_keys:
+                    self.details_cache.pop(key, None)
+            if self.details_key is not None:
+                self.render_details()
+            if not self.first_snapshot_applied:
+                self.on_first_snapshot()
+            if snapshot.rule_matches or self.rule_applied:
+                self.apply_rule_matches(snapshot.rule_matches)
+            if alerts:
+                self.apply_watch_alerts(alerts)
+
+        self.refresh_btn.setEnabled(self.replay_collector is None)
+        if self.scan_pending:
+            self.update_process_list()
+        else:
+            churn = (len(added) + len(removed) + len(changed)) / max(len(snapshot.rows or ()), 1)
+            self.schedule_auto_refresh(snapshot.cpu_time + apply_time, churn)
+
+    def on_first_snapshot(self):
+        """首次快照已应用: 去掉占位提示，首行显示后在后台预热拼音词典"""
+        self.first_snapshot_applied = True
+        mark_startup("首个快照")
+        self.loading_label.setVisible(False)
+        QTimer.singleShot(0, self.on_first_rows_painted)
+
+    def on_first_rows_painted(self):
+        mark_startup("首行显示")
+        self.action_pool.submit(self.warm_up)
+        if self.profile_startup:
+            self.log("启动耗时:")
+            for line in startup_report():
+                print(line, file=sys.stderr)
+                self.log("  " + line)
+
+    def warm_up(self):
+        """在线程池中导入拼音词典和 NumPy，完成后在界面线程创建资源历史并冻结新创建的对象
+        (见 __main__ 中的 gc.freeze)"""
+        try:
+            pinyin_of("预热")
+        except Exception as e:
+            message = f"加载拼音词典失败: {str(e)}"
+            self.action_finished.emit(lambda: self.log(message, error=True))
+        try:
+            importlib.import_module("numpy")  # 只为提前导入，MetricHistory 创建时即可直接使用
+        except ImportError as e:
+            message = f"未安装 NumPy，不记录资源历史: {str(e)}"
+            self.action_finished.emit(lambda: self.log(message, error=True))
+            self.action_finished.emit(gc.freeze)
+            return
+        self.action_finished.emit(self.on_warm_up_finished)
+
+    def on_warm_up_finished(self):
+        self.metric_history = MetricHistory()
+        self.rebuild_watchdog()
+        gc.freeze()
 
-    
     def show_context_menu(self, position):
         """显示右键菜单"""
-        item = self.process_list.itemAt(position)
-        if not item:
+        view = self.current_view()
+        index = view.indexAt(position)
+        if not index.isValid():
             return
         
-        row = item.row()
-        pid_item = self.process_list.item(row, 0)
-        pid = pid_item.data(Qt.UserRole)
-        proc_name_item = self.process_list.item(row, 1)
-        proc_name = proc_name_item.text().replace("[隐藏] ", "")
+        if view is self.group_view:
+            row = self.group_model.row_of(index)
+            if row is None:
+                self.show_group_context_menu(index, position)
+                return
+        elif view is self.process_tree:
+            row = self.tree_model.row_of(index)
+        else:
+            row = self.proxy_model.source_row(index.row())
+        pid = self.process_model.pid_at(row)
+        proc_name = self.process_model.name_at(row)
+        key = self.process_model.key_at(row)
+
+        # 右键点击的行在多选范围内时，操作作用于所有选中的进程
+        keys = self.selected_keys(view)
+        if key not in keys:
+            keys = [key]
         
         # 检查进程是否已隐藏
-        is_hidden = pid in self.hidden_processes and self.hidden_processes[pid]
+        is_hidden = key in self.hidden_keys
         
         # 创建菜单
         menu = QMenu()
@@ -325,48 +3278,140 @@ class ProcessManager(QMainWindow):
         sort_menu.addAction("按PID排序", lambda: self.on_header_clicked(0))
         sort_menu.addAction("按进程名排序", lambda: self.on_header_clicked(1))
         sort_menu.addAction("按窗口标题排序", lambda: self.on_header_clicked(2))
+        sort_menu.addAction("按CPU排序", lambda: self.on_header_clicked(3))
+        sort_menu.addAction("按内存排序", lambda: self.on_header_clicked(4))
+        sort_menu.addSeparator()
+        tree_action = sort_menu.addAction("树形视图")
+        tree_action.setCheckable(True)
+        tree_action.setChecked(self.tree_view_checkbox.isChecked())
+        tree_action.toggled.connect(self.tree_view_checkbox.setChecked)
+        group_action = sort_menu.addAction("按进程名分组")
+        group_action.setCheckable(True)
+        group_action.setChecked(self.group_view_checkbox.isChecked())
+        group_action.toggled.connect(self.group_view_checkbox.setChecked)
         
+        # 回放时列表中的进程来自录制文件，远程主机的进程只能查看，都不提供进程操作
+        if self.replay_collector is not None or any(len(key) > 2 for key in keys):
+            menu.exec_(view.mapToGlobal(position))
+            return
+
         # 添加进程操作菜单项
-        show_hide_action = menu.addAction("隐藏进程" if not is_hidden else "显示进程")
-        kill_action = menu.addAction(f"结束进程: {proc_name}")
-        suspend_action = menu.addAction("挂起进程")
-        resume_action = menu.addAction("恢复进程")
+        if len(keys) > 1:
+            count = len(keys)
+            show_hide_action = kill_tree_action = None
+            kill_action = menu.addAction(f"结束选中的{count}个进程")
+            force_kill_action = menu.addAction(f"强制结束选中的{count}个进程")
+            suspend_action = menu.addAction(f"挂起选中的{count}个进程")
+            resume_action = menu.addAction(f"恢复选中的{count}个进程")
+        else:
+            show_hide_action = menu.addAction("隐藏进程" if not is_hidden else "显示进程")
+            kill_action = menu.addAction(f"结束进程: {proc_name}")
+            force_kill_action = menu.addAction("强制结束进程")
+            kill_tree_action = menu.addAction("结束进程树")
+            suspend_action = menu.addAction("挂起进程")
+            resume_action = menu.addAction("恢复进程")
+            rule_menu = menu.addMenu("添加自动规则")
+            for rule_action, rule_name in RULE_ACTIONS.items():
+                rule = ProcessRule('name', proc_name, rule_action)
+                rule_menu.addAction(f"自动{rule_name}所有 {proc_name}", lambda rule=rule: self.add_rule(rule))
         
         # 显示菜单并获取选择
-        action = menu.exec_(self.process_list.mapToGlobal(position))
+        action = menu.exec_(view.mapToGlobal(position))
+        if action is None:
+            return
         
         if action == show_hide_action:
-            self.toggle_process_visibility(pid, not is_hidden)
+            self.toggle_process_visibility(key, not is_hidden)
         elif action == kill_action:
-            self.kill_process(pid)
+            self.kill_processes(keys)
+        elif action == force_kill_action:
+            self.kill_processes(keys, force=True)
+        elif action == kill_tree_action:
+            self.kill_process_tree(pid)
+        elif action == suspend_action:
+            self.start_bulk_action('suspend', keys)
+        elif action == resume_action:
+            self.start_bulk_action('resume', keys)
+
+    def show_group_context_menu(self, index, position):
+        """分组行的右键菜单: 对该组(或选中的多个组)的所有实例执行操作"""
+        model = self.group_model
+        group = model.group_of(index)
+        name = self.process_model.name_at(model.groups.first_rows[group])
+        selected = self.group_view.selectionModel().selectedRows()
+        if index.siblingAtColumn(0) in selected:
+            keys = self.selected_keys(self.group_view)
+            title = f"选中的{len(keys)}个进程"
+        else:
+            keys = [self.process_model.key_at(row) for row in model.group_rows(group)]
+            title = f"全部{len(keys)}个 {name}"
+
+        menu = QMenu()
+        expand_action = menu.addAction("折叠" if self.group_view.isExpanded(index) else "展开")
+        expand_action.triggered.connect(
+            lambda: self.group_view.setExpanded(index.siblingAtColumn(0), not self.group_view.isExpanded(index)))
+        group_action = menu.addAction("按进程名分组")
+        group_action.setCheckable(True)
+        group_action.setChecked(True)
+        group_action.toggled.connect(self.group_view_checkbox.setChecked)
+
+        # 回放和远程主机的进程只能查看
+        if self.replay_collector is None and not any(len(key) > 2 for key in keys):
+            menu.addSeparator()
+            kill_action = menu.addAction(f"结束{title}")
+            force_kill_action = menu.addAction(f"强制结束{title}")
+            suspend_action = menu.addAction(f"挂起{title}")
+            resume_action = menu.addAction(f"恢复{title}")
+            hide_action = menu.addAction(f"隐藏{title}")
+            rule_menu = menu.addMenu("添加自动规则")
+            for rule_action, rule_name in RULE_ACTIONS.items():
+                rule = ProcessRule('name', name, rule_action)
+                rule_menu.addAction(f"自动{rule_name}所有 {name}", lambda rule=rule: self.add_rule(rule))
+        else:
+            kill_action = force_kill_action = suspend_action = resume_action = hide_action = None
+
+        action = menu.exec_(self.group_view.mapToGlobal(position))
+        if action is None:
+            return
+        if action in (kill_action, force_kill_action):
+            force = action is force_kill_action
+            reply = QMessageBox.question(self, '确认', f"确定要{'强制' if force else ''}结束{title}吗?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply == QMessageBox.Yes:
+                self.start_bulk_action('kill' if force else 'terminate', keys)
         elif action == suspend_action:
-            self.suspend_process(pid)
+            self.start_bulk_action('suspend', keys)
         elif action == resume_action:
-            self.resume_process(pid)
+            self.start_bulk_action('resume', keys)
+        elif action == hide_action:
+            self.set_processes_hidden(keys, True)
+            self.log(f"已隐藏{title}")
+            self.update_process_list()
+
+    def selected_keys(self, view):
+        """当前视图中选中的进程 (pid, create_time) 列表"""
+        source = self.process_model
+        if view is self.group_view:
+            # 选中分组行相当于选中组内所有进程
+            rows = set()
+            for index in view.selectionModel().selectedRows():
+                group = self.group_model.group_of(index)
+                if group is None:
+                    rows.add(self.group_model.row_of(index))
+                else:
+                    rows.update(self.group_model.group_rows(group))
+        elif view is self.process_tree:
+            rows = {self.tree_model.row_of(index) for index in view.selectionModel().selectedRows()}
+        else:
+            rows = {self.proxy_model.source_row(index.row()) for index in view.selectionModel().selectedRows()}
+        return [source.key_at(row) for row in sorted(rows)]
     
-    def toggle_process_visibility(self, pid, hide):
+    def toggle_process_visibility(self, key, hide):
         """切换进程显示/隐藏状态"""
+        pid = key[0]
         try:
-            # 使用Windows API隐藏进程窗口
-            user32 = ctypes.windll.user32
-            
-            # 枚举进程的所有窗口
-            @ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_int, ctypes.POINTER(ctypes.c_int))
-            def enum_windows_callback(hwnd, lparam):
-                # 获取窗口所属进程ID
-                window_pid = ctypes.c_ulong()
-                user32.GetWindowThreadProcessId(hwnd, ctypes.byref(window_pid))
-                
-                if window_pid.value == pid:
-                    # 隐藏或显示窗口
-                    user32.ShowWindow(hwnd, 0 if hide else 1)
-                return True
-            
-            # 枚举所有窗口
-            user32.EnumWindows(enum_windows_callback, 0)
-            
-            # 更新隐藏状态
-            self.hidden_processes[pid] = hide
+            # 隐藏或显示进程的所有窗口，并更新隐藏状态
+            self.set_processes_hidden([key], hide)
             status = "隐藏" if hide else "显示"
             self.log(f"已{status}进程(PID: {pid})")
             self.update_process_list()
@@ -374,134 +3419,340 @@ class ProcessManager(QMainWindow):
         except Exception as e:
             self.log(f"切换进程显示状态失败(PID: {pid}): {str(e)}", error=True)
     
+    def set_processes_hidden(self, keys, hide):
+        """更新并保存隐藏状态，在线程池中隐藏或显示这批进程的所有窗口(只枚举一次窗口)"""
+        if hide:
+            self.hidden_keys.update(keys)
+        else:
+            self.hidden_keys.difference_update(keys)
+        self.save_state()
+
+        pids = {pid for pid, _ in keys}
+        provider = self.window_index.provider
+
+        def run():
+            try:
+                for hwnd, pid, title in provider.enum_windows():
+                    if pid in pids:
+                        provider.show_window(hwnd, not hide)
+            except Exception as e:
+                message = f"{'隐藏' if hide else '显示'}进程窗口失败: {str(e)}"
+                self.action_finished.emit(lambda: self.log(message, error=True))
+
+        self.action_pool.submit(run)
+
     def kill_process(self, pid):
         """结束进程"""
-        try:
-            reply = QMessageBox.question(
-                self, '确认', 
-                f"确定要结束进程(PID: {pid})吗?", 
-                QMessageBox.Yes | QMessageBox.No, 
-                QMessageBox.No
-            )
-            
-            if reply == QMessageBox.Yes:
-                proc = psutil.Process(pid)
-                proc_name = proc.name()
-                proc.terminate()
-                self.log(f"已结束进程: {proc_name} (PID: {pid})")
-                
-                # 如果进程是隐藏的，从字典中移除
-                if pid in self.hidden_processes:
-                    del self.hidden_processes[pid]
-                
-                self.update_process_list()
-        except Exception as e:
-            self.log(f"结束进程失败(PID: {pid}): {str(e)}", error=True)
+        self.kill_processes([self.key_of_pid(pid)])
+
+    def kill_processes(self, keys, force=False):
+        """确认后结束一批进程"""
+        if len(keys) == 1:
+            question = f"确定要{'强制' if force else ''}结束进程(PID: {keys[0][0]})吗?"
+        else:
+            question = f"确定要{'强制' if force else ''}结束选中的{len(keys)}个进程吗?"
+        reply = QMessageBox.question(
+            self, '确认', 
+            question, 
+            QMessageBox.Yes | QMessageBox.No, 
+            QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.start_bulk_action('kill' if force else 'terminate', keys)
+
+    def start_bulk_action(self, action, keys):
+        """在线程池中执行批量进程操作，完成后汇总记录日志并刷新一次列表"""
+        if len(keys) > 1:
+            self.log(f"正在{BULK_ACTIONS[action]}{len(keys)}个进程...")
+
+        def run():
+            try:
+                result = run_bulk_action(action, keys, backend=self.backend)
+            except Exception as e:
+                result = BulkActionResult(action, [], [], [], [(pid, str(e)) for pid, _ in keys], 0.0)
+            self.action_finished.emit(lambda: self.on_bulk_action_finished(result, keys))
+
+        self.action_pool.submit(run)
+
+    def on_bulk_action_finished(self, result, keys=()):
+        """批量进程操作完成"""
+        name = BULK_ACTIONS[result.action]
+        if result.action in ('terminate', 'kill'):
+            # 已结束的进程不再记录为隐藏/挂起(按进程键，PID 已被其他进程复用时不影响新进程)
+            ended = set(result.succeeded + result.gone)
+            self.forget_processes([key for key in keys if key[0] in ended])
+        elif result.succeeded:
+            succeeded = set(result.succeeded)
+            done_keys = {key for key in keys if key[0] in succeeded and key[1] is not None}
+            if result.action == 'suspend':
+                self.suspended_keys.update(done_keys)
+            else:
+                self.suspended_keys.difference_update(done_keys)
+            self.save_state()
+
+        if len(result.succeeded) + len(result.gone) + len(result.failures) == 1 and not result.escalated:
+            if result.succeeded:
+                self.log(f"已{name}进程(PID: {result.succeeded[0]})")
+            elif result.gone:
+                self.log(f"进程已退出(PID: {result.gone[0]})")
+        else:
+            summary = f"批量{name}完成: 成功{len(result.succeeded)}个"
+            if result.escalated:
+                summary += f"(其中{len(result.escalated)}个超时后强制结束)"
+            if result.gone:
+                summary += f", 已退出{len(result.gone)}个"
+            summary += f", 失败{len(result.failures)}个, 耗时{result.elapsed:.2f}秒"
+            self.log(summary, error=bool(result.failures))
+        for pid, error in result.failures:
+            self.log(f"{name}进程失败(PID: {pid}): {error}", error=True)
+
+        if result.action in ('terminate', 'kill'):
+            self.update_process_list()
     
+    def kill_process_tree(self, pid):
+        """结束进程及其所有子进程(在线程池中自底向上并行结束)"""
+        reply = QMessageBox.question(
+            self, '确认', 
+            f"确定要结束进程(PID: {pid})及其所有子进程吗?", 
+            QMessageBox.Yes | QMessageBox.No, 
+            QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+
+        self.log(f"正在结束进程树(PID: {pid})...")
+
+        def run():
+            start = time.perf_counter()
+            try:
+                terminated, failures = terminate_process_tree(pid)
+                error = ""
+            except Exception as e:
+                terminated, failures, error = [], [], str(e)
+            elapsed = time.perf_counter() - start
+            self.action_finished.emit(lambda: self.on_process_tree_killed(pid, terminated, failures, error, elapsed))
+
+        self.action_pool.submit(run)
+
+    def on_process_tree_killed(self, pid, terminated, failures, error, elapsed):
+        """进程树结束完成"""
+        if error:
+            self.log(f"结束进程树失败(PID: {pid}): {error}", error=True)
+            return
+        self.forget_processes(self.keys_of_processes(terminated))
+        self.log(f"已结束进程树(PID: {pid}): 共{len(terminated)}个进程, 耗时{elapsed:.2f}秒")
+        for failure in failures:
+            self.log(f"结束进程失败(PID: {failure})", error=True)
+        self.update_process_list()
+
+    def keys_of_processes(self, procs):
+        """psutil.Process 列表 -> 隐藏/挂起记录中对应的进程键(创建时间相差不超过0.01秒视为同一进程)"""
+        create_times = {proc.pid: proc.create_time() for proc in procs}
+        return [key for key in self.hidden_keys | self.suspended_keys
+                if key[0] in create_times and abs(create_times[key[0]] - key[1]) <= 0.01]
+
+    def forget_processes(self, keys):
+        """已结束的进程从隐藏/挂起记录中移除(只移除这些进程键)"""
+        keys = set(keys)
+        hidden_keys = self.hidden_keys - keys
+        suspended_keys = self.suspended_keys - keys
+        if len(hidden_keys) != len(self.hidden_keys) or len(suspended_keys) != len(self.suspended_keys):
+            self.hidden_keys, self.suspended_keys = hidden_keys, suspended_keys
+            self.save_state()
+
+    def key_of_pid(self, pid):
+        """表格中该PID对应的进程键(不在表格中时创建时间记为 None)"""
+        for key in self.process_model.key_to_row:
+            if key[0] == pid:
+                return key
+        return (pid, None)
+
     def suspend_process(self, pid):
         """挂起进程"""
-        try:
-            kernel32 = ctypes.windll.kernel32
-            kernel32.DebugActiveProcess(pid)
-            self.log(f"已挂起进程(PID: {pid})")
-        except Exception as e:
-            self.log(f"挂起进程失败(PID: {pid}): {str(e)}", error=True)
+        self.start_bulk_action('suspend', [self.key_of_pid(pid)])
     
     def resume_process(self, pid):
         """恢复进程"""
-        try:
-            kernel32 = ctypes.windll.kernel32
-            kernel32.DebugActiveProcessStop(pid)
-            self.log(f"已恢复进程(PID: {pid})")
-        except Exception as e:
-            self.log(f"恢复进程失败(PID: {pid}): {str(e)}", error=True)
+        self.start_bulk_action('resume', [self.key_of_pid(pid)])
     
     def kill_all_hidden_processes(self):
         """结束所有隐藏进程"""
-        if not self.hidden_processes:
+        if not self.hidden_keys:
             self.log("没有隐藏的进程")
             return
         
         reply = QMessageBox.question(
             self, '确认', 
-            f"确定要结束所有{len(self.hidden_processes)}个隐藏进程吗?", 
+            f"确定要结束所有{len(self.hidden_keys)}个隐藏进程吗?", 
             QMessageBox.Yes | QMessageBox.No, 
             QMessageBox.No
         )
         
         if reply == QMessageBox.Yes:
-            killed = 0
-            for pid in list(self.hidden_processes.keys()):
-                try:
-                    proc = psutil.Process(pid)
-                    proc.terminate()
-                    del self.hidden_processes[pid]
-                    killed += 1
-                    self.log(f"已结束隐藏进程: {proc.name()} (PID: {pid})")
-                except Exception as e:
-                    self.log(f"结束隐藏进程失败(PID: {pid}): {str(e)}", error=True)
-            
-            self.log(f"已成功结束{killed}个隐藏进程")
-            self.update_process_list()
+            self.start_bulk_action('terminate', sorted(self.hidden_keys))
     
     def show_process_details(self, item):
-        """显示进程详细信息"""
-        pid = item.data(Qt.UserRole)
-        try:
-            proc = psutil.Process(pid)
-            with proc.oneshot():
-                # 获取更多进程信息
-                cpu_percent = proc.cpu_percent(interval=0.1)
-                mem_info = proc.memory_info()
-                threads = proc.num_threads()
-                
-                details = (
-                    f"===== 进程详细信息 =====\n"
-                    f"进程名称: {proc.name()}\n"
-                    f"进程ID: {pid}\n"
-                    f"状态: {proc.status()}\n"
-                    f"创建时间: {self.format_time(proc.create_time())}\n"
-                    f"CPU使用率: {cpu_percent}%\n"
-                    f"内存使用(RSS): {mem_info.rss / 1024 / 1024:.2f} MB\n"
-                    f"内存使用(VMS): {mem_info.vms / 1024 / 1024:.2f} MB\n"
-                    f"线程数: {threads}\n"
-                    f"执行路径: {proc.exe() or 'N/A'}\n"
-                    f"命令行: {' '.join(proc.cmdline()) if proc.cmdline() else 'N/A'}\n"
-                    f"用户名: {proc.username()}\n"
-                    f"工作目录: {proc.cwd() or 'N/A'}\n"
-                    f"是否隐藏: {'是' if pid in self.hidden_processes and self.hidden_processes[pid] else '否'}\n"
-                )
-            
-            self.log(f"查看进程详情: {proc.name()} (PID: {pid})")
-            self.log_text.append(details)
-            
-        except Exception as e:
-            self.log(f"获取进程详情失败(PID: {pid}): {str(e)}", error=True)
-    
+        """点击进程行: 在详情页显示该进程(控制面板展开时切换到详情页)"""
+        if self.control_panel.isVisible():
+            self.control_panel.setCurrentWidget(self.details_tab)
+        self.on_current_row_changed(item)
+
+    def on_current_row_changed(self, current, previous=None):
+        """当前行变化时立即用快照中的字段更新详情页，不变的字段稍后在采集线程中获取"""
+        if not current.isValid():
+            return
+        if current.model() is self.group_model:
+            # 分组行没有单个进程的详情
+            row = self.group_model.row_of(current)
+            if row is None:
+                return
+        elif current.model() is self.tree_model:
+            row = self.tree_model.row_of(current)
+        else:
+            row = self.proxy_model.source_row(current.row())
+        key = self.process_model.key_at(row)
+        if key == self.details_key:
+            return
+        self.details_key = key
+        self.details_error = None
+        self.render_details()
+        if len(key) == 2 and key not in self.details_cache and key not in self.details_pending:
+            self.details_timer.start()
+
+    def request_details(self):
+        """请求当前进程的详细信息(回放模式和远程主机的进程没有详细信息)"""
+        key = self.details_key
+        if (key is None or len(key) != 2 or self.replay_collector is not None
+                or key in self.details_cache or key in self.details_pending
+                or key not in self.process_model.key_to_row):
+            return
+        self.details_pending.add(key)
+        self.details_requested.emit(key)
+
+    def on_details_ready(self, key, info, error):
+        """采集线程返回进程详细信息(进程已不在列表中时不缓存)"""
+        self.details_pending.discard(key)
+        if key not in self.process_model.key_to_row:
+            return
+        if info is not None:
+            self.details_cache[key] = info
+        else:
+            self.details_error = (key, error)
+        if key == self.details_key:
+            self.render_details()
+
+    def render_details(self):
+        """显示当前进程的详细信息: 资源使用取自最新快照，可执行文件等取自缓存"""
+        key = self.details_key
+        model = self.process_model
+        row = model.key_to_row.get(key)
+        if row is None:
+            self.details_text.setPlainText(f"进程已退出 (PID: {key[0]})")
+            return
+        remote = model.host_ids[row] != model.local_host_id
+        lines = ["===== 进程详细信息 ====="]
+        if remote:
+            lines.append(f"主机: {model.host_at(row)}")
+        lines += [
+            f"进程名称: {model.name_at(row)}",
+            f"进程ID: {model.pids[row]}",
+            f"父进程ID: {model.ppids[row]}",
+            f"创建时间: {self.format_time(model.create_times[row])}",
+            f"CPU使用率: {model.format_metric(3, row)}%",
+            f"内存使用(RSS): {model.format_metric(4, row)}",
+            f"线程数: {model.format_metric(5, row)}",
+            f"读取/写入速率: {model.format_metric(6, row)} / {model.format_metric(7, row)}",
+        ]
+        user = model.user_at(row)
+        if remote or self.replay_collector is not None:
+            lines.append(f"用户名: {user or 'N/A'}")
+        else:
+            info = self.details_cache.get(key)
+            if info is None and self.details_error is not None and self.details_error[0] == key:
+                lines.append(f"获取详细信息失败: {self.details_error[1]}")
+                lines.append(f"用户名: {user or 'N/A'}")
+            elif info is None:
+                lines.append("执行路径/命令行: 正在获取...")
+                lines.append(f"用户名: {user or 'N/A'}")
+            else:
+                denied = lambda value: "N/A (拒绝访问)" if value is None else value or "N/A"
+                lines += [
+                    f"执行路径: {denied(info['exe'])}",
+                    f"命令行: {denied(info['cmdline'])}",
+                    f"用户名: {user or denied(info['username'])}",
+                    f"工作目录: {denied(info['cwd'])}",
+                ]
+        lines.append(f"窗口标题: {model.title_at(row) or 'N/A'}")
+        if not remote:
+            lines.append(f"是否隐藏: {'是' if key in self.hidden_keys else '否'}")
+            lines.append(f"是否挂起: {'是' if key in self.suspended_keys else '否'}")
+        text = "\n".join(lines) + "\n" + self.format_history(key)
+        if text != self.details_text.toPlainText():
+            self.details_text.setPlainText(text)
+
+    def format_history(self, key):
+        """资源历史的迷你折线图和最小/最大/平均值"""
+        history = self.metric_history
+        if history is None or key not in history.slot_of:
+            return ""
+        lines = []
+        for metric, label in (('cpu', "CPU %"), ('rss', "内存"), ('threads', "线程数"),
+                              ('read_rate', "读取/秒"), ('write_rate', "写入/秒")):
+            spark, low, high, mean, count = history.summary(key, metric)
+            if metric == 'cpu':
+                values = [f"{value:.1f}" for value in (low, high, mean)]
+            elif metric == 'threads':
+                values = [f"{value:.0f}" for value in (low, high)] + [f"{mean:.1f}"]
+            else:
+                values = [format_bytes(value) for value in (low, high, mean)]
+            lines.append(f"  {label}: {spark}  最小 {values[0]}  最大 {values[1]}  平均 {values[2]}\n")
+        times = history.series(key, 'cpu')[0]
+        return (f"资源历史(最近{count}次采样, {times[-1] - times[0]:.0f}秒):\n" + "".join(lines))
+
     def format_time(self, timestamp):
         """格式化时间戳"""
         from datetime import datetime
         return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
     
     def log(self, message, error=False):
-        """记录日志"""
-        prefix = "[ERROR] " if error else "[INFO] "
-        
-        self.log_text.moveCursor(QTextCursor.End)
-        
-        if error:
+        """记录日志: 写入环形缓冲区和日志文件，界面定时批量显示"""
+        level = logging.ERROR if error else logging.INFO
+        self.log_buffer.append(level, message)
+        if self.file_logger is not None:
+            self.file_logger.log(level, message)
+        if not self.log_render_timer.isActive():
+            self.log_render_timer.start()
+
+    def render_log(self):
+        """把缓冲区中待显示的日志一次性追加到日志页"""
+        records = self.log_buffer.take_pending()
+        if not records or not hasattr(self, 'log_text'):
+            return
+
+        scrollbar = self.log_text.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        cursor = QTextCursor(self.log_text.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for record in records:
+            if not self.log_text.document().isEmpty():
+                cursor.insertBlock()
             # 错误信息显示为红色
-            self.log_text.setTextColor(QColor(255, 0, 0))
-            self.log_text.insertPlainText(prefix + message + "\n")
-            self.log_text.setTextColor(QColor(0, 0, 0))
-        else:
-            self.log_text.insertPlainText(prefix + message + "\n")
-        
-        # 自动滚动到最后
-        self.log_text.verticalScrollBar().setValue(self.log_text.verticalScrollBar().maximum())
+            cursor.insertText(LogBuffer.format(record), self.log_formats[record.level])
+        cursor.endEditBlock()
+
+        # 已在底部时自动滚动到最后
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def set_log_capacity(self, capacity):
+        """修改日志保留条数"""
+        self.log_buffer.set_capacity(capacity)
+        self.log_text.setMaximumBlockCount(capacity)
     
     def clear_log(self):
         """清空日志"""
+        self.log_buffer.clear()
         self.log_text.clear()
         self.log("日志已清空")
 
@@ -510,72 +3761,80 @@ class ProcessManager(QMainWindow):
         """获取文本的拼音首字母"""
         if not text or not isinstance(text, str):
             return ""
-        initials = [p[0].upper() for p in lazy_pinyin(text) if p]
-        return "".join(initials)
+        return pinyin_of(text)[1].upper()
 
     
 
     def filter_process_list(self):
         """根据搜索条件过滤进程列表"""
-        search_text = self.search_input.toPlainText().strip().lower()
-        if not search_text:
-            for i in range(self.process_list.rowCount()):
-                self.process_list.setRowHidden(i, False)
+        self.search_timer.stop()
+        raw_text = self.search_input.toPlainText().strip()
+        search_mode = self.search_options.currentIndex()  # 0: 模糊搜索, 1: 精确匹配, 2: 查询语法
+        # 按主机过滤: None 为全部主机，"" 为本机
+        host_index = self.host_filter_combo.currentIndex()
+        host = None if host_index <= 0 else ("" if host_index == 1 else self.host_filter_combo.currentText())
+        previous, self.last_search = self.last_search, (raw_text, search_mode, host)
+        if not raw_text:
+            self.proxy_model.set_filter(None if host is None else self.make_host_filter(host, None))
+            return
+        if previous == self.last_search:
+            return
+
+        if search_mode == 2:
+            # 查询只编译一次，之后对缓存的快照字段求值
+            try:
+                matches = compile_query(raw_text)
+            except QueryError as e:
+                self.log(f"查询语法错误: {e}", error=True)
+                return
+            self.proxy_model.set_filter(matches if host is None else self.make_host_filter(host, matches))
             return
-        
-        exact_match = self.search_options.currentIndex() == 1
-        
-        for i in range(self.process_list.rowCount()):
-            pid_item = self.process_list.item(i, 0)
-            name_item = self.process_list.item(i, 1)
-            title_item = self.process_list.item(i, 2)
-            
-            pid = pid_item.data(Qt.UserRole)
-            process_name = name_item.text().replace("[隐藏] ", "").lower()
-            window_titles = title_item.text().lower()
-            
-            # 获取拼音首字母
-            pinyin_initials = self.get_pinyin_initials(process_name)
-            
-            # 检查匹配条件
-            match_found = False
-            if exact_match:
-                match_found = (search_text == process_name or 
-                            search_text == window_titles)
-            else:
-                # 模糊匹配：进程名、窗口标题或拼音首字母
-                match_found = (search_text in process_name or 
-                            search_text in window_titles or
-                            search_text in pinyin_initials.lower())
-            
-            self.process_list.setRowHidden(i, not match_found)
+
+        # 模糊匹配时复用上一次的结果: 输入变长只需复查已匹配的行，变短只需复查未匹配的行
+        search_text = raw_text.lower()
+        keep = None
+        if previous and previous[0] and search_mode == 0 and previous[1] == 0 and previous[2] == host:
+            previous_text = previous[0].lower()
+            if previous_text in search_text:
+                keep = False
+            elif search_text in previous_text:
+                keep = True
+
+        matches = make_text_matcher(search_text, search_mode == 1)
+        self.proxy_model.set_filter(matches if host is None else self.make_host_filter(host, matches), keep)
+
+    @staticmethod
+    def make_host_filter(host, matches):
+        """在过滤函数之前先按主机名过滤"""
+        def host_matches(model, row):
+            return model.host_at(row) == host and (matches is None or matches(model, row))
+        host_matches.uses_metrics = getattr(matches, 'uses_metrics', False)
+        return host_matches
 
 
     def sort_table(self, logicalIndex):
         """表格排序方法"""
-        self.process_list.sortItems(logicalIndex)
+        self.proxy_model.sort(logicalIndex)
 
     def sort_by_pid(self, order):
-        """按PID排序"""
-        self.process_list.sortItems(0, order)
+        """按PID排序(按数值)"""
+        self.proxy_model.sort(0, order)
         
     def sort_by_name(self, order):
-        """按进程名排序(智能排序，考虑隐藏标记)"""
-        for row in range(self.process_list.rowCount()):
-            item = self.process_list.item(row, 1)
-            # 移除隐藏标记后再比较
-            text = item.text().replace("[隐藏] ", "")
-            item.setData(Qt.UserRole + 1, text.lower())
-        self.process_list.sortItems(1, order)
+        """按进程名排序(智能排序，使用预先计算的排序键，忽略隐藏标记和大小写)"""
+        self.proxy_model.sort(1, order)
 
     def sort_by_title(self, order):
-        """按窗口标题排序(智能排序)"""
-        for row in range(self.process_list.rowCount()):
-            item = self.process_list.item(row, 2)
-            # 处理空标题情况
-            text = item.text() if item.text() else ""
-            item.setData(Qt.UserRole + 1, text.lower())
-        self.process_list.sortItems(2, order)
+        """按窗口标题排序(智能排序，使用预先计算的排序键)"""
+        self.proxy_model.sort(2, order)
+
+    def sort_by_host(self, order):
+        """按主机名排序"""
+        self.proxy_model.sort(ProcessTableModel.HOST_COLUMN, order)
+
+    def sort_by_metric(self, column, order):
+        """按资源列排序(按数值，每次刷新后自动重新排序)"""
+        self.proxy_model.sort(column, order)
 
 
     def on_header_clicked(self, logicalIndex):
@@ -597,20 +3856,19 @@ class ProcessManager(QMainWindow):
 
 
 if __name__ == "__main__":
-    # 检查是否以管理员权限运行
-    def is_admin():
-        try:
-            return ctypes.windll.shell32.IsUserAnAdmin()
-        except:
-            return False
-    
-    if not is_admin():
-        # 如果不是管理员，尝试以管理员权限重新运行
-        ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, " ".join(sys.argv), None, 1)
+    # 检查是否以管理员权限运行，不是管理员时尝试以管理员权限重新运行(仅 Windows)
+    backend = create_platform_backend()
+    if not backend.is_admin() and backend.request_admin():
         sys.exit()
     
     app = QApplication(sys.argv)
     app.setFont(QFont("Microsoft YaHei", 9))
-    manager = ProcessManager()
+    mark_startup("创建 QApplication")
+    manager = ProcessManager(profile_startup="--profile-startup" in sys.argv, backend=backend)
+    mark_startup("创建主窗口")
+    # 启动阶段创建的对象(拼音词典、Qt包装对象等)会一直存活，冻结后完整GC不再遍历它们，
+    # 避免采集线程分配对象时触发的完整GC长时间持有GIL而卡住界面
+    gc.freeze()
     manager.show()
+    mark_startup("显示主窗口")
     sys.exit(app.exec_())
\ No newline at end of file
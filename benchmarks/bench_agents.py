@@ -0,0 +1,116 @@
+"""多主机监控基准测试
+
+在本机启动若干个采集代理子进程(虚拟进程源，每秒有部分进程启动/退出和资源变化)，
+界面程序同时连接所有代理并每秒刷新一次，报告:
+- 每个代理的首帧(关键帧)大小和稳定后的流量(应与变化量成正比，而不是与进程数成正比)
+- 界面每次合并快照并应用到表格的耗时
+
+用法: python benchmarks/bench_agents.py [代理数] [每个代理的进程数] [秒数]
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from types import MappingProxyType
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_core import ProcessRow, ProcessSnapshot, StaticWindowProvider
+
+
+class SyntheticCollector:
+    """虚拟进程源: 每次采集有 0.5% 的进程启动/退出，5% 的进程资源变化"""
+
+    def __init__(self, count, seed):
+        self.rng = random.Random(seed)
+        self.next_pid = 1
+        self.rows = {}
+        for _ in range(count):
+            self.spawn()
+
+    def spawn(self):
+        pid = self.next_pid
+        self.next_pid += 1
+        row = ProcessRow(pid, 1000.0 + pid, f"proc_{self.rng.randrange(200)}.exe", "", False, "user",
+                         0.0, self.rng.randrange(1 << 20, 1 << 30), 8, 0.0, 0.0, max(pid // 10, 1))
+        self.rows[(row.pid, row.create_time)] = row
+
+    def collect(self, hidden_keys, show_hidden, rules=None):
+        rng = self.rng
+        count = len(self.rows)
+        for key in rng.sample(list(self.rows), count // 200):
+            del self.rows[key]
+        for _ in range(count // 200):
+            self.spawn()
+        for key in rng.sample(list(self.rows), count // 20):
+            self.rows[key] = self.rows[key]._replace(cpu=rng.random() * 20, rss=rng.randrange(1 << 20, 1 << 30))
+        return ProcessSnapshot(MappingProxyType(dict(self.rows)), time.time(), 0.0, 0.0, 0.0, ())
+
+
+def run_agent(address, count, seed, name):
+    from process_agent import AgentServer
+    server = AgentServer(SyntheticCollector(count, seed), address, 1.0, name)
+    try:
+        server.serve()
+    finally:
+        server.close()
+
+
+def main():
+    agents = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    seconds = int(sys.argv[3]) if len(sys.argv) > 3 else 15
+    directory = tempfile.mkdtemp()
+    addresses = [f"unix:{os.path.join(directory, f'agent{i}.sock')}" for i in range(agents)]
+    processes = [multiprocessing.Process(target=run_agent, args=(address, count, i, f"host{i:02d}"), daemon=True)
+                 for i, address in enumerate(addresses)]
+    for process in processes:
+        process.start()
+    time.sleep(1.0)
+
+    from PyQt5.QtWidgets import QApplication
+    from ProcessManager_app import ProcessManager
+
+    app = QApplication(sys.argv)
+    manager = ProcessManager(StaticWindowProvider(), log_file=os.path.join(directory, "bench.log"),
+                             state_file=os.path.join(directory, "bench.json"))
+    manager.log = lambda message, error=False: None
+    manager.show_local_checkbox.setChecked(False)
+    for address in addresses:
+        manager.add_agent(address)
+
+    connections = list(manager.multi_host_collector.connections.values())
+    deadline = time.monotonic() + 3.0
+    while time.monotonic() < deadline and not all(connection.frames for connection in connections):
+        app.processEvents()
+        time.sleep(0.05)
+    first_frame = [connection.bytes_received for connection in connections]
+
+    apply_times = []
+    for second in range(seconds):
+        tick = time.monotonic()
+        start = time.perf_counter()
+        manager.refresh_now()
+        apply_times.append(time.perf_counter() - start)
+        while time.monotonic() - tick < 1.0:
+            app.processEvents()
+            time.sleep(0.01)
+    steady = [(connection.bytes_received - first) / seconds for connection, first in zip(connections, first_frame)]
+
+    apply_times.sort()
+    connected = sum(connection.connected for connection in connections)
+    print(f"代理 {connected}/{agents} 个已连接, 每个 {count} 个进程, 表格共 {manager.process_model.rowCount()} 行")
+    print(f"首帧(关键帧): 平均 {sum(first_frame) / agents / 1024:.1f} KB/代理")
+    print(f"稳定流量: 平均 {sum(steady) / agents / 1024:.2f} KB/s/代理 (每秒约 {count // 100} 个进程启动/退出, "
+          f"{count // 20} 个资源变化)")
+    print(f"界面合并+应用: 中位数 {apply_times[len(apply_times) // 2] * 1000:.1f} ms, 最大 {apply_times[-1] * 1000:.1f} ms")
+    manager.shutdown_collector()
+    for process in processes:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""批量结束进程基准测试
+
+启动一批忽略结束信号的子进程，对比逐个 terminate + wait 与 run_bulk_action
+(并行 terminate、wait_procs 统一等待、超时后强制结束)的总耗时。
+
+用法: python benchmarks/bench_bulk_kill.py [进程数] [超时秒数]
+"""
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+
+from ProcessManager_app import run_bulk_action
+
+# 忽略 SIGTERM 的子进程(Windows 上 terminate 即强制结束，不受影响)
+RUNAWAY = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(600)"
+
+
+def spawn(count):
+    procs = [subprocess.Popen([sys.executable, "-c", RUNAWAY]) for _ in range(count)]
+    time.sleep(1.0)  # 等子进程装好信号处理
+    return procs
+
+
+def old_kill(procs, timeout):
+    """旧方式: 逐个 terminate 并等待，超时后再 kill"""
+    for proc in procs:
+        ps = psutil.Process(proc.pid)
+        ps.terminate()
+        try:
+            ps.wait(timeout)
+        except psutil.TimeoutExpired:
+            ps.kill()
+            ps.wait(timeout)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    timeout = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    procs = spawn(min(count, 5))
+    start = time.perf_counter()
+    old_kill(procs, timeout)
+    old = (time.perf_counter() - start) / len(procs) * count
+    for proc in procs:
+        proc.wait()
+
+    procs = spawn(count)
+    result = run_bulk_action('terminate', [(proc.pid, None) for proc in procs], timeout=timeout)
+    for proc in procs:
+        proc.wait()
+
+    print(f"进程数 {count}, 超时 {timeout:.1f}秒")
+    print(f"逐个结束(按5个进程估算): {old:8.2f} 秒")
+    print(f"并行批量结束:            {result.elapsed:8.2f} 秒 "
+          f"(成功{len(result.succeeded)}个, 强制结束{len(result.escalated)}个, 失败{len(result.failures)}个)")
+
+
+if __name__ == "__main__":
+    main()
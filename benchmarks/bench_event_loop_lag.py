@@ -0,0 +1,58 @@
+"""后台采集时的事件循环延迟
+
+在后台线程中反复采集大量虚拟进程，同时统计界面线程事件循环的最大延迟，
+验证扫描期间界面线程的阻塞不超过一帧(约16.7ms)。
+
+用法: python benchmarks/bench_event_loop_lag.py [进程数]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+from bench_incremental_refresh import SyntheticProcessManager, make_processes, churn
+
+
+class LagRecordingManager(SyntheticProcessManager):
+    def __init__(self, processes, scans):
+        self.lags = []
+        self.scan_times = []
+        self.scans = scans
+        super().__init__(processes)
+
+    def apply_snapshot(self, snapshot):
+        super().apply_snapshot(snapshot)
+        self.lags.append(self.loop_monitor.max_lag)
+        self.scan_times.append(snapshot.scan_time)
+        if len(self.lags) >= self.scans:
+            QApplication.instance().quit()
+        else:
+            self.processes, self.next_pid = churn(self.processes, 0.05, self.rng, self.next_pid)
+            QTimer.singleShot(0, self.update_process_list)
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(0)
+    manager = LagRecordingManager(make_processes(count, rng), scans=20)
+    manager.rng = rng
+    manager.next_pid = count + 1
+    start = time.perf_counter()
+    app.exec_()
+    elapsed = time.perf_counter() - start
+    manager.close()
+    lags = sorted(manager.lags)
+    print(f"进程数 {count}, 扫描 {len(lags)} 次, 总耗时 {elapsed:.2f}s")
+    print(f"平均扫描耗时 {sum(manager.scan_times) / len(manager.scan_times) * 1000:.1f}ms")
+    print(f"扫描期间事件循环延迟: 中位数 {lags[len(lags) // 2] * 1000:.1f}ms, 最大 {lags[-1] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""导出基准测试
+
+用虚拟进程源驱动界面(offscreen)，开始连续导出后每隔 interval 秒刷新一次，共 frames 次，测量:
+- 每次刷新在界面线程中提交一帧的耗时(从表格取出各列)
+- 导出线程的写入吞吐量(行/秒、MB/秒)和丢弃的帧数
+- 导出期间本进程内存(RSS)的最大增长，用于确认内存不随导出的帧数增长
+
+用法: python benchmarks/bench_export.py [--count 5000] [--frames 300] [--interval 0.25] [--format csv,jsonl]
+      --frames 3600 --interval 1 相当于1秒间隔采集1小时；interval 越小，越容易因写入跟不上而丢弃帧。
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+from PyQt5.QtWidgets import QApplication
+
+from bench_suite import BenchProcessManager, SyntheticCollector, SyntheticProcessSource
+from process_export import describe_export
+
+
+class ExportBenchManager(BenchProcessManager):
+    """记录界面线程提交每帧的耗时和导出结果"""
+
+    def __init__(self, *args, **kwargs):
+        self.submit_times = []
+        self.export_results = []
+        super().__init__(*args, **kwargs)
+
+    def export_table_frame(self, exporter, timestamp, block=False):
+        start = time.perf_counter()
+        try:
+            return super().export_table_frame(exporter, timestamp, block)
+        finally:
+            self.submit_times.append(time.perf_counter() - start)
+
+    def on_export_finished(self, result):
+        self.export_results.append(result)
+
+
+def run_format(app, args, export_format, directory):
+    source = SyntheticProcessSource(args.count)
+    manager = ExportBenchManager(collector=SyntheticCollector(source),
+                                 state_file=os.path.join(directory, f"state-{export_format}.json"))
+    deadline = time.monotonic() + 60
+    while not manager.first_snapshot_applied and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    manager.refresh_now()
+
+    process = psutil.Process()
+    path = os.path.join(directory, f"export.{export_format}")
+    base_rss = peak_rss = process.memory_info().rss
+    manager.start_live_export(path)
+    next_tick = time.monotonic()
+    for _ in range(args.frames):
+        source.step(args.churn)
+        manager.refresh_now()
+        peak_rss = max(peak_rss, process.memory_info().rss)
+        next_tick += args.interval
+        time.sleep(max(next_tick - time.monotonic(), 0.0))
+    manager.toggle_live_export()
+    while not manager.export_results and time.monotonic() < deadline + 3600:
+        app.processEvents()
+        time.sleep(0.01)
+    result = manager.export_results[0]
+    submit_times = sorted(manager.submit_times)
+    print(f"{export_format}: {describe_export(result)}")
+    print(f"  界面线程提交每帧: 中位数 {statistics.median(submit_times) * 1000:.2f} ms, "
+          f"最大 {submit_times[-1] * 1000:.2f} ms; 导出期间内存最大增长 {(peak_rss - base_rss) / 1048576:.1f} MB")
+    manager.close()
+    manager.deleteLater()
+    app.processEvents()
+    os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出基准测试")
+    parser.add_argument("--count", type=int, default=5000, help="进程数(默认5000)")
+    parser.add_argument("--frames", type=int, default=300, help="导出的帧数(默认300)")
+    parser.add_argument("--interval", type=float, default=0.25, help="刷新间隔秒数(默认0.25)")
+    parser.add_argument("--format", default="csv,jsonl", help="导出格式，逗号分隔(默认 csv,jsonl；parquet 需要 pyarrow)")
+    parser.add_argument("--churn", type=float, default=0.01, help="每次刷新启动/结束的进程比例(默认0.01)")
+    args = parser.parse_args()
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"进程数 {args.count}, 每 {args.interval} 秒刷新一次, 连续导出 {args.frames} 帧")
+    with tempfile.TemporaryDirectory() as directory:
+        for export_format in args.format.split(","):
+            run_format(app, args, export_format.strip(), directory)
+    return app
+
+
+if __name__ == "__main__":
+    main()
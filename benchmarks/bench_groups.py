@@ -0,0 +1,74 @@
+"""分组视图基准测试
+
+用虚拟进程源(默认10000个进程、约200个不同的进程名)分别在表格视图和按进程名分组视图下刷新，
+比较每次刷新(采集 + 应用 + 视图重建和绘制)的耗时、应用到表格的耗时和视图中的行数。
+
+用法: python benchmarks/bench_groups.py [进程数] [刷新次数] [--variants 每个基础名称的编号数]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+
+from bench_suite import BenchProcessManager, SyntheticCollector, SyntheticProcessSource, timed
+
+
+def refresh_and_paint(app, manager):
+    manager.refresh_now()
+    app.processEvents()
+
+
+def run_mode(app, args, grouped, state_dir):
+    source = SyntheticProcessSource(args.count, name_variants=args.variants)
+    manager = BenchProcessManager(collector=SyntheticCollector(source),
+                                  state_file=os.path.join(state_dir, f"state-{int(grouped)}.json"))
+    manager.show()
+    deadline = time.monotonic() + 60
+    while not manager.first_snapshot_applied and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    manager.show_metrics_checkbox.setChecked(True)
+    manager.group_view_checkbox.setChecked(grouped)
+    refresh_and_paint(app, manager)
+
+    refresh_times, apply_times = [], []
+    for _ in range(args.rounds):
+        source.step(args.churn)
+        refresh_times.append(timed(refresh_and_paint, app, manager))
+        apply_times.append(manager.perf_probes.samples['apply'][-1][1])
+    view = manager.current_view()
+    rows = view.model().rowCount()
+    manager.close()
+    manager.deleteLater()
+    app.processEvents()
+    return rows, statistics.median(refresh_times), statistics.median(apply_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分组视图基准测试")
+    parser.add_argument("count", type=int, nargs="?", default=10000, help="进程数(默认10000)")
+    parser.add_argument("rounds", type=int, nargs="?", default=20, help="刷新次数(默认20)")
+    parser.add_argument("--variants", type=int, default=8,
+                        help="每个基础名称的编号数(默认8，共约200个不同的进程名)")
+    parser.add_argument("--churn", type=float, default=0.01, help="每次刷新启动/结束的进程比例(默认0.01)")
+    args = parser.parse_args()
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    print(f"进程数 {args.count}, 刷新 {args.rounds} 次(每次 {args.churn:.0%} 进程变化), 中位数:")
+    print(f"{'视图':<8} {'显示行数':>8} {'刷新(ms)':>10} {'应用(ms)':>10}")
+    with tempfile.TemporaryDirectory() as state_dir:
+        for label, grouped in (("表格", False), ("分组", True)):
+            rows, refresh_time, apply_time = run_mode(app, args, grouped, state_dir)
+            print(f"{label:<8} {rows:>8} {refresh_time * 1000:>10.2f} {apply_time * 1000:>10.2f}")
+    return app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""增量刷新基准测试
+
+用虚拟进程源驱动 ProcessManager.update_process_list，对比
+整表重建 与 按差异增量刷新 在不同进程数和变化率下的耗时。
+增量刷新的耗时应与变化的行数成正比，而不是与总进程数成正比。
+
+用法: python benchmarks/bench_incremental_refresh.py
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+
+from ProcessManager_app import ProcessCollector, ProcessManager
+from process_core import StaticWindowProvider
+
+
+class SyntheticCollector(ProcessCollector):
+    """由虚拟进程列表驱动的采集器"""
+
+    def __init__(self, processes):
+        super().__init__(StaticWindowProvider())
+        self.processes = processes
+
+    def iter_process_info(self, extra_attrs=()):
+        return iter(self.processes)
+
+
+class SyntheticProcessManager(ProcessManager):
+    """由虚拟进程列表驱动的进程管理器"""
+
+    def __init__(self, processes):
+        super().__init__(collector=SyntheticCollector(processes))
+
+    @property
+    def processes(self):
+        return self.collector.processes
+
+    @processes.setter
+    def processes(self, processes):
+        self.collector.processes = processes
+
+    def log(self, message, error=False):
+        pass
+
+
+def make_processes(count, rng, start_pid=1):
+    return [{'pid': pid, 'name': f"proc_{rng.randrange(500)}.exe", 'create_time': 1000.0 + pid}
+            for pid in range(start_pid, start_pid + count)]
+
+
+def churn(processes, rate, rng, next_pid):
+    """按变化率替换一部分进程(结束旧进程并启动新进程)"""
+    count = int(len(processes) * rate)
+    survivors = rng.sample(processes, len(processes) - count)
+    return survivors + make_processes(count, rng, next_pid), next_pid + count
+
+
+def timed_refresh(manager, full_rebuild):
+    if full_rebuild:
+        # 模拟旧实现: 清空表格后整表重建
+        manager.process_model.clear()
+    start = time.perf_counter()
+    manager.refresh_now()
+    return time.perf_counter() - start
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"{'进程数':>8} {'变化率':>8} {'整表重建(ms)':>14} {'增量刷新(ms)':>14}")
+    for count in (1000, 5000):
+        for rate in (0.0, 0.01, 0.1):
+            rng = random.Random(count)
+            manager = SyntheticProcessManager(make_processes(count, rng))
+            next_pid = count + 1
+            full = incremental = 0.0
+            rounds = 5
+            for _ in range(rounds):
+                manager.processes, next_pid = churn(manager.processes, rate, rng, next_pid)
+                snapshot = list(manager.processes)
+                incremental += timed_refresh(manager, full_rebuild=False)
+                manager.processes = snapshot
+                full += timed_refresh(manager, full_rebuild=True)
+            print(f"{count:>8} {rate:>8.0%} {full / rounds * 1000:>14.2f} {incremental / rounds * 1000:>14.2f}")
+            manager.close()
+    return app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""资源历史基准测试
+
+按给定进程数和采样数填满 MetricHistory 的环形缓冲区(每轮有一定比例的进程退出和新建)，
+报告每次追加采样的耗时和总内存占用。
+
+用法: python benchmarks/bench_metric_history.py [进程数] [采样数]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+
+from ProcessManager_app import MetricHistory
+from bench_incremental_refresh import SyntheticProcessManager, make_processes, churn
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    rng = random.Random(0)
+    processes = make_processes(count, rng, 1)
+    manager = SyntheticProcessManager(processes)
+    manager.refresh_now()
+    history = MetricHistory(samples=samples)
+
+    next_pid = count + 1
+    timings = []
+    for _ in range(samples):
+        processes, next_pid = churn(processes, 0.01, rng, next_pid)
+        manager.processes = processes
+        manager.refresh_now()
+        start = time.perf_counter()
+        history.append(manager.process_model)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(f"进程数 {count}, 采样数 {samples}, 每轮 1% 进程变化")
+    print(f"追加一次采样: 中位数 {timings[len(timings) // 2] * 1000:.2f} ms, 最大 {timings[-1] * 1000:.2f} ms")
+    print(f"槽位 {history.capacity}, 内存占用 {history.nbytes / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Linux /proc 批量读取后端基准测试
+
+启动若干 sleep 子进程使系统进程数达到指定数量，对比 psutil.process_iter 与
+LinuxProcBackend 枚举全部进程(采集器使用的属性)的耗时和CPU时间，
+并校验两者得到的进程键 (pid, create_time) 一致。仅支持 Linux。
+
+用法: python benchmarks/bench_proc_backend.py [进程数] [轮数]
+"""
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+
+from process_core import LinuxProcBackend, ProcessCollector, PsutilBackend, StaticWindowProvider
+
+
+def measure(backend, attrs, rounds):
+    """返回 (每轮耗时列表, 每轮CPU时间列表, 最后一轮的进程键集合)"""
+    times, cpu_times = [], []
+    keys = set()
+    for _ in range(rounds):
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        infos = list(backend.iter_process_info(attrs))
+        cpu_times.append(time.process_time() - cpu_start)
+        times.append(time.perf_counter() - start)
+        keys = {(info['pid'], info['create_time']) for info in infos}
+    return times, cpu_times, keys
+
+
+def main():
+    if not sys.platform.startswith("linux"):
+        print("仅支持 Linux")
+        return
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    children = []
+    try:
+        for _ in range(max(target - len(psutil.pids()), 0)):
+            children.append(subprocess.Popen(["sleep", "600"], stdin=subprocess.DEVNULL))
+        count = len(psutil.pids())
+        attrs = ProcessCollector.PROCESS_ATTRS
+        provider = StaticWindowProvider()
+        results = {}
+        for backend in (PsutilBackend(provider), LinuxProcBackend(provider)):
+            # 预热一轮(用户名缓存等)
+            list(backend.iter_process_info(attrs))
+            results[backend.name] = measure(backend, attrs, rounds)
+
+        print(f"进程数 {count}, 每个后端 {rounds} 轮")
+        baseline = min(results['psutil'][0])
+        for name, (times, cpu_times, _) in results.items():
+            best = min(times)
+            print(f"{name:>10}: 最快 {best * 1000:7.1f} ms, 中位数 {sorted(times)[len(times) // 2] * 1000:7.1f} ms, "
+                  f"CPU {min(cpu_times) * 1000:7.1f} ms, 加速 {baseline / best:4.1f}x")
+        missing = results['psutil'][2] ^ results['linux-proc'][2]
+        print(f"进程键差异: {len(missing)} (两次枚举之间退出或启动的进程)")
+    finally:
+        for child in children:
+            child.kill()
+        for child in children:
+            child.wait()
+
+
+if __name__ == "__main__":
+    main()
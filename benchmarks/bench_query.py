@@ -0,0 +1,60 @@
+"""查询语法基准测试
+
+测量查询的解析/编译耗时，以及编译后的过滤函数在数千行快照上的求值耗时。
+
+用法: python benchmarks/bench_query.py [行数]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ProcessManager_app import ProcessTableModel, compile_query, parse_query
+from process_core import ProcessRow
+
+QUERIES = [
+    "name:chrome",
+    "cpu>20",
+    "rss>500M user:svc",
+    "name:chrome cpu>20 rss>500M user:svc title:/error/i",
+    "title:/err(or|no)\\d+/i -name:helper",
+    "weixin pid>1000",
+]
+NAMES = ["chrome.exe", "svchost.exe", "python.exe", "微信.exe", "explorer.exe", "helper.exe"]
+USERS = ["svc_build", "root", "administrator", "svc_web"]
+
+
+def make_model(count, seed=0):
+    rng = random.Random(seed)
+    rows = [ProcessRow(pid, 1000.0 + pid, rng.choice(NAMES), f"Error {pid}" if rng.random() < 0.1 else "",
+                       False, rng.choice(USERS), rng.random() * 100, rng.randrange(2 * 1024 ** 3))
+            for pid in range(1, count + 1)]
+    model = ProcessTableModel()
+    model.apply_diff(rows, [], [])
+    return model
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    model = make_model(count)
+    print(f"{'查询':<56} {'解析+编译(us)':>14} {'求值(ms)':>10} {'ns/行':>8} {'匹配':>8}")
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(100):
+            parse_query(query)
+            compile_query.__wrapped__(query)
+        compile_time = (time.perf_counter() - start) / 100
+
+        matches = compile_query(query)
+        start = time.perf_counter()
+        matched = sum(1 for row in range(count) if matches(model, row))
+        eval_time = time.perf_counter() - start
+        print(f"{query:<56} {compile_time * 1e6:>14.1f} {eval_time * 1000:>10.2f} "
+              f"{eval_time / count * 1e9:>8.0f} {matched:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""快照录制与回放基准测试
+
+用虚拟进程(每帧有进程新建/结束和部分资源变化)录制若干帧，报告每帧写入耗时、
+文件大小(与未压缩的完整快照对比)，以及随机定位到任意帧的耗时。
+
+用法: python benchmarks/bench_recording.py [进程数] [帧数]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from types import MappingProxyType
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_core import ProcessRow, ProcessSnapshot
+from process_recording import ROW_STRUCT, SnapshotRecorder, SnapshotReplayer
+
+
+def make_row(pid, rng):
+    return ProcessRow(pid, 1000.0 + pid, f"proc_{rng.randrange(500)}.exe",
+                      f"窗口 {pid}" if pid % 5 == 0 else "", False, f"user{pid % 3}", 0.0,
+                      rng.randrange(1 << 20, 1 << 30), rng.randrange(1, 64), 0.0, 0.0, rng.randrange(1, pid + 1))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    rng = random.Random(0)
+    rows = {(pid, 1000.0 + pid): make_row(pid, rng) for pid in range(1, count + 1)}
+    next_pid = count + 1
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "bench.pmrec")
+    recorder = SnapshotRecorder(path)
+    write_times = []
+    for frame in range(frames):
+        # 每帧 0.5% 进程变化，5% 进程的CPU/内存变化
+        for key in rng.sample(list(rows), count // 200):
+            del rows[key]
+        for _ in range(count // 200):
+            rows[(next_pid, 1000.0 + next_pid)] = make_row(next_pid, rng)
+            next_pid += 1
+        for key in rng.sample(list(rows), count // 20):
+            rows[key] = rows[key]._replace(cpu=rng.random() * 50, rss=rng.randrange(1 << 20, 1 << 30))
+        snapshot = ProcessSnapshot(MappingProxyType(dict(rows)), 1e9 + frame * 2.0, 0.0, 0.0, 0.0, ())
+        start = time.perf_counter()
+        recorder.write(snapshot)
+        write_times.append(time.perf_counter() - start)
+    recorder.close()
+
+    size = os.path.getsize(path) + os.path.getsize(path + ".idx")
+    raw = count * frames * ROW_STRUCT.size
+    write_times.sort()
+    print(f"进程数 {count}, 帧数 {frames}")
+    print(f"写入一帧: 中位数 {write_times[len(write_times) // 2] * 1000:.1f} ms, 最大 {write_times[-1] * 1000:.1f} ms")
+    print(f"文件大小 {size / 1024 / 1024:.2f} MB (完整快照未压缩约 {raw / 1024 / 1024:.0f} MB)")
+
+    replayer = SnapshotReplayer(path)
+    seek_times = []
+    for _ in range(50):
+        frame = rng.randrange(len(replayer))
+        replayer.position = -1  # 每次都从关键帧开始解码
+        start = time.perf_counter()
+        replayer.seek(replayer.find(replayer.time_at(frame)))
+        seek_times.append(time.perf_counter() - start)
+    seek_times.sort()
+    print(f"随机定位: 中位数 {seek_times[len(seek_times) // 2] * 1000:.1f} ms, 最大 {seek_times[-1] * 1000:.1f} ms")
+    replayer.close()
+
+
+if __name__ == "__main__":
+    main()
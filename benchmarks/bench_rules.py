@@ -0,0 +1,73 @@
+"""自动规则匹配基准测试
+
+对比逐条规则检查每个进程(进程数 x 规则数)与编译后的 RuleSet
+(完全匹配哈希表 + 组合正则预筛选)在不同规则数下的单次快照匹配耗时。
+
+用法: python benchmarks/bench_rules.py [进程数]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_core import ProcessRule, RuleSet
+
+
+def make_values(count, seed=0):
+    rng = random.Random(seed)
+    return [{'name': f"app{rng.randrange(count)}.exe", 'path': f"C:\\Program Files\\app{i}\\app.exe",
+             'user': f"user{rng.randrange(20)}", 'title': f"文档{i} - 编辑器"}
+            for i in range(count)]
+
+
+def make_rules(count, seed=0):
+    """一半为进程名完全匹配，一半为窗口标题/路径正则"""
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        if i % 2 == 0:
+            rules.append(ProcessRule('name', f"app{rng.randrange(100000)}.exe", 'hide'))
+        else:
+            field = rng.choice(('title', 'path'))
+            rules.append(ProcessRule(field, f"keyword{i}.*(error|失败)", 'suspend', True))
+    return rules
+
+
+def naive_match(rules, values):
+    compiled = [(rule, re.compile(rule.pattern, re.IGNORECASE) if rule.regex else rule.pattern.lower())
+                for rule in rules]
+    matched = 0
+    for value in values:
+        actions = set()
+        for rule, pattern in compiled:
+            text = value.get(rule.field) or ""
+            if (pattern.search(text) if rule.regex else text.lower() == pattern):
+                actions.add(rule.action)
+        matched += bool(actions)
+    return matched
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    values = make_values(count)
+    print(f"{'规则数':>6} {'逐条检查(ms)':>14} {'RuleSet(ms)':>12} {'命中进程':>8}")
+    for rule_count in (10, 100, 500):
+        rules = make_rules(rule_count)
+
+        start = time.perf_counter()
+        naive = naive_match(rules, values)
+        old = time.perf_counter() - start
+
+        rule_set = RuleSet(rules)
+        start = time.perf_counter()
+        matched = sum(1 for value in values if rule_set.match(value))
+        new = time.perf_counter() - start
+        assert matched == naive
+        print(f"{rule_count:>6} {old * 1000:>14.1f} {new * 1000:>12.1f} {matched:>8}")
+
+
+if __name__ == "__main__":
+    main()
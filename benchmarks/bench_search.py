@@ -0,0 +1,70 @@
+"""搜索过滤基准测试
+
+模拟逐字输入搜索词，对比旧实现(每次按键对每一行调用 lazy_pinyin)与
+搜索索引(拼音缓存 + 复用上一次结果)的每次按键耗时。
+
+用法: python benchmarks/bench_search.py [进程数]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pypinyin import lazy_pinyin
+from PyQt5.QtWidgets import QApplication
+
+from bench_incremental_refresh import SyntheticProcessManager
+
+NAMES = ["微信.exe", "企业微信.exe", "钉钉.exe", "网易云音乐.exe", "腾讯会议.exe", "chrome.exe",
+         "svchost.exe", "python.exe", "explorer.exe", "WeChatAppEx.exe", "搜狗输入法.exe", "code.exe"]
+KEYSTROKES = ["w", "wx", "wei", "weix", "weixi", "weixin", "weix", "we"]
+
+
+def make_processes(count, seed=0):
+    rng = random.Random(seed)
+    return [{'pid': pid, 'name': f"{rng.choice(NAMES)[:-4]}{rng.randrange(count // 5)}.exe",
+             'create_time': 1000.0 + pid}
+            for pid in range(1, count + 1)]
+
+
+def old_filter(names, search_text):
+    """旧实现: 每次按键对每一行重新计算拼音首字母"""
+    matched = 0
+    for name in names:
+        process_name = name.lower()
+        initials = "".join(p[0].upper() for p in lazy_pinyin(process_name) if p)
+        if search_text in process_name or search_text in initials.lower():
+            matched += 1
+    return matched
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    processes = make_processes(count)
+    manager = SyntheticProcessManager(processes)
+    manager.refresh_now()
+    names = [p['name'] for p in processes]
+
+    print(f"{'输入':>8} {'旧实现(ms)':>12} {'搜索索引(ms)':>14} {'匹配行数':>10}")
+    for text in KEYSTROKES:
+        start = time.perf_counter()
+        old_filter(names, text)
+        old = time.perf_counter() - start
+
+        manager.search_input.blockSignals(True)
+        manager.search_input.setPlainText(text)
+        manager.search_input.blockSignals(False)
+        start = time.perf_counter()
+        manager.filter_process_list()
+        new = time.perf_counter() - start
+        print(f"{text:>8} {old * 1000:>12.1f} {new * 1000:>14.1f} {manager.proxy_model.rowCount():>10}")
+    manager.close()
+    return app
+
+
+if __name__ == "__main__":
+    main()
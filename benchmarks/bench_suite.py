@@ -0,0 +1,313 @@
+"""可复现的界面性能基准套件
+
+在 offscreen Qt 平台下用虚拟进程源和虚拟窗口列表驱动 ProcessManager，测量:
+- refresh: 一次刷新(采集 + 应用到表格)，每轮按变化率替换一部分进程，所有进程的资源计数都变化
+- refresh_apply: 其中应用到表格的部分(取自性能探针)
+- filter_keystroke: 逐字输入搜索词时每次按键的过滤耗时(英文、拼音首字母和中文)
+- sort_name / sort_title: 按进程名 / 窗口标题排序(升序、降序交替)
+- details: 选中一个新进程并显示详情(采集不变的字段并格式化，包括资源历史)
+- details_arrow: 用方向键逐行切换时每行更新详情页的耗时(不变的字段已缓存或稍后才获取)
+
+进程数、中英文名称比例、窗口标题长度、有窗口的进程比例和变化率都可配置，随机数种子固定，
+相同参数下生成的数据完全相同。结果以 JSON 输出(每项为中位数/P95/最大值，单位毫秒)，
+可与保存的基线比较，中位数变慢超过容差时以退出码 1 结束，便于在 CI 中发现性能回退。
+
+用法:
+    python benchmarks/bench_suite.py [--sizes 1000,10000,50000] [--repeat 10] [--output 结果.json]
+    python benchmarks/bench_suite.py --baseline 基线.json [--tolerance 0.25]
+    python benchmarks/bench_suite.py --output 基线.json    # 保存为新的基线
+
+基线只在同一台机器、相同参数下比较才有意义。
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import PYQT_VERSION_STR, QT_VERSION_STR, Qt
+from PyQt5.QtWidgets import QApplication
+
+from ProcessManager_app import ProcessCollector, ProcessManager, __version__
+from process_core import ProcCpuTimes, ProcIoCounters, ProcMemoryInfo, StaticWindowProvider
+
+SCHEMA_VERSION = 1
+ASCII_NAMES = ["chrome", "svchost", "python", "explorer", "WeChatAppEx", "code", "node", "java", "conhost",
+               "RuntimeBroker", "msedge", "Teams", "OneDrive", "dllhost", "SearchHost"]
+CJK_NAMES = ["微信", "企业微信", "钉钉", "网易云音乐", "腾讯会议", "搜狗输入法", "百度网盘", "金山文档",
+             "迅雷", "飞书", "爱奇艺", "阿里旺旺"]
+TITLE_WORDS = ["文档", "Document", "项目", "Project", "会议", "Meeting", "报告", "Report", "草稿", "Draft",
+               "设置", "Settings", "下载", "Downloads", "- Google Chrome", "- Visual Studio Code"]
+KEYSTROKES = ["c", "ch", "chr", "chro", "chrom", "chrome", "", "w", "wx", "wei", "weix", "weixin", "",
+              "微", "微信", ""]
+USERS = ["SYSTEM", "LOCAL SERVICE", "NETWORK SERVICE", "user"]
+
+
+class SyntheticProcessSource:
+    """虚拟进程源: 生成进程信息字典(与平台后端的输出格式相同)和对应的窗口列表"""
+
+    def __init__(self, count, seed=0, cjk_ratio=0.3, title_length=40, window_ratio=0.2, name_variants=100):
+        self.rng = random.Random(seed)
+        self.cjk_ratio = cjk_ratio
+        self.name_variants = name_variants  # 每个基础名称的编号数，决定不同进程名的总数
+        self.title_length = title_length
+        self.window_ratio = window_ratio
+        self.next_pid = 4
+        self.processes = {}  # pid -> 进程信息
+        self.windows = {}  # pid -> (hwnd, pid, 标题)
+        for _ in range(count):
+            self.spawn()
+
+    def make_name(self):
+        pool = CJK_NAMES if self.rng.random() < self.cjk_ratio else ASCII_NAMES
+        return f"{self.rng.choice(pool)}{self.rng.randrange(self.name_variants)}.exe"
+
+    def make_title(self):
+        words = []
+        length = 0
+        while length < self.title_length:
+            word = self.rng.choice(TITLE_WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return " ".join(words)[:self.title_length]
+
+    def spawn(self):
+        pid = self.next_pid
+        self.next_pid += 4  # Windows 的 PID 是4的倍数
+        self.processes[pid] = {
+            'pid': pid, 'ppid': self.rng.randrange(4, pid, 4) if pid > 4 else 0,
+            'name': self.make_name(), 'create_time': 1000.0 + pid,
+            'username': self.rng.choice(USERS),
+            'cpu_times': ProcCpuTimes(0.0, 0.0),
+            'memory_info': ProcMemoryInfo(self.rng.randrange(1 << 20, 1 << 30)),
+            'num_threads': self.rng.randrange(1, 64),
+            'io_counters': ProcIoCounters(0, 0),
+        }
+        if self.rng.random() < self.window_ratio:
+            self.windows[pid] = (pid * 16, pid, self.make_title())
+
+    def step(self, churn):
+        """推进一次: 按变化率结束/启动进程，所有进程的CPU时间、内存和读写计数增长"""
+        count = int(len(self.processes) * churn)
+        for pid in self.rng.sample(list(self.processes), count):
+            del self.processes[pid]
+            self.windows.pop(pid, None)
+        for _ in range(count):
+            self.spawn()
+        rng = self.rng
+        for info in self.processes.values():
+            cpu = info['cpu_times']
+            io = info['io_counters']
+            info['cpu_times'] = ProcCpuTimes(cpu.user + rng.random() * 0.01, cpu.system)
+            info['memory_info'] = ProcMemoryInfo(info['memory_info'].rss + rng.randrange(-4096, 4097) * 16)
+            info['io_counters'] = ProcIoCounters(io.read_bytes + rng.randrange(1 << 16), io.write_bytes)
+
+    def details(self, pid):
+        info = self.processes[pid]
+        return {
+            'name': info['name'], 'create_time': info['create_time'],
+            'exe': f"C:\\Program Files\\{info['name'][:-4]}\\{info['name']}",
+            'cmdline': f"{info['name']} --type=renderer", 'username': info['username'], 'cwd': "C:\\",
+        }
+
+
+class SyntheticWindowProvider(StaticWindowProvider):
+    """返回虚拟进程源当前窗口列表的窗口枚举后端"""
+
+    def __init__(self, source):
+        super().__init__()
+        self.source = source
+
+    def enum_windows(self):
+        return list(self.source.windows.values())
+
+
+class SyntheticCollector(ProcessCollector):
+    """由虚拟进程源驱动的采集器"""
+
+    def __init__(self, source):
+        super().__init__(SyntheticWindowProvider(source))
+        self.source = source
+
+    def iter_process_info(self, extra_attrs=()):
+        return iter(list(self.source.processes.values()))
+
+    def collect_details(self, pid):
+        return self.source.details(pid)
+
+
+class BenchProcessManager(ProcessManager):
+    """基准测试用的进程管理器: 不写日志，状态文件放在临时目录"""
+
+    def log(self, message, error=False):
+        pass
+
+
+def summarize(samples):
+    """耗时样本(秒) -> 中位数/P95/最大值(毫秒)"""
+    values = sorted(samples)
+    return {
+        'median_ms': round(statistics.median(values) * 1000, 3),
+        'p95_ms': round(values[min(int(0.95 * len(values)), len(values) - 1)] * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3),
+        'samples': len(values),
+    }
+
+
+def timed(func, *args):
+    """计时期间关闭垃圾回收，减少与被测代码无关的抖动"""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        func(*args)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def show_details(manager, index):
+    """显示一行的详情并同步完成采集线程中的详情请求(不含表格滚动到该行的耗时)"""
+    manager.on_current_row_changed(index)
+    key = manager.details_key
+    manager.on_details_ready(key, manager.collector.collect_details(key[0]), "")
+
+
+def run_size(app, count, args, state_dir):
+    source = SyntheticProcessSource(count, args.seed, args.cjk, args.title_length, args.window_ratio)
+    manager = BenchProcessManager(collector=SyntheticCollector(source),
+                                  state_file=os.path.join(state_dir, f"state-{count}.json"))
+    # 等待启动时的后台首次采集完成，之后只在当前线程同步刷新
+    deadline = time.monotonic() + 60
+    while not manager.first_snapshot_applied and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    manager.refresh_now()
+
+    # 第一轮只用于预热(拼音索引、排序键缓存等)，不计入结果
+    samples = {name: [] for name in ('refresh', 'refresh_apply', 'filter_keystroke', 'sort_name',
+                                     'sort_title', 'details', 'details_arrow')}
+    search_input = manager.search_input
+    for round_index in range(args.repeat + 1):
+        if round_index == 1:
+            for values in samples.values():
+                values.clear()
+        source.step(args.churn)
+        samples['refresh'].append(timed(manager.refresh_now))
+        samples['refresh_apply'].append(manager.perf_probes.samples['apply'][-1][1])
+
+        for text in KEYSTROKES:
+            search_input.blockSignals(True)
+            search_input.setPlainText(text)
+            search_input.blockSignals(False)
+            samples['filter_keystroke'].append(timed(manager.filter_process_list))
+
+        order = Qt.AscendingOrder if round_index % 2 == 0 else Qt.DescendingOrder
+        samples['sort_name'].append(timed(manager.sort_by_name, order))
+        samples['sort_title'].append(timed(manager.sort_by_title, order))
+
+        proxy = manager.proxy_model
+        samples['details'].append(timed(show_details, manager, proxy.index(round_index * 7 % proxy.rowCount(), 0)))
+        for row in range(min(100, proxy.rowCount())):
+            samples['details_arrow'].append(timed(manager.process_list.setCurrentIndex, proxy.index(row, 0)))
+        manager.details_timer.stop()
+        app.processEvents()
+
+    result = {name: summarize(values) for name, values in samples.items()}
+    result['rows'] = manager.process_model.rowCount()
+    manager.close()
+    manager.deleteLater()
+    app.processEvents()
+    return result
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """与基线比较中位数，返回变慢超过容差的项目列表"""
+    regressions = []
+    print(f"{'进程数':>8} {'项目':<18} {'基线(ms)':>10} {'本次(ms)':>10} {'变化':>8}")
+    for size, metrics in results['results'].items():
+        base_metrics = baseline.get('results', {}).get(size)
+        if base_metrics is None:
+            continue
+        for name, stats in metrics.items():
+            base = base_metrics.get(name)
+            if not isinstance(stats, dict) or not isinstance(base, dict):
+                continue
+            old, new = base['median_ms'], stats['median_ms']
+            ratio = new / old - 1 if old > 0 else 0.0
+            regressed = ratio > tolerance and new - old > min_delta_ms
+            if regressed:
+                regressions.append((size, name, old, new))
+            print(f"{size:>8} {name:<18} {old:>10.2f} {new:>10.2f} {ratio:>+8.0%}{'  变慢' if regressed else ''}")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="进程管理界面性能基准套件")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="进程数，逗号分隔(默认 1000,10000,50000)")
+    parser.add_argument("--repeat", type=int, default=10, help="每个进程数重复的轮数(默认10)")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子(默认0)")
+    parser.add_argument("--cjk", type=float, default=0.3, help="中文进程名的比例(默认0.3)")
+    parser.add_argument("--title-length", type=int, default=40, help="窗口标题长度(默认40)")
+    parser.add_argument("--window-ratio", type=float, default=0.2, help="有窗口的进程比例(默认0.2)")
+    parser.add_argument("--churn", type=float, default=0.01, help="每次刷新启动/结束的进程比例(默认0.01)")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    parser.add_argument("--baseline", help="与该 JSON 文件中的基线比较")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="中位数允许变慢的比例(默认0.25)")
+    parser.add_argument("--min-delta", type=float, default=0.5,
+                        help="变慢的绝对值小于该毫秒数时不算回退，避免小数值的抖动(默认0.5)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    app = QApplication.instance() or QApplication(sys.argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = {
+        'schema': SCHEMA_VERSION,
+        'meta': {
+            'version': __version__, 'python': platform.python_version(), 'qt': QT_VERSION_STR,
+            'pyqt': PYQT_VERSION_STR, 'platform': platform.platform(), 'machine': platform.machine(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'params': {'seed': args.seed, 'repeat': args.repeat, 'cjk': args.cjk, 'title_length': args.title_length,
+                   'window_ratio': args.window_ratio, 'churn': args.churn},
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as state_dir:
+        for count in sizes:
+            metrics = run_size(app, count, args, state_dir)
+            results['results'][str(count)] = metrics
+            summary = ", ".join(f"{name} {stats['median_ms']:.2f}" for name, stats in metrics.items()
+                                if isinstance(stats, dict))
+            print(f"{count}个进程 (中位数 ms): {summary}", file=sys.stderr)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('params') != results['params']:
+            print("警告: 基线的参数与本次不同，比较结果仅供参考", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"{len(regressions)}项变慢超过{args.tolerance:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
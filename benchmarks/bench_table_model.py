@@ -0,0 +1,91 @@
+"""表格模型基准测试
+
+对比旧的 QTableWidget(每个单元格一个 QTableWidgetItem) 与
+ProcessTableModel + ProcessSortFilterProxyModel 在数万行时的
+每行内存占用和按进程名排序的耗时。
+
+用法: python benchmarks/bench_table_model.py [行数 ...]
+"""
+import gc
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+
+from ProcessManager_app import ProcessSortFilterProxyModel, ProcessTableModel
+from process_core import ProcessRow
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    return [ProcessRow(pid, 1000.0 + pid, f"proc_{rng.randrange(count // 10 + 1)}.exe",
+                       f"窗口标题 {rng.randrange(count)}" if rng.random() < 0.2 else "", False)
+            for pid in range(1, count + 1)]
+
+
+def rss():
+    gc.collect()
+    return psutil.Process().memory_info().rss
+
+
+def build_widget(rows):
+    table = QTableWidget()
+    table.setColumnCount(3)
+    table.setRowCount(len(rows))
+    for row, process_row in enumerate(rows):
+        table.setItem(row, 0, QTableWidgetItem(str(process_row.pid)))
+        table.setItem(row, 1, QTableWidgetItem(process_row.name))
+        table.setItem(row, 2, QTableWidgetItem(process_row.title))
+    return table
+
+
+def build_model(rows):
+    model = ProcessTableModel()
+    proxy = ProcessSortFilterProxyModel()
+    proxy.setSourceModel(model)
+    proxy.begin_batch()
+    model.apply_diff(rows, [], [])
+    proxy.end_batch()
+    return model, proxy
+
+
+def measure(count):
+    rows = make_rows(count)
+
+    before = rss()
+    table = build_widget(rows)
+    widget_bytes = rss() - before
+    start = time.perf_counter()
+    table.sortItems(1, Qt.AscendingOrder)
+    widget_sort = time.perf_counter() - start
+    del table
+
+    before = rss()
+    model, proxy = build_model(rows)
+    model_bytes = rss() - before
+    start = time.perf_counter()
+    proxy.sort(1, Qt.AscendingOrder)
+    model_sort = time.perf_counter() - start
+
+    print(f"{count:>8} {widget_bytes / count:>16.0f} {model_bytes / count:>14.0f} "
+          f"{widget_sort * 1000:>16.1f} {model_sort * 1000:>14.1f}")
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    counts = [int(arg) for arg in sys.argv[1:]] or [10000, 50000]
+    print(f"{'行数':>8} {'QTableWidget B/行':>16} {'模型 B/行':>14} {'QTableWidget 排序ms':>16} {'模型 排序ms':>14}")
+    for count in counts:
+        measure(count)
+    return app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""资源监控基准测试
+
+用虚拟进程源驱动表格模型，每次刷新后对全部进程判断若干条资源监控规则，对比
+逐个进程、逐条规则的 Python 循环 与 Watchdog 的 NumPy 矩阵判断的每次刷新耗时。
+
+用法: python benchmarks/bench_watchdog.py [进程数] [规则数] [刷新次数] [--dense]
+
+--dense 时阈值取得很低，大部分进程都满足条件，用于观察最坏情况。
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+
+from ProcessManager_app import MetricHistory, Watchdog
+from bench_suite import BenchProcessManager, SyntheticCollector, SyntheticProcessSource
+from process_core import WATCH_METRICS, WatchRule
+
+# 指标 -> 阈值范围(与实际使用相近: 只有少数进程超过阈值)
+THRESHOLDS = {
+    'cpu': (50, 100), 'rss': (900 << 20, 1100 << 20), 'threads': (56, 70), 'read_rate': (1 << 20, 1 << 24),
+    'write_rate': (1 << 20, 1 << 24), 'rss_growth': (1 << 20, 1 << 26), 'threads_growth': (5, 100),
+}
+
+
+def make_rules(count, rng):
+    rules = []
+    for index in range(count):
+        metric = list(WATCH_METRICS)[index % len(WATCH_METRICS)]
+        low, high = THRESHOLDS[metric]
+        rules.append(WatchRule(metric, '>', rng.uniform(low, high), rng.choice((0, 5, 60)),
+                               rng.choice(('seconds', 'samples'))))
+    return rules
+
+
+class LoopWatchdog:
+    """对照实现: 每个进程、每条规则用 Python 判断，状态保存在 进程键 -> 字典 中"""
+
+    ATTRIBUTES = {'cpu': 'cpu_percents', 'rss': 'rss', 'threads': 'threads', 'read_rate': 'read_rates',
+                  'write_rate': 'write_rates'}
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.state = {}
+        self.previous_time = None
+
+    def evaluate(self, model, now):
+        elapsed = now - self.previous_time if self.previous_time is not None else 0.0
+        self.previous_time = now
+        state = {}
+        alerts = []
+        for row, key in enumerate(model.iter_keys()):
+            old = self.state.get(key)
+            values = {metric: getattr(model, attribute)[row] for metric, attribute in self.ATTRIBUTES.items()}
+            for metric in ('rss', 'threads'):
+                previous = old['values'][metric] if old else None
+                values[metric + '_growth'] = ((values[metric] - previous) / elapsed * 60
+                                              if previous is not None and elapsed > 0 else None)
+            entry = {'values': values, 'rules': []}
+            for index, rule in enumerate(self.rules):
+                since, streak, fired = old['rules'][index] if old else (None, 0, False)
+                value = values[rule.metric]
+                condition = value is not None and (value > rule.threshold if rule.op == '>'
+                                                   else value < rule.threshold)
+                if condition:
+                    since = now if since is None else since
+                    streak += 1
+                    sustained = (streak >= rule.duration if rule.unit == 'samples'
+                                 else now - since >= rule.duration)
+                    if sustained and not fired:
+                        alerts.append((rule, row))
+                    fired = fired or sustained
+                else:
+                    since, streak, fired = None, 0, False
+                entry['rules'].append((since, streak, fired))
+            state[key] = entry
+        self.state = state
+        return alerts
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rule_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 and sys.argv[3] != "--dense" else 30
+    rng = random.Random(0)
+    if "--dense" in sys.argv:
+        for metric, (low, high) in THRESHOLDS.items():
+            THRESHOLDS[metric] = (low / 64, high / 64)
+    source = SyntheticProcessSource(count)
+    manager = BenchProcessManager(collector=SyntheticCollector(source))
+    manager.refresh_now()
+    history = MetricHistory()
+    rules = make_rules(rule_count, rng)
+    watchdog = Watchdog(rules)
+    loop = LoopWatchdog(rules)
+
+    loop_times, numpy_times = [], []
+    loop_alerts = numpy_alerts = 0
+    now = time.time()
+    for _ in range(rounds):
+        source.step(0.01)
+        manager.refresh_now()
+        now += 2.0
+        history.append(manager.process_model, now)
+        start = time.perf_counter()
+        loop_alerts += len(loop.evaluate(manager.process_model, now))
+        loop_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        numpy_alerts += len(watchdog.evaluate(history, manager.process_model, now))
+        numpy_times.append(time.perf_counter() - start)
+
+    loop_times.sort()
+    numpy_times.sort()
+    print(f"进程数 {count}, 规则数 {rule_count}, 刷新 {rounds} 次(每次 1% 进程变化), "
+          f"最后一次有 {int(watchdog.active.sum())} 个进程满足条件")
+    print(f"{'实现':<12} {'中位数(ms)':>12} {'最大(ms)':>10} {'触发次数':>10}")
+    print(f"{'Python循环':<12} {loop_times[len(loop_times) // 2] * 1000:>12.2f} {loop_times[-1] * 1000:>10.2f} "
+          f"{loop_alerts:>10}")
+    print(f"{'NumPy矩阵':<12} {numpy_times[len(numpy_times) // 2] * 1000:>12.2f} {numpy_times[-1] * 1000:>10.2f} "
+          f"{numpy_alerts:>10}")
+    manager.close()
+    return app
+
+
+if __name__ == "__main__":
+    main()
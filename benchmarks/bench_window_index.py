@@ -0,0 +1,64 @@
+"""窗口标题索引基准测试
+
+对比旧实现(每个进程一次完整窗口枚举)与单次枚举索引的刷新耗时，
+验证索引方式的耗时随 进程数 + 窗口数 线性增长。
+
+用法: python benchmarks/bench_window_index.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_core import StaticWindowProvider, WindowTitleIndex
+
+
+def make_windows(process_count, window_count, seed=0):
+    """生成 (hwnd, pid, 标题) 形式的虚拟窗口列表"""
+    rng = random.Random(seed)
+    windows = []
+    for hwnd in range(window_count):
+        pid = rng.randrange(process_count)
+        title = f"窗口 {hwnd}" if rng.random() < 0.3 else ""
+        windows.append((hwnd, pid, title))
+    return windows
+
+
+def per_pid_refresh(provider, pids):
+    """旧实现: 每个进程都完整枚举一次窗口"""
+    result = {}
+    for pid in pids:
+        result[pid] = [title for hwnd, window_pid, title in provider.enum_windows()
+                       if window_pid == pid and title]
+    return result
+
+
+def indexed_refresh(index, pids):
+    """新实现: 枚举一次窗口，之后只查索引"""
+    index.rebuild()
+    return {pid: index.get(pid) for pid in pids}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'进程数':>8} {'窗口数':>8} {'逐进程枚举(ms)':>16} {'单次索引(ms)':>14}")
+    for process_count, window_count in [(150, 500), (300, 1000), (600, 2000), (1200, 4000)]:
+        provider = StaticWindowProvider(make_windows(process_count, window_count))
+        pids = list(range(process_count))
+        index = WindowTitleIndex(provider)
+        assert per_pid_refresh(provider, pids) == indexed_refresh(index, pids)
+        # 逐进程枚举在大规模下非常慢，只跑一次
+        old = timed(per_pid_refresh, provider, pids)
+        new = min(timed(indexed_refresh, index, pids) for _ in range(5))
+        print(f"{process_count:>8} {window_count:>8} {old * 1000:>16.2f} {new * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""远程采集代理: 在被监控的主机上定时采集进程快照，通过 TCP 或 Unix 套接字发送给界面程序
+
+代理与界面之间的数据流与录制文件使用相同的帧格式(见 process_recording.py):
+连接建立后代理先发送一个 H 帧(JSON，包含主机名和采集间隔)，之后每次采集发送一帧，
+第一帧为关键帧(全部进程)，之后只发送新增/变化的行和结束的进程，并用 zlib 压缩，
+因此稳定运行时的流量与进程变化量成正比，而不是与进程总数成正比。
+每个连接各自维护编码状态，新连接不影响已有连接。
+
+地址格式: "主机:端口"(TCP) 或 "unix:路径"(Unix 套接字)。
+代理不做身份验证，默认只监听 127.0.0.1，需要跨主机访问时请放在可信网络或 SSH 隧道中。
+"""
+import json
+import os
+import selectors
+import socket
+import threading
+import time
+import zlib
+from types import MappingProxyType
+
+from process_core import ProcessSnapshot
+from process_recording import FRAME_HEADER, MAX_FRAME_SIZE, SnapshotDecoder, SnapshotEncoder, decompress_frame
+
+AGENT_PROTOCOL_VERSION = 1
+DEFAULT_AGENT_PORT = 7711
+HELLO = b'H'
+# 向单个客户端发送一帧的超时(秒): 各客户端依次阻塞发送，接收过慢的客户端最多让其他客户端
+# 推迟 SEND_TIMEOUT 秒收到该帧，超时后被断开
+SEND_TIMEOUT = 5.0
+MAX_HELLO_SIZE = 64 * 1024  # 握手帧解压后的最大字节数
+
+
+def parse_address(text):
+    """解析代理地址，返回 (socket 地址族, 地址)"""
+    text = text.strip()
+    if text.startswith("unix:"):
+        return socket.AF_UNIX, text[5:]
+    host, _, port = text.rpartition(":")
+    if not host:
+        host, port = port, DEFAULT_AGENT_PORT
+    try:
+        return socket.AF_INET, (host.strip("[]") or "127.0.0.1", int(port))
+    except ValueError:
+        raise ValueError(f"无效的代理地址: {text}")
+
+
+def pack_frame(kind, timestamp, payload):
+    return FRAME_HEADER.pack(kind, timestamp, len(payload)) + payload
+
+
+class AgentServer:
+    """采集代理: 每隔 interval 秒采集一次，向所有已连接的客户端发送增量帧"""
+
+    def __init__(self, collector, address, interval=1.0, name=None):
+        self.collector = collector
+        self.interval = interval
+        self.name = name or socket.gethostname()
+        family, self.address = parse_address(address)
+        if family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+        self.listener = socket.socket(family, socket.SOCK_STREAM)
+        if family != socket.AF_UNIX:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(self.address)
+        self.listener.listen()
+        self.listener.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.clients = {}  # 套接字 -> SnapshotEncoder
+        self.bytes_sent = 0
+        self.frames = 0
+        self.stopped = threading.Event()
+
+    def accept(self):
+        try:
+            sock, _ = self.listener.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        sock.setblocking(True)
+        sock.settimeout(SEND_TIMEOUT)
+        hello = json.dumps({'name': self.name, 'version': AGENT_PROTOCOL_VERSION, 'interval': self.interval,
+                            'pid': os.getpid()}, ensure_ascii=False).encode('utf-8')
+        try:
+            sock.sendall(pack_frame(HELLO, time.time(), zlib.compress(hello)))
+        except OSError:
+            sock.close()
+            return
+        self.clients[sock] = SnapshotEncoder(keyframe_interval=None)
+        self.selector.register(sock, selectors.EVENT_READ)
+
+    def drop(self, sock):
+        self.clients.pop(sock, None)
+        try:
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        sock.close()
+
+    def broadcast(self, snapshot):
+        """把快照编码后依次发给每个客户端，发送失败或超过 SEND_TIMEOUT 的客户端被断开"""
+        for sock, encoder in list(self.clients.items()):
+            kind, payload = encoder.encode(snapshot.rows)
+            try:
+                sock.sendall(pack_frame(kind, snapshot.created_at, payload))
+                self.bytes_sent += FRAME_HEADER.size + len(payload)
+            except OSError:
+                self.drop(sock)
+        self.frames += 1
+
+    def serve(self, count=0):
+        """运行采集循环，count 为 0 时一直运行到 stop()"""
+        ticks = 0
+        next_tick = time.monotonic()
+        while not self.stopped.is_set() and (count <= 0 or ticks < count):
+            timeout = next_tick - time.monotonic()
+            if timeout > 0:
+                for key, _ in self.selector.select(timeout):
+                    if key.fileobj is self.listener:
+                        self.accept()
+                    else:
+                        # 客户端不发送数据，可读即表示已断开
+                        self.drop(key.fileobj)
+                continue
+            snapshot = self.collector.collect(set(), True)
+            if self.clients:
+                self.broadcast(snapshot)
+            ticks += 1
+            next_tick = max(next_tick + self.interval, time.monotonic())
+
+    def stop(self):
+        self.stopped.set()
+
+    def close(self):
+        for sock in list(self.clients):
+            self.drop(sock)
+        self.selector.close()
+        self.listener.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+class AgentConnection:
+    """到一个采集代理的连接: 在后台线程中接收帧并维护该主机的最新进程行，断开后自动重连"""
+
+    RECONNECT_DELAYS = (1.0, 2.0, 5.0, 10.0)
+
+    def __init__(self, address, claim_label=None):
+        self.address = address
+        self.family, self.socket_address = parse_address(address)
+        self.claim_label = claim_label
+        self.label = address
+        self.rows = MappingProxyType({})  # 进程键 (pid, create_time, 主机名) -> ProcessRow
+        self.connected = False
+        self.status = "正在连接"
+        self.bytes_received = 0
+        self.frames = 0
+        self.updated_at = 0.0
+        self.sock = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f"agent {address}", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.stopped.set()
+        sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def run(self):
+        failures = 0
+        while not self.stopped.is_set():
+            try:
+                self.receive()
+                failures = 0
+            except (OSError, ValueError, zlib.error) as e:
+                self.status = f"连接失败: {e}"
+                failures += 1
+            finally:
+                self.connected = False
+                self.rows = MappingProxyType({})
+            if not self.stopped.is_set():
+                self.stopped.wait(self.RECONNECT_DELAYS[min(failures, len(self.RECONNECT_DELAYS) - 1)])
+
+    def receive(self):
+        """连接代理并持续接收帧，直到连接断开"""
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        self.sock = sock
+        try:
+            sock.settimeout(10.0)
+            sock.connect(self.socket_address)
+            header = memoryview(bytearray(FRAME_HEADER.size))
+            kind, _, payload = self.read_frame(sock, header)
+            if kind != HELLO:
+                raise ValueError("不是进程管理采集代理")
+            hello = json.loads(decompress_frame(payload, MAX_HELLO_SIZE).decode('utf-8'))
+            name = str(hello.get('name') or self.address)
+            self.label = self.claim_label(name, self) if self.claim_label else name
+            # 超过3个采集间隔没有收到数据视为断开
+            sock.settimeout(max(3 * float(hello.get('interval') or 1.0), 10.0))
+            decoder = SnapshotDecoder(self.label)
+            self.connected = True
+            self.status = "已连接"
+            while not self.stopped.is_set():
+                kind, timestamp, payload = self.read_frame(sock, header)
+                if not kind:
+                    self.status = "代理已断开"
+                    return
+                decoder.apply(kind, payload)
+                self.rows = MappingProxyType(dict(decoder.rows))
+                self.frames += 1
+                self.updated_at = timestamp
+        finally:
+            self.sock = None
+            sock.close()
+
+    def read_frame(self, sock, header):
+        """读取一帧，连接关闭时返回 (b'', 0.0, b'')，帧长度超过 MAX_FRAME_SIZE 时抛出 ValueError"""
+        if not self.read_exactly(sock, header):
+            return b'', 0.0, b''
+        kind, timestamp, length = FRAME_HEADER.unpack(header)
+        if length > MAX_FRAME_SIZE:
+            raise ValueError(f"帧长度 {length} 超过上限 {MAX_FRAME_SIZE}")
+        payload = bytearray(length)
+        if not self.read_exactly(sock, memoryview(payload)):
+            return b'', 0.0, b''
+        self.bytes_received += FRAME_HEADER.size + length
+        return kind, timestamp, bytes(payload)
+
+    @staticmethod
+    def read_exactly(sock, buffer):
+        received = 0
+        while received < len(buffer):
+            count = sock.recv_into(buffer[received:])
+            if count == 0:
+                return False
+            received += count
+        return True
+
+
+class MultiHostCollector:
+    """合并本机采集结果和多个采集代理的最新快照
+
+    远程进程的键为 (pid, create_time, 主机名)，与本机进程互不冲突；自动规则只对本机进程生效。
+    """
+
+    def __init__(self, local_collector, include_local=True):
+        self.local = local_collector
+        self.include_local = include_local
+        self.connections = {}  # 地址 -> AgentConnection
+        self.label_lock = threading.Lock()
+
+    @property
+    def window_index(self):
+        return self.local.window_index
+
+    @property
+    def backend(self):
+        return getattr(self.local, 'backend', None)
+
+    def claim_label(self, name, connection):
+        """主机名重复时(例如同一主机上的多个代理)加上编号区分"""
+        with self.label_lock:
+            used = {other.label for other in self.connections.values() if other is not connection}
+            label = name
+            number = 2
+            while label in used:
+                label = f"{name}#{number}"
+                number += 1
+            connection.label = label
+            return label
+
+    def add_agent(self, address):
+        """连接一个采集代理(地址无效时抛出 ValueError)"""
+        if address in self.connections:
+            return self.connections[address]
+        connection = AgentConnection(address, self.claim_label)
+        self.connections[address] = connection
+        return connection.start()
+
+    def remove_agent(self, address):
+        connection = self.connections.pop(address, None)
+        if connection is not None:
+            connection.close()
+
+    def close(self):
+        for address in list(self.connections):
+            self.remove_agent(address)
+
+    def collect(self, hidden_keys, show_hidden, rules=None):
+        start = time.perf_counter()
+        if self.include_local:
+            snapshot = self.local.collect(hidden_keys, show_hidden, rules)
+            rows = dict(snapshot.rows)
+        else:
+            snapshot = ProcessSnapshot(MappingProxyType({}), time.time(), 0.0, 0.0, 0.0, ())
+            rows = {}
+        for connection in list(self.connections.values()):
+            rows.update(connection.rows)
+        return snapshot._replace(rows=MappingProxyType(rows), scan_time=time.perf_counter() - start)
+
+    def collect_details(self, pid):
+        return self.local.collect_details(pid)
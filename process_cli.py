@@ -0,0 +1,311 @@
+"""进程管理命令行工具: 不加载界面，适合计划任务和监控脚本调用
+
+用法:
+    python process_cli.py [--backend 后端] [--state 状态文件] snapshot [--json] [--match 正则] [--sample 秒]
+    python process_cli.py watch [--interval 秒] [--count 次数] [--match 正则]
+    python process_cli.py kill --match 正则 [--force] [--timeout 秒] [--dry-run] [--json]
+    python process_cli.py record 文件.pmrec [--interval 秒] [--count 次数]
+    python process_cli.py agent [--listen 地址] [--interval 秒] [--name 主机名]
+    python process_cli.py export 输出文件 [--from 录制文件] [--interval 秒] [--count 次数] [--match 正则]
+
+--json 与 watch 的输出均为 NDJSON(每行一个 JSON 对象)，逐行写出，不在内存中拼接整个结果。
+export 按扩展名写出 CSV、JSON Lines 或 Parquet(需要 pyarrow)，在后台线程中逐帧写入。
+--backend 默认按平台选择(Linux 上直接读取 /proc)，可指定 psutil 用于对比。
+--state 为界面程序保存的状态文件(默认与界面相同的 ProcessManager.json)，其中隐藏的进程和
+命中"隐藏"规则的进程在输出中标记为 hidden；命令行工具只读取该文件，不执行规则的挂起/结束操作。
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+from types import MappingProxyType
+
+from process_core import (PLATFORM_BACKENDS, ProcessCollector, ProcessRow, RuleSet, create_platform_backend,
+                          default_state_path, format_bytes, load_state, run_bulk_action)
+
+# 输出时保留的小数位，避免微小波动在 watch 中产生大量变化事件
+ROUNDING = {'cpu': 1, 'read_rate': 0, 'write_rate': 0}
+
+dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def row_to_dict(row):
+    """ProcessRow -> 可序列化的字典"""
+    record = dict(zip(ProcessRow._fields, row))
+    if not record['host']:
+        del record['host']
+    for field, digits in ROUNDING.items():
+        record[field] = round(record[field], digits) if digits else int(record[field])
+    return record
+
+
+def make_matcher(pattern):
+    """按进程名或窗口标题匹配(忽略大小写的正则表达式)"""
+    if not pattern:
+        return None
+    search = re.compile(pattern, re.IGNORECASE).search
+    return lambda row: search(row.name) is not None or search(row.title) is not None
+
+
+def make_collector(args):
+    return ProcessCollector(backend=create_platform_backend(name=args.backend))
+
+
+def load_cli_state(args):
+    """读取界面程序保存的状态，返回 (隐藏进程键集合, RuleSet)"""
+    rules, hidden_keys, _, _, _, errors = load_state(args.state or default_state_path())
+    for error in errors:
+        print(error, file=sys.stderr)
+    return frozenset(hidden_keys), RuleSet(rules)
+
+
+def collect_snapshot(collector, state):
+    """采集一次快照，命中"隐藏"规则的进程与界面中一样标记为隐藏(不执行挂起/结束等操作)"""
+    hidden_keys, rule_set = state
+    snapshot = collector.collect(hidden_keys, True, rule_set)
+    for error in snapshot.errors:
+        print(error, file=sys.stderr)
+    hide_keys = [key for key, actions in snapshot.rule_matches.items()
+                 if 'hide' in actions and key in snapshot.rows and not snapshot.rows[key].hidden]
+    if hide_keys:
+        rows = dict(snapshot.rows)
+        for key in hide_keys:
+            rows[key] = rows[key]._replace(hidden=True)
+        snapshot = snapshot._replace(rows=MappingProxyType(rows))
+    return snapshot
+
+
+def collect_rows(collector, state, matcher=None):
+    snapshot = collect_snapshot(collector, state)
+    rows = snapshot.rows
+    if matcher is not None:
+        rows = {key: row for key, row in rows.items() if matcher(row)}
+    return snapshot, rows
+
+
+def command_snapshot(args):
+    collector = make_collector(args)
+    state = load_cli_state(args)
+    matcher = make_matcher(args.match)
+    if args.sample > 0:
+        # CPU使用率和读写速率需要两次采集之间的差值
+        collector.collect(state[0], True)
+        time.sleep(args.sample)
+    snapshot, rows = collect_rows(collector, state, matcher)
+
+    write = sys.stdout.write
+    if args.json:
+        for row in rows.values():
+            write(dumps(row_to_dict(row)) + "\n")
+    else:
+        write(f"{'PID':>7} {'CPU %':>6} {'内存':>10}  进程名 / 窗口标题\n")
+        for row in sorted(rows.values()):
+            title = f"  [{row.title}]" if row.title else ""
+            hidden = "  (已隐藏)" if row.hidden else ""
+            write(f"{row.pid:>7} {row.cpu:>6.1f} {format_bytes(row.rss):>10}  {row.name}{title}{hidden}\n")
+    return 0
+
+
+def command_watch(args):
+    """每隔 interval 秒输出一次增量: add / remove / change 事件，最后一行为 tick"""
+    collector = make_collector(args)
+    state = load_cli_state(args)
+    matcher = make_matcher(args.match)
+    write = sys.stdout.write
+    flush = sys.stdout.flush
+    previous = {}
+    ticks = 0
+    while args.count <= 0 or ticks < args.count:
+        started = time.monotonic()
+        snapshot, rows = collect_rows(collector, state, matcher)
+        ts = round(snapshot.created_at, 3)
+        current = {}
+        for key, row in rows.items():
+            record = row_to_dict(row)
+            current[key] = record
+            old = previous.get(key)
+            if old is None:
+                write(dumps({'event': 'add', 'ts': ts, **record}) + "\n")
+            elif old != record:
+                changed = {field: value for field, value in record.items() if old[field] != value}
+                write(dumps({'event': 'change', 'ts': ts, 'pid': key[0], 'create_time': key[1], **changed}) + "\n")
+        for key in previous.keys() - current.keys():
+            write(dumps({'event': 'remove', 'ts': ts, 'pid': key[0], 'create_time': key[1]}) + "\n")
+        write(dumps({'event': 'tick', 'ts': ts, 'count': len(current),
+                     'scan_ms': round(snapshot.scan_time * 1000, 1)}) + "\n")
+        flush()
+        previous = current
+        ticks += 1
+        if args.count <= 0 or ticks < args.count:
+            time.sleep(max(args.interval - (time.monotonic() - started), 0.0))
+    return 0
+
+
+def command_kill(args):
+    collector = make_collector(args)
+    _, rows = collect_rows(collector, load_cli_state(args), make_matcher(args.match))
+    own_pid = os.getpid()
+    keys = [key for key in rows if key[0] != own_pid]
+    action = 'kill' if args.force else 'terminate'
+
+    if args.dry_run or not keys:
+        for key in keys:
+            row = rows[key]
+            if args.json:
+                sys.stdout.write(dumps({'event': 'match', 'pid': row.pid, 'name': row.name}) + "\n")
+            else:
+                sys.stdout.write(f"{row.pid:>7}  {row.name}\n")
+        if not keys:
+            print("没有匹配的进程", file=sys.stderr)
+        return 0 if keys else 1
+
+    result = run_bulk_action(action, keys, timeout=args.timeout, backend=collector.backend)
+    if args.json:
+        sys.stdout.write(dumps({'event': 'result', 'action': result.action, 'succeeded': result.succeeded,
+                                'escalated': result.escalated, 'gone': result.gone,
+                                'failures': [{'pid': pid, 'error': error} for pid, error in result.failures],
+                                'elapsed': round(result.elapsed, 3)}) + "\n")
+    else:
+        print(f"成功{len(result.succeeded)}个(其中{len(result.escalated)}个超时后强制结束), "
+              f"已退出{len(result.gone)}个, 失败{len(result.failures)}个, 耗时{result.elapsed:.2f}秒")
+        for pid, error in result.failures:
+            print(f"PID {pid}: {error}", file=sys.stderr)
+    return 2 if result.failures else 0
+
+
+def command_record(args):
+    """定时采集并追加到录制文件，可在界面的"录制"标签页中回放"""
+    # 只有录制时才需要录制模块
+    from process_recording import SnapshotRecorder
+
+    collector = make_collector(args)
+    state = load_cli_state(args)
+    recorder = SnapshotRecorder(args.output)
+    ticks = 0
+    try:
+        while args.count <= 0 or ticks < args.count:
+            started = time.monotonic()
+            recorder.write(collect_snapshot(collector, state))
+            ticks += 1
+            if args.count <= 0 or ticks < args.count:
+                time.sleep(max(args.interval - (time.monotonic() - started), 0.0))
+    finally:
+        recorder.close()
+        print(f"已录制{ticks}帧到 {args.output}, 共{recorder.bytes_written / 1024:.1f} KB", file=sys.stderr)
+    return 0
+
+
+def command_agent(args):
+    """作为采集代理运行，供界面程序远程监控本机进程"""
+    from process_agent import AgentServer
+
+    server = AgentServer(make_collector(args), args.listen, args.interval, args.name)
+    print(f"采集代理 {server.name} 正在监听 {args.listen}", file=sys.stderr)
+    try:
+        server.serve(args.count)
+    finally:
+        server.close()
+        print(f"已发送{server.frames}帧, 共{server.bytes_sent / 1024:.1f} KB", file=sys.stderr)
+    return 0
+
+
+def command_export(args):
+    """把实时采集的快照(或录制文件的所有帧)导出为 CSV/JSON Lines/Parquet"""
+    from process_export import SnapshotExporter, describe_export, export_recording
+
+    if args.source:
+        result = export_recording(args.source, args.output)
+    else:
+        collector = make_collector(args)
+        state = load_cli_state(args)
+        matcher = make_matcher(args.match)
+        exporter = SnapshotExporter(args.output)
+        ticks = 0
+        try:
+            while args.count <= 0 or ticks < args.count:
+                started = time.monotonic()
+                snapshot, rows = collect_rows(collector, state, matcher)
+                exporter.submit_rows(snapshot.created_at, sorted(rows.values()))
+                ticks += 1
+                if args.count <= 0 or ticks < args.count:
+                    time.sleep(max(args.interval - (time.monotonic() - started), 0.0))
+        finally:
+            result = exporter.close(wait=True)
+    if result.error:
+        print(result.error, file=sys.stderr)
+        return 2
+    print(f"已导出到 {result.path}: {describe_export(result)}", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="process_cli", description="进程管理命令行工具")
+    parser.add_argument("--backend", choices=sorted(PLATFORM_BACKENDS), help="进程枚举后端(默认按平台选择)")
+    parser.add_argument("--state", help="界面程序的状态文件，读取其中的隐藏进程和自动规则(默认 ProcessManager.json)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    snapshot = commands.add_parser("snapshot", help="输出一次进程快照")
+    snapshot.add_argument("--json", action="store_true", help="以 NDJSON 输出(每行一个进程)")
+    snapshot.add_argument("--match", help="只输出进程名或窗口标题匹配该正则的进程")
+    snapshot.add_argument("--sample", type=float, default=0.0,
+                          help="先采样指定秒数以计算CPU使用率和读写速率(默认0，不计算)")
+    snapshot.set_defaults(handler=command_snapshot)
+
+    watch = commands.add_parser("watch", help="持续以 NDJSON 输出进程变化")
+    watch.add_argument("--interval", type=float, default=2.0, help="采集间隔秒数(默认2)")
+    watch.add_argument("--count", type=int, default=0, help="采集次数，0表示一直运行")
+    watch.add_argument("--match", help="只关注进程名或窗口标题匹配该正则的进程")
+    watch.set_defaults(handler=command_watch)
+
+    kill = commands.add_parser("kill", help="结束匹配的进程")
+    kill.add_argument("--match", required=True, help="进程名或窗口标题匹配的正则(忽略大小写)")
+    kill.add_argument("--force", action="store_true", help="直接强制结束")
+    kill.add_argument("--timeout", type=float, default=3.0, help="等待退出的秒数，超时后强制结束(默认3)")
+    kill.add_argument("--dry-run", action="store_true", help="只列出匹配的进程，不结束")
+    kill.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    kill.set_defaults(handler=command_kill)
+
+    record = commands.add_parser("record", help="把快照录制到文件")
+    record.add_argument("output", help="录制文件路径(*.pmrec)，已存在时追加")
+    record.add_argument("--interval", type=float, default=2.0, help="采集间隔秒数(默认2)")
+    record.add_argument("--count", type=int, default=0, help="采集次数，0表示一直运行")
+    record.set_defaults(handler=command_record)
+
+    agent = commands.add_parser("agent", help="作为采集代理运行，向界面程序发送进程快照")
+    agent.add_argument("--listen", default="127.0.0.1:7711",
+                       help="监听地址: 主机:端口 或 unix:路径(默认 127.0.0.1:7711)")
+    agent.add_argument("--interval", type=float, default=1.0, help="采集间隔秒数(默认1)")
+    agent.add_argument("--count", type=int, default=0, help="采集次数，0表示一直运行")
+    agent.add_argument("--name", help="显示在界面中的主机名(默认为本机主机名)")
+    agent.set_defaults(handler=command_agent)
+
+    export = commands.add_parser("export", help="把快照导出为 CSV/JSON Lines/Parquet")
+    export.add_argument("output", help="输出文件，格式由扩展名决定(.csv/.jsonl/.parquet)")
+    export.add_argument("--from", dest="source", help="导出录制文件(*.pmrec)的所有帧，而不是实时采集")
+    export.add_argument("--interval", type=float, default=2.0, help="采集间隔秒数(默认2)")
+    export.add_argument("--count", type=int, default=1,
+                        help="采集次数，0表示一直运行(默认1；第一次采集的CPU使用率和读写速率为0)")
+    export.add_argument("--match", help="只导出进程名或窗口标题匹配该正则的进程")
+    export.set_defaults(handler=command_export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except re.error as e:
+        print(f"正则表达式错误: {e}", file=sys.stderr)
+        return 2
+    except (ValueError, ImportError) as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    except (KeyboardInterrupt, BrokenPipeError):
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,811 @@
+"""进程采集层: 不依赖 PyQt5 和 pypinyin，界面程序和命令行工具共用"""
+import ctypes
+import ctypes.util
+import json
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+import psutil
+
+# Windows API常量
+PROCESS_ALL_ACCESS = 0x1F0FFF
+SW_HIDE = 0
+SW_SHOWNORMAL = 1
+
+
+class Win32WindowProvider:
+    """基于 EnumWindows 的窗口枚举后端"""
+
+    def __init__(self):
+        self.user32 = ctypes.windll.user32
+        self.enum_proc_type = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_int, ctypes.POINTER(ctypes.c_int))
+
+    def enum_windows(self):
+        """一次枚举所有顶层窗口，返回 (hwnd, pid, 标题) 列表"""
+        user32 = self.user32
+        windows = []
+        window_pid = ctypes.c_ulong()
+        buff = ctypes.create_unicode_buffer(256)
+
+        def callback(hwnd, lparam):
+            nonlocal buff
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(window_pid))
+            title = ""
+            length = user32.GetWindowTextLengthW(hwnd)
+            if length > 0:
+                if length + 1 > len(buff):
+                    buff = ctypes.create_unicode_buffer(length + 1)
+                user32.GetWindowTextW(hwnd, buff, length + 1)
+                title = buff.value
+            windows.append((hwnd, window_pid.value, title))
+            return True
+
+        # 回调对象在枚举期间必须保持引用
+        enum_proc = self.enum_proc_type(callback)
+        user32.EnumWindows(enum_proc, 0)
+        return windows
+
+    def show_window(self, hwnd, show):
+        """显示或隐藏窗口"""
+        self.user32.ShowWindow(hwnd, SW_SHOWNORMAL if show else SW_HIDE)
+
+
+class StaticWindowProvider:
+    """固定窗口列表的枚举后端，用于非Windows平台调试和基准测试"""
+
+    def __init__(self, windows=None):
+        self.windows = list(windows or [])
+
+    def enum_windows(self):
+        return list(self.windows)
+
+    def show_window(self, hwnd, show):
+        pass
+
+
+class X11WindowProvider:
+    """基于 EWMH (_NET_CLIENT_LIST / _NET_WM_PID) 的 X11 窗口枚举后端
+
+    只能列出窗口管理器登记的顶层窗口，没有设置 _NET_WM_PID 的窗口无法对应到进程。
+    """
+
+    def __init__(self, display_name=None):
+        path = ctypes.util.find_library('X11')
+        if path is None:
+            raise OSError("未找到 libX11")
+        x11 = ctypes.cdll.LoadLibrary(path)
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        x11.XInternAtom.restype = ctypes.c_ulong
+        x11.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+        x11.XGetWindowProperty.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_long, ctypes.c_long, ctypes.c_int,
+            ctypes.c_ulong, ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_int),
+            ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_void_p)]
+        x11.XFree.argtypes = [ctypes.c_void_p]
+        x11.XMapWindow.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        x11.XUnmapWindow.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        x11.XFlush.argtypes = [ctypes.c_void_p]
+        # 采集线程枚举窗口，界面线程显示/隐藏窗口
+        x11.XInitThreads()
+        # 窗口可能在枚举过程中关闭，默认的错误处理函数会直接退出进程
+        self.error_handler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)(lambda display, event: 0)
+        x11.XSetErrorHandler(self.error_handler)
+        self.display = x11.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise OSError("无法连接X服务器")
+        self.x11 = x11
+        self.root = x11.XDefaultRootWindow(self.display)
+        atom = lambda name: x11.XInternAtom(self.display, name, False)
+        self.client_list_atom = atom(b"_NET_CLIENT_LIST")
+        self.pid_atom = atom(b"_NET_WM_PID")
+        self.name_atom = atom(b"_NET_WM_NAME")
+        self.utf8_atom = atom(b"UTF8_STRING")
+        self.wm_name_atom = 39  # XA_WM_NAME
+
+    def get_property(self, window, atom, max_length=1 << 16):
+        """读取窗口属性，返回 (格式, 元素个数, 字节内容)，属性不存在时返回 None"""
+        actual_type, actual_format = ctypes.c_ulong(), ctypes.c_int()
+        count, remaining, data = ctypes.c_ulong(), ctypes.c_ulong(), ctypes.c_void_p()
+        status = self.x11.XGetWindowProperty(self.display, window, atom, 0, max_length, False, 0,
+                                             ctypes.byref(actual_type), ctypes.byref(actual_format),
+                                             ctypes.byref(count), ctypes.byref(remaining), ctypes.byref(data))
+        if status != 0 or not data.value:
+            return None
+        try:
+            # 格式为32的属性在客户端以 long 数组保存
+            item_size = ctypes.sizeof(ctypes.c_long) if actual_format.value == 32 else actual_format.value // 8
+            return actual_format.value, count.value, ctypes.string_at(data.value, count.value * item_size)
+        finally:
+            self.x11.XFree(data)
+
+    def enum_windows(self):
+        """一次枚举所有顶层窗口，返回 (窗口ID, pid, 标题) 列表"""
+        prop = self.get_property(self.root, self.client_list_atom)
+        if prop is None:
+            return []
+        windows = []
+        for window in (ctypes.c_ulong * prop[1]).from_buffer_copy(prop[2]):
+            pid_prop = self.get_property(window, self.pid_atom)
+            if pid_prop is None or pid_prop[1] == 0:
+                continue
+            pid = ctypes.c_ulong.from_buffer_copy(pid_prop[2]).value
+            name_prop = self.get_property(window, self.name_atom) or self.get_property(window, self.wm_name_atom)
+            title = name_prop[2].decode('utf-8', 'replace') if name_prop else ""
+            windows.append((window, pid, title))
+        return windows
+
+    def show_window(self, hwnd, show):
+        """显示或隐藏窗口"""
+        if show:
+            self.x11.XMapWindow(self.display, hwnd)
+        else:
+            self.x11.XUnmapWindow(self.display, hwnd)
+        self.x11.XFlush(self.display)
+
+
+def create_window_provider():
+    """根据当前平台选择窗口枚举后端"""
+    if sys.platform == "win32":
+        return Win32WindowProvider()
+    if os.environ.get("DISPLAY"):
+        try:
+            return X11WindowProvider()
+        except OSError:
+            pass
+    return StaticWindowProvider()
+
+
+class PsutilBackend:
+    """平台后端: 进程枚举、窗口枚举和显示/隐藏、挂起/恢复、管理员权限
+
+    通用实现用 psutil 枚举进程和挂起/恢复，窗口操作交给 window_provider。
+    """
+
+    name = "psutil"
+
+    def __init__(self, window_provider=None):
+        self.window_provider = window_provider or create_window_provider()
+
+    def iter_process_info(self, attrs):
+        """枚举系统进程，每个进程返回与 psutil 的 proc.info 相同键的字典"""
+        for proc in psutil.process_iter(attrs):
+            yield proc.info
+
+    def suspend(self, proc):
+        proc.suspend()
+
+    def resume(self, proc):
+        proc.resume()
+
+    def is_admin(self):
+        geteuid = getattr(os, 'geteuid', None)
+        return geteuid is not None and geteuid() == 0
+
+    def request_admin(self):
+        """请求以管理员权限重新运行，返回 True 表示已启动新进程、当前进程应退出"""
+        return False
+
+
+class Win32Backend(PsutilBackend):
+    """Windows 后端: EnumWindows 枚举窗口，通过 UAC 请求管理员权限"""
+
+    name = "win32"
+
+    def is_admin(self):
+        try:
+            return bool(ctypes.windll.shell32.IsUserAnAdmin())
+        except Exception:
+            return False
+
+    def request_admin(self):
+        ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, " ".join(sys.argv), None, 1)
+        return True
+
+
+# /proc 读取器返回的资源计数，字段名与 psutil 对应的结果相同
+ProcCpuTimes = namedtuple('ProcCpuTimes', ['user', 'system'])
+ProcMemoryInfo = namedtuple('ProcMemoryInfo', ['rss'])
+ProcIoCounters = namedtuple('ProcIoCounters', ['read_bytes', 'write_bytes'])
+
+
+class LinuxProcBackend(PsutilBackend):
+    """Linux 后端: 一次 os.scandir 遍历 /proc，直接读取每个进程的 stat
+
+    psutil.process_iter 对每个属性分别打开并解析 /proc 下的文件(stat、statm、status、io 等)。
+    这里每个进程只读一次 stat(其中已包含 comm、ppid、CPU时间、线程数、启动时间和 RSS，
+    与 statm 的 RSS 相同)，用 fstat 取得属主UID，只有可能有权限时才读取 io，
+    并复用同一块读缓冲区。创建时间的算法与 psutil 相同，进程键与 psutil 的结果一致。
+    """
+
+    name = "linux-proc"
+    SUPPORTED_ATTRS = frozenset(['pid', 'ppid', 'name', 'create_time', 'username', 'cpu_times', 'memory_info',
+                                 'num_threads', 'io_counters', 'exe'])
+
+    def __init__(self, window_provider=None, proc_path="/proc"):
+        super().__init__(window_provider)
+        self.proc_path = proc_path
+        self.proc_fd = os.open(proc_path, os.O_RDONLY | os.O_DIRECTORY)
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.boot_time = psutil.boot_time()
+        self.euid = os.geteuid()
+        self.usernames = {}  # uid -> 用户名
+        self.buffers = [bytearray(4096)]
+
+    def username_of(self, uid):
+        username = self.usernames.get(uid)
+        if username is None:
+            # 与 psutil 相同: 没有对应用户时显示UID
+            import pwd
+            try:
+                username = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                username = str(uid)
+            self.usernames[uid] = username
+        return username
+
+    def read(self, path, want_uid=False):
+        """读取 /proc 下的小文件到复用的缓冲区，返回 (内容, 属主UID)"""
+        fd = os.open(path, os.O_RDONLY, dir_fd=self.proc_fd)
+        try:
+            size = os.readv(fd, self.buffers)
+            uid = os.fstat(fd).st_uid if want_uid else None
+        finally:
+            os.close(fd)
+        return bytes(memoryview(self.buffers[0])[:size]), uid
+
+    def iter_process_info(self, attrs):
+        if not self.SUPPORTED_ATTRS.issuperset(attrs):
+            yield from super().iter_process_info(attrs)
+            return
+        want_user = 'username' in attrs
+        want_io = 'io_counters' in attrs
+        want_exe = 'exe' in attrs
+        read = self.read
+        clock_ticks = self.clock_ticks
+        page_size = self.page_size
+        boot_time = self.boot_time
+        euid = self.euid
+        for entry in os.scandir(self.proc_path):
+            name = entry.name
+            if not name.isdigit():
+                continue
+            try:
+                data, uid = read(name + "/stat", want_user)
+            except OSError:
+                # 进程已退出
+                continue
+            # comm 可能包含空格和括号，以最后一个右括号为界
+            close = data.rfind(b')')
+            comm = os.fsdecode(data[data.find(b'(') + 1:close])
+            fields = data[close + 2:].split()
+            if len(comm) >= 15:
+                # comm 最多15个字符，与 psutil 相同改用命令行中的可执行文件名
+                try:
+                    cmdline = read(name + "/cmdline")[0].split(b'\0', 1)[0]
+                    full_name = os.path.basename(os.fsdecode(cmdline))
+                    if full_name.startswith(comm):
+                        comm = full_name
+                except OSError:
+                    pass
+
+            info = {
+                'pid': int(name),
+                'ppid': int(fields[1]),
+                'name': comm,
+                'create_time': int(fields[19]) / clock_ticks + boot_time,
+                'cpu_times': ProcCpuTimes(int(fields[11]) / clock_ticks, int(fields[12]) / clock_ticks),
+                'memory_info': ProcMemoryInfo(int(fields[21]) * page_size),
+                'num_threads': int(fields[17]),
+                'username': self.username_of(uid) if want_user else None,
+                'io_counters': None,
+            }
+            # 其他用户进程的 io 只有 root 可读，不去尝试
+            if want_io and (euid == 0 or uid == euid or not want_user):
+                try:
+                    io_fields = read(name + "/io")[0].split()
+                    info['io_counters'] = ProcIoCounters(int(io_fields[9]), int(io_fields[11]))
+                except (OSError, IndexError, ValueError):
+                    pass
+            if want_exe:
+                try:
+                    exe = os.readlink(name + "/exe", dir_fd=self.proc_fd)
+                    info['exe'] = exe[:-10] if exe.endswith(" (deleted)") else exe
+                except FileNotFoundError:
+                    # 内核线程没有可执行文件
+                    info['exe'] = ""
+                except OSError:
+                    info['exe'] = None
+            yield info
+
+
+PLATFORM_BACKENDS = {'psutil': PsutilBackend, 'win32': Win32Backend, 'linux-proc': LinuxProcBackend}
+
+
+def create_platform_backend(window_provider=None, name=None):
+    """按名称或当前平台选择平台后端"""
+    if name is None:
+        if sys.platform == "win32":
+            name = 'win32'
+        elif sys.platform.startswith("linux") and os.path.isdir("/proc"):
+            name = 'linux-proc'
+        else:
+            name = 'psutil'
+    return PLATFORM_BACKENDS[name](window_provider)
+
+
+class WindowTitleIndex:
+    """窗口标题索引: 每次刷新只枚举一次窗口，建立 pid -> 标题列表 的映射"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.titles_by_pid = {}
+
+    def rebuild(self):
+        """重新枚举窗口并重建索引"""
+        index = {}
+        for hwnd, pid, title in self.provider.enum_windows():
+            if title:
+                titles = index.get(pid)
+                if titles is None:
+                    index[pid] = [title]
+                else:
+                    titles.append(title)
+        self.titles_by_pid = index
+        return index
+
+    def get(self, pid):
+        """查询进程的窗口标题(不触发枚举)"""
+        return self.titles_by_pid.get(pid, [])
+
+    def windows_of(self, pid):
+        """重新枚举并返回属于该进程的所有窗口句柄(包括无标题窗口)"""
+        return [hwnd for hwnd, window_pid, title in self.provider.enum_windows() if window_pid == pid]
+
+
+# 进程详情中按需采集并缓存的字段(工作目录在启动后通常不变，同样缓存)
+DETAIL_FIELDS = ('exe', 'cmdline', 'username', 'cwd')
+
+
+# 进程表格中的一行，以 (pid, create_time) 作为唯一键，避免PID复用时误认为同一进程
+# user 及之后的资源字段随快照更新，不参与行是否变化的判断；host 为远程主机名，本机进程为空
+ProcessRow = namedtuple('ProcessRow', ['pid', 'create_time', 'name', 'title', 'hidden', 'user', 'cpu', 'rss',
+                                       'threads', 'read_rate', 'write_rate', 'ppid', 'host'],
+                        defaults=("", 0.0, 0, 0, 0.0, 0.0, 0, ""))
+
+
+def row_key(row):
+    """进程键: 本机进程为 (pid, create_time)，远程主机的进程再加上主机名"""
+    return (row.pid, row.create_time, row.host) if row.host else (row.pid, row.create_time)
+
+
+def format_bytes(size):
+    """把字节数格式化为 B/KB/MB/GB"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+RULE_FIELDS = {'name': "进程名", 'path': "路径", 'user': "用户", 'title': "窗口标题"}
+RULE_ACTIONS = {'hide': "隐藏", 'suspend': "挂起", 'kill': "结束"}
+
+# 自动操作规则: field 为匹配的字段，regex 为 False 时按忽略大小写的完全相等匹配
+ProcessRule = namedtuple('ProcessRule', ['field', 'pattern', 'action', 'regex', 'enabled'],
+                         defaults=(False, True))
+
+
+def rule_from_dict(data):
+    """从保存的字典恢复规则，字段或操作无效时抛出 ValueError"""
+    rule = ProcessRule(data['field'], str(data['pattern']), data['action'],
+                       bool(data.get('regex', False)), bool(data.get('enabled', True)))
+    if rule.field not in RULE_FIELDS or rule.action not in RULE_ACTIONS or not rule.pattern:
+        raise ValueError(f"无效的规则: {data}")
+    if rule.regex:
+        re.compile(rule.pattern)
+    return rule
+
+
+def describe_rule(rule):
+    """规则的显示文本，如 "隐藏: 进程名 = notepad.exe" """
+    operator_text = "匹配" if rule.regex else "="
+    return f"{RULE_ACTIONS[rule.action]}: {RULE_FIELDS[rule.field]} {operator_text} {rule.pattern}"
+
+
+# 资源监控规则: 指标 -> (显示名称, 阈值是否按字节显示)；*_growth 为每分钟的增长量
+WATCH_METRICS = {
+    'cpu': ("CPU %", False),
+    'rss': ("内存", True),
+    'threads': ("线程数", False),
+    'read_rate': ("读取/秒", True),
+    'write_rate': ("写入/秒", True),
+    'rss_growth': ("内存增长/分钟", True),
+    'threads_growth': ("线程数增长/分钟", False),
+}
+WATCH_OPERATORS = ('>', '<')
+WATCH_UNITS = {'seconds': "秒", 'samples': "次采样"}
+WATCH_ACTIONS = {'notify': "提醒", 'hide': "隐藏", 'suspend': "挂起", 'kill': "结束"}
+
+# 资源监控规则: 指标 op 阈值 持续 duration 秒(或连续 duration 次采样)后执行 action
+WatchRule = namedtuple('WatchRule', ['metric', 'op', 'threshold', 'duration', 'unit', 'action', 'enabled'],
+                       defaults=('seconds', 'notify', True))
+
+
+def watch_rule_from_dict(data):
+    """从保存的字典恢复资源监控规则，字段无效时抛出 ValueError"""
+    rule = WatchRule(data['metric'], data['op'], float(data['threshold']), float(data.get('duration', 0)),
+                     data.get('unit', 'seconds'), data.get('action', 'notify'), bool(data.get('enabled', True)))
+    if (rule.metric not in WATCH_METRICS or rule.op not in WATCH_OPERATORS or rule.unit not in WATCH_UNITS
+            or rule.action not in WATCH_ACTIONS or rule.duration < 0):
+        raise ValueError(f"无效的监控规则: {data}")
+    return rule
+
+
+def describe_watch_rule(rule):
+    """监控规则的显示文本，如 "结束: 内存 > 2.0 GB 持续60秒" """
+    label, is_size = WATCH_METRICS[rule.metric]
+    threshold = format_bytes(rule.threshold) if is_size else f"{rule.threshold:g}"
+    return (f"{WATCH_ACTIONS[rule.action]}: {label} {rule.op} {threshold} "
+            f"持续{rule.duration:g}{WATCH_UNITS[rule.unit]}")
+
+
+def default_state_path():
+    """自动规则和隐藏/挂起状态默认保存在程序所在目录"""
+    return os.path.join(os.path.dirname(os.path.abspath(sys.argv[0] or __file__)), "ProcessManager.json")
+
+
+def load_state(path):
+    """读取保存的规则、隐藏/挂起进程、采集代理地址和资源监控规则
+
+    返回 (规则列表, 隐藏进程键集合, 挂起进程键集合, 代理地址列表, 监控规则列表, 错误信息列表)，
+    进程键为 (pid, create_time)。
+    """
+    rules, watch_rules, errors = [], [], []
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return rules, set(), set(), [], watch_rules, errors
+    except (OSError, ValueError) as e:
+        return rules, set(), set(), [], watch_rules, [f"读取状态文件失败: {str(e)}"]
+
+    for item in data.get('rules', ()):
+        try:
+            rules.append(rule_from_dict(item))
+        except (KeyError, TypeError, ValueError, re.error) as e:
+            errors.append(f"忽略无效的规则 {item}: {str(e)}")
+    hidden = {(int(pid), float(create_time)) for pid, create_time in data.get('hidden', ())}
+    suspended = {(int(pid), float(create_time)) for pid, create_time in data.get('suspended', ())}
+    agents = [str(address) for address in data.get('agents', ())]
+    for item in data.get('watch_rules', ()):
+        try:
+            watch_rules.append(watch_rule_from_dict(item))
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append(f"忽略无效的监控规则 {item}: {str(e)}")
+    return rules, hidden, suspended, agents, watch_rules, errors
+
+
+def save_state(path, rules, hidden_keys, suspended_keys, agents=(), watch_rules=()):
+    """保存规则、隐藏/挂起进程、采集代理地址和资源监控规则(先写临时文件再替换，避免写到一半损坏)"""
+    data = {
+        'rules': [rule._asdict() for rule in rules],
+        'hidden': sorted(hidden_keys),
+        'suspended': sorted(suspended_keys),
+        'agents': list(agents),
+        'watch_rules': [rule._asdict() for rule in watch_rules],
+    }
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, path)
+
+
+class RuleSet:
+    """编译后的规则集合
+
+    完全相等的规则按字段放入 小写值 -> 操作集合 的哈希表；正则规则按字段合并为一个
+    组合正则，只有组合正则命中的进程才逐条检查该字段的正则规则。
+    因此每个快照的匹配开销与进程数成正比，基本不随规则数增长。
+    """
+
+    def __init__(self, rules=()):
+        self.rules = tuple(rule for rule in rules if rule.enabled)
+        self.exact = {}      # 字段 -> {小写值: frozenset(操作)}
+        self.patterns = {}   # 字段 -> [(正则, 操作)]
+        self.combined = {}   # 字段 -> 组合正则(合并失败时为 None，逐条检查)
+        for rule in self.rules:
+            if rule.regex:
+                self.patterns.setdefault(rule.field, []).append(
+                    (re.compile(rule.pattern, re.IGNORECASE), rule.action))
+            else:
+                bucket = self.exact.setdefault(rule.field, {})
+                value = rule.pattern.lower()
+                bucket[value] = bucket.get(value, frozenset()) | {rule.action}
+        for field, patterns in self.patterns.items():
+            try:
+                self.combined[field] = re.compile(
+                    "|".join(f"(?:{regex.pattern})" for regex, _ in patterns), re.IGNORECASE)
+            except re.error:
+                self.combined[field] = None
+        self.fields = tuple(RULE_FIELDS.keys() & (self.exact.keys() | self.patterns.keys()))
+        self.uses_path = 'path' in self.fields
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match(self, values):
+        """values 为 字段 -> 文本，返回命中的操作集合(未命中时为空集合)"""
+        actions = frozenset()
+        for field in self.fields:
+            value = values.get(field)
+            if not value:
+                continue
+            bucket = self.exact.get(field)
+            if bucket:
+                hit = bucket.get(value.lower())
+                if hit:
+                    actions |= hit
+            patterns = self.patterns.get(field)
+            if patterns:
+                combined = self.combined[field]
+                if combined is not None and combined.search(value) is None:
+                    continue
+                for regex, action in patterns:
+                    if action not in actions and regex.search(value):
+                        actions |= {action}
+        return actions
+
+
+# 一次采集的不可变快照: rows 为只读的 (pid, create_time) -> ProcessRow 映射
+# rule_matches 为 (pid, create_time) -> 命中的规则操作集合，rule_time 为规则匹配总耗时
+ProcessSnapshot = namedtuple('ProcessSnapshot', ['rows', 'created_at', 'scan_time', 'window_time', 'cpu_time', 'errors',
+                                                 'rule_matches', 'rule_time'],
+                             defaults=(MappingProxyType({}), 0.0))
+
+
+class ProcessCollector:
+    """进程快照采集器: 不依赖界面，可在后台线程中运行"""
+
+    # 一次 process_iter 批量获取的属性(psutil 内部对每个进程使用 oneshot)
+    PROCESS_ATTRS = ['pid', 'ppid', 'name', 'create_time', 'username', 'cpu_times', 'memory_info',
+                     'num_threads', 'io_counters']
+
+    def __init__(self, window_provider=None, backend=None):
+        self.backend = backend or create_platform_backend(window_provider)
+        self.window_index = WindowTitleIndex(self.backend.window_provider)
+        # 上一次快照的累计计数: (pid, create_time) -> (CPU时间, 读取字节, 写入字节)
+        self.previous_counters = {}
+        self.previous_time = None
+
+    def iter_process_info(self, extra_attrs=()):
+        """枚举系统进程的基础信息和资源计数(由平台后端实现)"""
+        return self.backend.iter_process_info(self.PROCESS_ATTRS + list(extra_attrs))
+
+    def collect(self, hidden_keys, show_hidden, rules=None):
+        """采集一次进程快照
+
+        hidden_keys 为已隐藏进程的 (pid, create_time) 集合；rules 为 RuleSet，
+        命中的进程记录在快照的 rule_matches 中，由调用方执行相应操作。
+        """
+        errors = []
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+
+        # 整个刷新过程只枚举一次窗口
+        try:
+            self.window_index.rebuild()
+        except Exception as e:
+            self.window_index.titles_by_pid = {}
+            errors.append(f"枚举窗口失败: {str(e)}")
+        window_time = time.perf_counter() - start
+
+        titles_by_pid = self.window_index.titles_by_pid
+        rows = {}
+        # CPU使用率和读写速率由两次快照的累计计数之差计算，不需要等待采样
+        now = time.monotonic()
+        elapsed = now - self.previous_time if self.previous_time is not None else 0.0
+        previous_counters = self.previous_counters
+        counters = {}
+        rule_matches = {}
+        rule_time = 0.0
+        perf_counter = time.perf_counter
+        for info in self.iter_process_info(('exe',) if rules and rules.uses_path else ()):
+            pid = info['pid']
+            key = (pid, info.get('create_time') or 0.0)
+
+            cpu_times = info.get('cpu_times')
+            io_counters = info.get('io_counters')
+            cpu_total = cpu_times.user + cpu_times.system if cpu_times else None
+            read_bytes = io_counters.read_bytes if io_counters else None
+            write_bytes = io_counters.write_bytes if io_counters else None
+            counters[key] = (cpu_total, read_bytes, write_bytes)
+            cpu = read_rate = write_rate = 0.0
+            previous = previous_counters.get(key)
+            if previous is not None and elapsed > 0:
+                if cpu_total is not None and previous[0] is not None:
+                    cpu = max(cpu_total - previous[0], 0.0) / elapsed * 100
+                if read_bytes is not None and previous[1] is not None:
+                    read_rate = max(read_bytes - previous[1], 0) / elapsed
+                if write_bytes is not None and previous[2] is not None:
+                    write_rate = max(write_bytes - previous[2], 0) / elapsed
+
+            # 获取窗口标题
+            window_titles = titles_by_pid.get(pid)
+            title_info = ', '.join(window_titles) if window_titles else ""
+
+            if rules:
+                rule_start = perf_counter()
+                actions = rules.match({'name': info['name'], 'path': info.get('exe'),
+                                       'user': info.get('username'), 'title': title_info})
+                if actions:
+                    rule_matches[key] = actions
+                rule_time += perf_counter() - rule_start
+
+            # 检查进程是否被隐藏(按 pid 和创建时间，PID 被复用时不会误判)
+            is_hidden = key in hidden_keys
+
+            # 如果不显示隐藏进程且进程是隐藏状态，则跳过
+            if not show_hidden and is_hidden:
+                continue
+
+            mem_info = info.get('memory_info')
+            rows[key] = ProcessRow(pid, key[1], info['name'] or "", title_info, is_hidden,
+                                   info.get('username') or "", cpu, mem_info.rss if mem_info else 0,
+                                   info.get('num_threads') or 0, read_rate, write_rate, info.get('ppid') or 0)
+
+        self.previous_counters = counters
+        self.previous_time = now
+
+        return ProcessSnapshot(MappingProxyType(rows), time.time(), time.perf_counter() - start,
+                               window_time, time.thread_time() - cpu_start, tuple(errors),
+                               MappingProxyType(rule_matches), rule_time)
+
+    def collect_details(self, pid):
+        """采集单个进程在运行期间不变的详细信息(资源使用等随时间变化的字段取自快照)
+
+        没有权限读取的字段为 None，不影响其他字段；进程已退出时抛出 psutil.NoSuchProcess。
+        """
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            details = {'name': proc.name(), 'create_time': proc.create_time()}
+            for field in DETAIL_FIELDS:
+                try:
+                    value = getattr(proc, field)()
+                except psutil.AccessDenied:
+                    value = None
+                if field == 'cmdline' and value is not None:
+                    value = ' '.join(value)
+                details[field] = value
+            return details
+
+
+def terminate_process_tree(pid, timeout=3.0, max_workers=16):
+    """自底向上结束进程树: 同一层的进程并行结束，等待退出后再处理上一层
+
+    仍未退出的进程会被强制结束。返回 (已结束的进程列表, 失败信息列表)。
+    """
+    # 线程池只在结束进程时才需要，推迟导入以加快命令行工具启动
+    from concurrent.futures import ThreadPoolExecutor
+
+    root = psutil.Process(pid)
+    root_create_time = root.create_time()
+
+    # 一次遍历建立 ppid -> 子进程 索引
+    children = {}
+    for proc in psutil.process_iter(['ppid', 'create_time']):
+        if proc.info['create_time'] and proc.info['create_time'] >= root_create_time:
+            children.setdefault(proc.info['ppid'], []).append(proc)
+
+    levels = [[root]]
+    seen = {pid}
+    while True:
+        level = [child for proc in levels[-1] for child in children.get(proc.pid, ())
+                 if child.pid not in seen]
+        if not level:
+            break
+        seen.update(child.pid for child in level)
+        levels.append(level)
+
+    terminated = []
+    failures = []
+
+    def terminate(proc):
+        try:
+            proc.terminate()
+            return proc
+        except psutil.NoSuchProcess:
+            return None
+        except Exception as e:
+            failures.append(f"{proc.pid}: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for level in reversed(levels):
+            procs = [proc for proc in pool.map(terminate, level) if proc is not None]
+            gone, alive = psutil.wait_procs(procs, timeout=timeout)
+            for proc in alive:
+                try:
+                    proc.kill()
+                except psutil.NoSuchProcess:
+                    pass
+                except Exception as e:
+                    failures.append(f"{proc.pid}: {str(e)}")
+            terminated.extend(procs)
+    return terminated, failures
+
+
+BULK_ACTIONS = {'terminate': "结束", 'kill': "强制结束", 'suspend': "挂起", 'resume': "恢复"}
+
+# succeeded: 操作成功的PID; escalated: 超时未退出而被强制结束的PID;
+# gone: 操作前已退出(或PID已被复用)的PID; failures: (PID, 错误信息)
+BulkActionResult = namedtuple('BulkActionResult', ['action', 'succeeded', 'escalated', 'gone', 'failures',
+                                                   'elapsed'])
+
+
+def run_bulk_action(action, keys, timeout=3.0, max_workers=32, backend=None):
+    """对一批进程并行执行 terminate/kill/suspend/resume
+
+    keys 为 (pid, create_time) 列表，create_time 为空时不校验PID是否被复用。
+    指定 backend 时挂起/恢复由平台后端执行。
+    terminate 会用 psutil.wait_procs 等待所有进程退出，超时仍存活的进程改为强制结束，
+    因此整批的耗时约等于一次超时时间，而不是逐个等待。
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"未知的进程操作: {action}")
+    from concurrent.futures import ThreadPoolExecutor
+    start = time.perf_counter()
+    succeeded, escalated, gone, failures = [], [], [], []
+
+    def apply(key, method):
+        pid, create_time = key
+        try:
+            proc = psutil.Process(pid)
+            if create_time and abs(proc.create_time() - create_time) > 0.01:
+                raise psutil.NoSuchProcess(pid)
+            if backend is not None and method in ('suspend', 'resume'):
+                getattr(backend, method)(proc)
+            else:
+                getattr(proc, method)()
+            return proc
+        except psutil.NoSuchProcess:
+            gone.append(pid)
+        except Exception as e:
+            failures.append((pid, str(e)))
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as pool:
+        procs = [proc for proc in pool.map(lambda key: apply(key, action), keys) if proc is not None]
+        if action in ('terminate', 'kill'):
+            _, alive = psutil.wait_procs(procs, timeout=timeout)
+            if alive and action == 'terminate':
+                # 直接使用已有的 Process 对象: psutil 会校验进程身份，PID 被复用时不会误杀其他进程
+                def kill(proc):
+                    try:
+                        proc.kill()
+                        return proc
+                    except psutil.NoSuchProcess:
+                        pass  # 等待结束后刚好退出，仍算作成功
+                    except Exception as e:
+                        failures.append((proc.pid, str(e)))
+                    return None
+
+                killed = [proc for proc in pool.map(kill, alive) if proc is not None]
+                _, alive = psutil.wait_procs(killed, timeout=timeout)
+                escalated = [proc.pid for proc in killed]
+            for proc in alive:
+                failures.append((proc.pid, "超时后仍未退出"))
+            failed = {pid for pid, _ in failures}
+            succeeded = [proc.pid for proc in procs if proc.pid not in failed]
+        else:
+            succeeded = [proc.pid for proc in procs]
+    return BulkActionResult(action, succeeded, escalated, gone, failures, time.perf_counter() - start)
@@ -0,0 +1,258 @@
+"""快照导出: 把进程快照(单次或连续多次)流式写入 CSV、JSON Lines 或 Parquet 文件，不依赖 PyQt5
+
+每个快照作为一帧提交: 时间戳 + 与 ProcessRow 字段对齐的列(每列一个序列)。帧放入有界队列，
+由后台线程逐帧写出，因此内存占用不超过队列中的几帧，调用方(界面线程)也不会等待磁盘。
+队列已满时 submit(block=False) 丢弃该帧并计数，导出结束时在结果中报告。
+
+导出的列为 timestamp(采集时间，Unix 秒)加上 ProcessRow 的所有字段。
+Parquet 需要 pyarrow，每累计 chunk_rows 行写一个行组。
+"""
+import csv
+import json
+import operator
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from itertools import repeat
+
+from process_core import ProcessRow
+
+EXPORT_FORMATS = {'csv': "CSV", 'jsonl': "JSON Lines", 'parquet': "Parquet"}
+EXPORT_EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet'}
+EXPORT_COLUMNS = ('timestamp',) + ProcessRow._fields
+EXPORT_CHUNK_ROWS = 65536  # Parquet 每个行组的最少行数
+EXPORT_QUEUE_FRAMES = 8    # 等待写出的最多帧数
+
+# 导出结果: frames/rows 为已写出的帧数和行数，elapsed 为从开始到结束的总时间，
+# write_time 为其中实际写文件的时间(连续导出时大部分时间在等待下一次采集)，dropped 为队列已满时丢弃的帧数
+ExportResult = namedtuple('ExportResult', ['path', 'format', 'frames', 'rows', 'bytes_written', 'elapsed',
+                                           'write_time', 'dropped', 'error'])
+
+
+def export_format_of(path):
+    """按扩展名确定导出格式，不支持时抛出 ValueError"""
+    export_format = EXPORT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if export_format is None:
+        raise ValueError(f"不支持的导出格式: {path} (支持 .csv、.jsonl、.parquet)")
+    return export_format
+
+
+def gather(column, order):
+    """按 order 中的下标取出 column 的元素(在 C 层面完成，不逐个调用 Python 代码)"""
+    if not order:
+        return ()
+    if len(order) == 1:
+        return (column[order[0]],)
+    return operator.itemgetter(*order)(column)
+
+
+def rows_to_columns(rows):
+    """ProcessRow 序列 -> 按字段的列"""
+    rows = list(rows)
+    if not rows:
+        return tuple(() for _ in ProcessRow._fields)
+    return tuple(zip(*rows))
+
+
+def describe_export(result):
+    """导出结果的说明文本，包括写入吞吐量"""
+    write_time = max(result.write_time, 1e-6)
+    text = (f"{result.frames}帧 {result.rows}行, {result.bytes_written / 1048576:.1f} MB, 耗时{result.elapsed:.2f}秒, "
+            f"写入{result.write_time:.2f}秒 ({result.rows / write_time:,.0f}行/秒, "
+            f"{result.bytes_written / 1048576 / write_time:.1f} MB/秒)")
+    if result.dropped:
+        text += f", 写入跟不上而丢弃{result.dropped}帧"
+    return text
+
+
+class CsvExportWriter:
+    def __init__(self, path):
+        # 带 BOM 以便 Excel 正确识别中文
+        self.file = open(path, 'w', encoding='utf-8-sig', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, timestamp, columns):
+        self.writer.writerows(zip(repeat(timestamp), *columns))
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlExportWriter:
+    """每行一个 JSON 对象: 各列先整体转换为 JSON 文本(相同的字符串只编码一次)，再按模板拼成行"""
+
+    LINE_TEMPLATE = "{" + ",".join(f'"{column}":%s' for column in EXPORT_COLUMNS) + "}\n"
+    STRING_FIELDS = frozenset(('name', 'title', 'user', 'host'))
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    def write(self, timestamp, columns):
+        encode = self.encode
+        encoded = []
+        for field, values in zip(ProcessRow._fields, columns):
+            if field in self.STRING_FIELDS:
+                texts = {text: encode(text) for text in set(values)}
+                encoded.append(map(texts.__getitem__, values))
+            elif field == 'hidden':
+                encoded.append(map({False: 'false', True: 'true'}.__getitem__, values))
+            else:
+                encoded.append(map(repr, values))
+        template = self.LINE_TEMPLATE
+        self.file.writelines([template % row for row in zip(repeat(repr(timestamp)), *encoded)])
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetExportWriter:
+    """累计到 chunk_rows 行后写一个行组(需要 pyarrow)"""
+
+    def __init__(self, path, chunk_rows=EXPORT_CHUNK_ROWS):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("导出 Parquet 需要安装 pyarrow (pip install pyarrow)")
+        self.pa = pyarrow
+        types = {'timestamp': pyarrow.float64(), 'pid': pyarrow.int64(), 'create_time': pyarrow.float64(),
+                 'name': pyarrow.string(), 'title': pyarrow.string(), 'hidden': pyarrow.bool_(),
+                 'user': pyarrow.string(), 'cpu': pyarrow.float64(), 'rss': pyarrow.int64(),
+                 'threads': pyarrow.int64(), 'read_rate': pyarrow.float64(), 'write_rate': pyarrow.float64(),
+                 'ppid': pyarrow.int64(), 'host': pyarrow.string()}
+        self.schema = pyarrow.schema([(column, types[column]) for column in EXPORT_COLUMNS])
+        self.path = path
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.chunk_rows = chunk_rows
+        self.pending = []  # 尚未写出的 (时间戳, 列)
+        self.pending_rows = 0
+
+    def write(self, timestamp, columns):
+        self.pending.append((timestamp, columns))
+        self.pending_rows += len(columns[0])
+        if self.pending_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        arrays = [[timestamp for timestamp, columns in self.pending for _ in columns[0]]]
+        for index in range(len(ProcessRow._fields)):
+            arrays.append([value for _, columns in self.pending for value in columns[index]])
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(values, type=field.type) for values, field in zip(arrays, self.schema)],
+            schema=self.schema))
+        self.pending = []
+        self.pending_rows = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+EXPORT_WRITERS = {'csv': CsvExportWriter, 'jsonl': JsonlExportWriter, 'parquet': ParquetExportWriter}
+
+
+class SnapshotExporter:
+    """在后台线程中把提交的帧写入导出文件
+
+    文件在构造时打开(格式不支持、缺少 pyarrow 或无法创建文件时直接抛出异常)；
+    close() 写完队列中剩余的帧后关闭文件，完成后以 ExportResult 调用 on_finished(在后台线程中)。
+    """
+
+    def __init__(self, path, export_format=None, max_pending=EXPORT_QUEUE_FRAMES, on_finished=None):
+        self.path = path
+        self.format = export_format or export_format_of(path)
+        self.writer = EXPORT_WRITERS[self.format](path)
+        self.queue = queue.Queue(max_pending)
+        self.on_finished = on_finished
+        self.frames = 0
+        self.rows = 0
+        self.dropped = 0
+        self.write_time = 0.0
+        self.error = ""
+        self.started = time.perf_counter()
+        self.result = None
+        self.thread = threading.Thread(target=self.run, name=f"export {path}", daemon=True)
+        self.thread.start()
+
+    def submit(self, timestamp, columns, block=False):
+        """提交一帧(与 ProcessRow 字段对齐的列)，队列已满且 block 为 False 时丢弃并返回 False"""
+        if self.error:
+            return False
+        try:
+            self.queue.put((timestamp, columns), block=block)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def submit_rows(self, timestamp, rows, block=True):
+        """提交一帧 ProcessRow"""
+        return self.submit(timestamp, rows_to_columns(rows), block)
+
+    def close(self, wait=False):
+        """结束导出: 写完已提交的帧后关闭文件，wait 为 True 时等待完成并返回 ExportResult"""
+        self.queue.put(None)
+        if wait:
+            self.thread.join()
+            return self.result
+        return None
+
+    def run(self):
+        writer = self.writer
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error:
+                continue
+            timestamp, columns = item
+            start = time.perf_counter()
+            try:
+                writer.write(timestamp, columns)
+            except Exception as e:
+                self.error = f"写入导出文件失败: {str(e)}"
+                continue
+            finally:
+                self.write_time += time.perf_counter() - start
+            self.frames += 1
+            self.rows += len(columns[0])
+        start = time.perf_counter()
+        try:
+            writer.close()
+        except Exception as e:
+            self.error = self.error or f"写入导出文件失败: {str(e)}"
+        self.write_time += time.perf_counter() - start
+        try:
+            bytes_written = os.path.getsize(self.path)
+        except OSError:
+            bytes_written = 0
+        self.result = ExportResult(self.path, self.format, self.frames, self.rows, bytes_written,
+                                   time.perf_counter() - self.started, self.write_time, self.dropped, self.error)
+        if self.on_finished is not None:
+            self.on_finished(self.result)
+
+
+def export_recording(recording_path, path, export_format=None, stop_event=None):
+    """把录制文件(*.pmrec)的所有帧依次导出，逐帧解码，不把整个录制读入内存"""
+    from process_recording import SnapshotReplayer
+
+    replayer = SnapshotReplayer(recording_path)
+    try:
+        exporter = SnapshotExporter(path, export_format)
+        try:
+            while stop_event is None or not stop_event.is_set():
+                snapshot = replayer.next()
+                if snapshot is None:
+                    break
+                exporter.submit_rows(snapshot.created_at, snapshot.rows.values())
+        finally:
+            result = exporter.close(wait=True)
+    finally:
+        replayer.close()
+    return result
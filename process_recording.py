@@ -0,0 +1,355 @@
+"""快照录制与回放: 紧凑的二进制录制文件，不依赖 PyQt5
+
+录制文件 (*.pmrec) 由若干帧组成，每帧只保存相对上一帧的变化(新增或变化的行、结束的进程)。
+每隔 keyframe_interval 帧写一个关键帧，关键帧保存全部进程并重新开始字符串表，
+因此从任意关键帧开始都能独立解码。字符串(进程名、窗口标题、用户)在一段关键帧区间内
+只保存一次，行中只保存编号。每帧的内容用 zlib 压缩。
+
+帧头: 类型(1字节, K=关键帧 D=增量帧) + 时间戳(f64) + 压缩后长度(u32)
+帧内容: 新字符串数(u32) + [长度(u16) + UTF-8] ... + 结束进程数(u32) + [pid(u32) + 创建时间(f64)] ...
+        + 新增/变化行数(u32) + [ROW_STRUCT] ...
+
+时间索引 (*.pmrec.idx) 每帧一条固定长度记录: 时间戳(f64) + 帧偏移(u64) + 所属关键帧序号(u32)，
+回放时用 mmap 直接在索引上二分查找，不需要把录制文件读入内存。
+
+帧的编码和解码(SnapshotEncoder / SnapshotDecoder)也用于远程代理的网络传输(见 process_agent.py)。
+"""
+import mmap
+import os
+import struct
+import time
+import zlib
+from types import MappingProxyType
+
+from process_core import ProcessRow, ProcessSnapshot
+
+RECORDING_MAGIC = b"PMREC\x00\x01\x00"
+FRAME_HEADER = struct.Struct('<cdI')
+INDEX_ENTRY = struct.Struct('<dQI')
+# pid, create_time, ppid, 名称编号, 标题编号, 用户编号, 隐藏, CPU(0.1%), 线程数, 内存(KB), 读取/秒, 写入/秒
+ROW_STRUCT = struct.Struct('<IdIIIIBHIIff')
+KEY_STRUCT = struct.Struct('<Id')
+COUNT_STRUCT = struct.Struct('<I')
+STRING_LENGTH = struct.Struct('<H')
+KEYFRAME, DELTA = b'K', b'D'
+MAX_FRAME_SIZE = 64 * 1024 * 1024          # 一帧压缩后的最大字节数，超过视为数据损坏
+MAX_DECOMPRESSED_SIZE = 512 * 1024 * 1024  # 一帧解压后的最大字节数，防止压缩炸弹耗尽内存
+
+
+def index_path(path):
+    return path + ".idx"
+
+
+def decompress_frame(payload, max_length=MAX_DECOMPRESSED_SIZE):
+    """解压一帧，解压后超过 max_length 字节或数据不完整时抛出 ValueError"""
+    decompressor = zlib.decompressobj()
+    data = decompressor.decompress(payload, max_length)
+    if decompressor.unconsumed_tail:
+        raise ValueError(f"帧解压后超过 {max_length} 字节")
+    if not decompressor.eof:
+        raise ValueError("帧数据不完整")
+    return data
+
+
+class SnapshotEncoder:
+    """把快照编码为帧: 与上一帧相比只保存新增/变化的行和结束的进程
+
+    每隔 keyframe_interval 帧(为 None 时只有第一帧)编码一个关键帧；字符串表中的字符串
+    远多于仍在使用的字符串时(例如窗口标题频繁变化)，下一帧也改为关键帧以重建字符串表。
+    """
+
+    def __init__(self, keyframe_interval=60, compress_level=1):
+        self.keyframe_interval = keyframe_interval
+        self.compress_level = compress_level
+        self.strings = {}
+        self.previous = {}  # 进程键 -> 上一帧中该进程编码后的行
+        self.force_keyframe = True  # 第一帧总是关键帧
+        self.frames_since_keyframe = 0
+
+    def intern(self, text, new_strings):
+        string_id = self.strings.get(text)
+        if string_id is None:
+            string_id = self.strings[text] = len(self.strings)
+            new_strings.append(text)
+        return string_id
+
+    def encode(self, rows):
+        """编码一帧，返回 (帧类型, 压缩后的帧内容)"""
+        is_keyframe = self.force_keyframe or (self.keyframe_interval is not None
+                                              and self.frames_since_keyframe >= self.keyframe_interval)
+        if is_keyframe:
+            self.strings = {}
+            self.previous = {}
+            self.force_keyframe = False
+            self.frames_since_keyframe = 0
+
+        new_strings = []
+        current = {}
+        upserts = []
+        pack = ROW_STRUCT.pack
+        intern = self.intern
+        previous = self.previous
+        for key, row in rows.items():
+            # 数值先量化再比较，微小波动不会被当作变化
+            encoded = pack(row.pid, row.create_time, row.ppid, intern(row.name, new_strings),
+                           intern(row.title, new_strings), intern(row.user, new_strings), row.hidden,
+                           min(int(row.cpu * 10 + 0.5), 65535), min(row.threads, 0xFFFFFFFF),
+                           min(row.rss >> 10, 0xFFFFFFFF), row.read_rate, row.write_rate)
+            current[key] = encoded
+            if previous.get(key) != encoded:
+                upserts.append(encoded)
+        removed = [key[:2] for key in previous if key not in current]
+        self.previous = current
+        self.frames_since_keyframe += 1
+        if len(self.strings) > 4 * len(current) + 1024:
+            self.force_keyframe = True
+
+        parts = [COUNT_STRUCT.pack(len(new_strings))]
+        for text in new_strings:
+            data = text.encode('utf-8')[:0xFFFF]
+            parts.append(STRING_LENGTH.pack(len(data)))
+            parts.append(data)
+        parts.append(COUNT_STRUCT.pack(len(removed)))
+        parts.extend(KEY_STRUCT.pack(pid, create_time) for pid, create_time in removed)
+        parts.append(COUNT_STRUCT.pack(len(upserts)))
+        parts.extend(upserts)
+        return KEYFRAME if is_keyframe else DELTA, zlib.compress(b"".join(parts), self.compress_level)
+
+
+class SnapshotDecoder:
+    """按顺序应用帧，维护当前的进程行和字符串表
+
+    host 不为空时还原出的行属于该远程主机，进程键为 (pid, create_time, host)。
+    """
+
+    def __init__(self, host=""):
+        self.host = host
+        self.rows = {}
+        self.strings = []
+
+    def apply(self, kind, payload):
+        """应用一帧(payload 为压缩后的帧内容)"""
+        payload = decompress_frame(payload)
+        if kind == KEYFRAME:
+            self.rows = {}
+            self.strings = []
+
+        strings = self.strings
+        position = 0
+        (count,) = COUNT_STRUCT.unpack_from(payload, position)
+        position += COUNT_STRUCT.size
+        for _ in range(count):
+            (size,) = STRING_LENGTH.unpack_from(payload, position)
+            position += STRING_LENGTH.size
+            strings.append(payload[position:position + size].decode('utf-8', 'replace'))
+            position += size
+
+        rows = self.rows
+        host = self.host
+        (count,) = COUNT_STRUCT.unpack_from(payload, position)
+        position += COUNT_STRUCT.size
+        for key in KEY_STRUCT.iter_unpack(payload[position:position + count * KEY_STRUCT.size]):
+            rows.pop(key + (host,) if host else key, None)
+        position += count * KEY_STRUCT.size
+
+        (count,) = COUNT_STRUCT.unpack_from(payload, position)
+        position += COUNT_STRUCT.size
+        for (pid, create_time, ppid, name_id, title_id, user_id, hidden, cpu, threads, rss_kb,
+             read_rate, write_rate) in ROW_STRUCT.iter_unpack(payload[position:position + count * ROW_STRUCT.size]):
+            rows[(pid, create_time, host) if host else (pid, create_time)] = ProcessRow(
+                pid, create_time, strings[name_id], strings[title_id], bool(hidden), strings[user_id], cpu / 10,
+                rss_kb << 10, threads, read_rate, write_rate, ppid, host)
+
+
+class SnapshotRecorder:
+    """把采集到的快照逐帧追加到录制文件(只录制本机进程)"""
+
+    def __init__(self, path, keyframe_interval=60, compress_level=1):
+        self.path = path
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new_file:
+            # 上次录制可能在写入帧或索引的中途被中断，先截掉不完整的部分再追加
+            repair_recording(path)
+        self.data_file = open(path, 'ab')
+        if new_file:
+            self.data_file.write(RECORDING_MAGIC)
+        self.index_file = open(index_path(path), 'wb' if new_file else 'ab')
+        self.frames = os.path.getsize(index_path(path)) // INDEX_ENTRY.size
+        self.keyframe = self.frames
+        self.encoder = SnapshotEncoder(keyframe_interval, compress_level)
+        self.bytes_written = 0
+
+    def write(self, snapshot):
+        """追加一帧，返回写入的字节数"""
+        rows = snapshot.rows
+        if any(row.host for row in rows.values()):
+            rows = {key: row for key, row in rows.items() if not row.host}
+        kind, payload = self.encoder.encode(rows)
+        if kind == KEYFRAME:
+            self.keyframe = self.frames
+
+        offset = self.data_file.tell()
+        self.data_file.write(FRAME_HEADER.pack(kind, snapshot.created_at, len(payload)))
+        self.data_file.write(payload)
+        self.data_file.flush()
+        self.index_file.write(INDEX_ENTRY.pack(snapshot.created_at, offset, self.keyframe))
+        self.index_file.flush()
+
+        self.frames += 1
+        written = FRAME_HEADER.size + len(payload) + INDEX_ENTRY.size
+        self.bytes_written += written
+        return written
+
+    def close(self):
+        self.data_file.close()
+        self.index_file.close()
+
+
+class SnapshotReplayer:
+    """以 mmap 方式读取录制文件，按帧序号或时间定位并还原快照"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(RECORDING_MAGIC)) != RECORDING_MAGIC:
+                raise ValueError(f"不是有效的录制文件: {path}")
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if not os.path.exists(index_path(path)):
+            rebuild_index(path)
+        with open(index_path(path), 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        # 录制过程中被中断时，只使用完整写入的帧
+        self.frame_count = len(self.index) // INDEX_ENTRY.size
+        while self.frame_count and not self.frame_complete(self.frame_count - 1):
+            self.frame_count -= 1
+        # 当前解码位置: 帧序号，以及解码到该帧为止的完整状态
+        self.position = -1
+        self.decoder = SnapshotDecoder()
+
+    def __len__(self):
+        return self.frame_count
+
+    def close(self):
+        self.data.close()
+        if isinstance(self.index, mmap.mmap):
+            self.index.close()
+
+    def entry(self, frame):
+        return INDEX_ENTRY.unpack_from(self.index, frame * INDEX_ENTRY.size)
+
+    def time_at(self, frame):
+        return self.entry(frame)[0]
+
+    def frame_complete(self, frame):
+        offset = self.entry(frame)[1]
+        if offset + FRAME_HEADER.size > len(self.data):
+            return False
+        length = FRAME_HEADER.unpack_from(self.data, offset)[2]
+        return offset + FRAME_HEADER.size + length <= len(self.data)
+
+    def find(self, timestamp):
+        """时间戳不晚于 timestamp 的最后一帧(二分查找索引)，早于第一帧时返回 0"""
+        low, high = 0, self.frame_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.time_at(middle) <= timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return max(low - 1, 0)
+
+    def seek(self, frame):
+        """解码到第 frame 帧: 从所属关键帧(或当前位置)开始依次应用增量帧"""
+        frame = min(max(frame, 0), self.frame_count - 1)
+        keyframe = self.entry(frame)[2]
+        start = self.position + 1 if keyframe <= self.position <= frame else keyframe
+        for current in range(start, frame + 1):
+            self.decode(current)
+        self.position = frame
+        return self.snapshot()
+
+    def next(self):
+        """解码下一帧，已到末尾时返回 None"""
+        if self.position + 1 >= self.frame_count:
+            return None
+        return self.seek(self.position + 1)
+
+    def decode(self, frame):
+        offset = self.entry(frame)[1]
+        kind, _, length = FRAME_HEADER.unpack_from(self.data, offset)
+        start = offset + FRAME_HEADER.size
+        self.decoder.apply(kind, self.data[start:start + length])
+
+    def snapshot(self):
+        """当前位置的快照(与实时采集的快照结构相同)"""
+        return ProcessSnapshot(MappingProxyType(dict(self.decoder.rows)), self.time_at(self.position), 0.0, 0.0, 0.0, ())
+
+
+def rebuild_index(path):
+    """索引文件丢失时，顺序扫描录制文件的帧头重新生成索引(末尾不完整的帧不计入)"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as data_file, open(index_path(path), 'wb') as index_file:
+        data_file.seek(len(RECORDING_MAGIC))
+        frame = keyframe = 0
+        while True:
+            offset = data_file.tell()
+            header = data_file.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                break
+            kind, timestamp, length = FRAME_HEADER.unpack(header)
+            if offset + FRAME_HEADER.size + length > size:
+                break
+            if kind == KEYFRAME:
+                keyframe = frame
+            index_file.write(INDEX_ENTRY.pack(timestamp, offset, keyframe))
+            data_file.seek(length, os.SEEK_CUR)
+            frame += 1
+
+
+def repair_recording(path):
+    """修复被中断的录制: 索引丢失时重新生成；否则把索引截断为整数条记录，
+    去掉指向不完整帧的记录，并把录制文件截断到最后一个完整且已索引的帧之后。返回保留的帧数"""
+    if not os.path.exists(index_path(path)):
+        rebuild_index(path)
+    data_size = os.path.getsize(path)
+    with open(path, 'r+b') as data_file, open(index_path(path), 'r+b') as index_file:
+        frames = os.fstat(index_file.fileno()).st_size // INDEX_ENTRY.size
+        end = len(RECORDING_MAGIC)
+        while frames:
+            index_file.seek((frames - 1) * INDEX_ENTRY.size)
+            offset = INDEX_ENTRY.unpack(index_file.read(INDEX_ENTRY.size))[1]
+            data_file.seek(offset)
+            header = data_file.read(FRAME_HEADER.size)
+            if len(header) == FRAME_HEADER.size:
+                frame_end = offset + FRAME_HEADER.size + FRAME_HEADER.unpack(header)[2]
+                if frame_end <= data_size:
+                    end = frame_end
+                    break
+            frames -= 1
+        index_file.truncate(frames * INDEX_ENTRY.size)
+        data_file.truncate(end)
+    return frames
+
+
+class ReplayCollector:
+    """用录制文件代替实时采集: 每次 collect 返回当前回放位置的快照
+
+    不执行自动规则，避免按录制内容误操作当前系统中的进程。
+    """
+
+    def __init__(self, path, window_index=None):
+        self.replayer = SnapshotReplayer(path)
+        self.window_index = window_index
+        self.target = 0  # 下一次 collect 解码的帧(界面线程写入，采集线程读取)
+
+    def collect(self, hidden_keys, show_hidden, rules=None):
+        start = time.perf_counter()
+        snapshot = self.replayer.seek(self.target)
+        rows = snapshot.rows
+        if not show_hidden:
+            rows = MappingProxyType({key: row for key, row in rows.items() if not row.hidden})
+        return snapshot._replace(rows=rows, scan_time=time.perf_counter() - start)
+
+    def collect_details(self, pid):
+        raise RuntimeError("回放模式下无法查看进程详情")
@@ -0,0 +1,125 @@
+"""采集代理的传输协议: 帧的收发、长度和解压大小的上限、断开后重连"""
+import socket
+import threading
+import time
+import zlib
+from types import MappingProxyType
+
+import pytest
+
+from process_agent import HELLO, MAX_HELLO_SIZE, AgentConnection, AgentServer, pack_frame
+from process_core import ProcessRow, ProcessSnapshot
+from process_recording import (FRAME_HEADER, MAX_FRAME_SIZE, SnapshotDecoder, SnapshotEncoder,
+                               decompress_frame)
+
+
+def make_rows(step):
+    return {(pid, float(pid)): ProcessRow(pid, float(pid), f"p{pid}", "", False, "root", float(step), 4096 * pid)
+            for pid in range(step, step + 5)}
+
+
+class FakeCollector:
+    def __init__(self):
+        self.step = 0
+
+    def collect(self, hidden_keys, show_hidden, rules=None):
+        self.step += 1
+        return ProcessSnapshot(MappingProxyType(make_rows(self.step)), float(self.step), 0.0, 0.0, 0.0, ())
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def socket_pair():
+    server, client = socket.socketpair()
+    client.settimeout(5.0)
+    yield server, client
+    server.close()
+    client.close()
+
+
+def test_frames_round_trip(socket_pair):
+    server, client = socket_pair
+    connection = AgentConnection("127.0.0.1:1")
+    header = memoryview(bytearray(FRAME_HEADER.size))
+    encoder = SnapshotEncoder(keyframe_interval=None)
+    decoder = SnapshotDecoder("host1")
+    server.sendall(pack_frame(HELLO, 1.0, zlib.compress(b'{"name": "host1"}')))
+    kind, timestamp, payload = connection.read_frame(client, header)
+    assert (kind, timestamp) == (HELLO, 1.0)
+    assert decompress_frame(payload, MAX_HELLO_SIZE) == b'{"name": "host1"}'
+
+    for step in range(3):
+        kind, payload = encoder.encode(make_rows(step))
+        server.sendall(pack_frame(kind, 10.0 + step, payload))
+        kind, timestamp, received = connection.read_frame(client, header)
+        assert timestamp == 10.0 + step
+        decoder.apply(kind, received)
+        assert {key[:2]: row._replace(host="") for key, row in decoder.rows.items()} == make_rows(step)
+    assert connection.bytes_received > 0
+
+    # 连接关闭时返回空帧
+    server.close()
+    assert connection.read_frame(client, header) == (b'', 0.0, b'')
+
+
+def test_oversized_length_is_rejected(socket_pair):
+    server, client = socket_pair
+    server.sendall(FRAME_HEADER.pack(b'K', 0.0, MAX_FRAME_SIZE + 1))
+    with pytest.raises(ValueError):
+        AgentConnection("127.0.0.1:1").read_frame(client, memoryview(bytearray(FRAME_HEADER.size)))
+
+
+def test_zlib_bomb_is_rejected():
+    bomb = zlib.compress(b'\0' * (MAX_HELLO_SIZE * 64), 9)
+    assert len(bomb) < MAX_HELLO_SIZE
+    with pytest.raises(ValueError):
+        decompress_frame(bomb, MAX_HELLO_SIZE)
+    with pytest.raises(ValueError):
+        decompress_frame(zlib.compress(b'x' * 1000)[:-8])
+
+
+def serve_in_thread(address):
+    server = AgentServer(FakeCollector(), address, interval=0.05, name="host1")
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def stop_server(server, thread):
+    server.stop()
+    thread.join(5.0)
+    server.close()
+
+
+def test_reconnects_after_server_closes(tmp_path):
+    address = f"unix:{tmp_path / 'agent.sock'}"
+    server, thread = serve_in_thread(address)
+    connection = AgentConnection(address)
+    connection.RECONNECT_DELAYS = (0.05,)
+    connection.start()
+    try:
+        assert wait_until(lambda: connection.connected and connection.frames >= 2)
+        assert connection.label == "host1"
+        assert all(key[2] == "host1" for key in connection.rows)
+
+        stop_server(server, thread)
+        assert wait_until(lambda: not connection.connected)
+        assert not connection.rows
+
+        # 代理重新启动后自动重连，新连接从关键帧开始
+        server, thread = serve_in_thread(address)
+        frames = connection.frames
+        assert wait_until(lambda: connection.connected and connection.frames >= frames + 2)
+        assert len(connection.rows) == 5
+    finally:
+        connection.close()
+        connection.thread.join(5.0)
+        stop_server(server, thread)
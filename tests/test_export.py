@@ -0,0 +1,89 @@
+"""快照导出: CSV/JSON Lines 的内容、队列已满时丢帧计数和写入失败"""
+import csv
+import json
+import threading
+
+import pytest
+
+import process_export
+from process_core import ProcessRow
+from process_export import EXPORT_COLUMNS, SnapshotExporter, export_format_of, rows_to_columns
+
+ROWS = [
+    ProcessRow(10, 1700000000.25, "微信.exe", "文件传输助手", False, "alice", 12.5, 300 << 20, 42, 1024.0, 0.0, 1),
+    ProcessRow(11, 1700000001.5, "chrome.exe", 'say "hi", ok', True, "", 0.0, 0, 1, 0.0, 2048.5, 10),
+]
+
+
+def export(path, frames):
+    exporter = SnapshotExporter(str(path))
+    for timestamp, rows in frames:
+        assert exporter.submit_rows(timestamp, rows)
+    return exporter.close(wait=True)
+
+
+def test_csv_round_trip(tmp_path):
+    path = tmp_path / "out.csv"
+    result = export(path, [(100.0, ROWS), (101.5, ROWS[:1])])
+    assert (result.frames, result.rows, result.dropped, result.error) == (2, 3, 0, "")
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        lines = list(csv.reader(f))
+    assert tuple(lines[0]) == EXPORT_COLUMNS
+    expected = [(100.0,) + row for row in ROWS] + [(101.5,) + ROWS[0]]
+    assert lines[1:] == [[str(value) for value in row] for row in expected]
+
+
+def test_jsonl_round_trip(tmp_path):
+    path = tmp_path / "out.jsonl"
+    result = export(path, [(100.0, ROWS), (101.5, [])])
+    assert (result.frames, result.rows, result.error) == (2, 2, "")
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [tuple(record) for record in records] == [EXPORT_COLUMNS] * 2
+    assert records == [dict(zip(EXPORT_COLUMNS, (100.0,) + row)) for row in ROWS]
+    assert records[0]['name'] == "微信.exe" and records[1]['hidden'] is True and records[0]['hidden'] is False
+    # 中文不转义为 \uXXXX
+    assert "微信.exe" in path.read_text(encoding='utf-8')
+
+
+def test_full_queue_drops_frames(tmp_path, monkeypatch):
+    release = threading.Event()
+    original = process_export.CsvExportWriter.write
+
+    def slow_write(self, timestamp, columns):
+        release.wait(5.0)
+        original(self, timestamp, columns)
+
+    monkeypatch.setattr(process_export.CsvExportWriter, 'write', slow_write)
+    exporter = SnapshotExporter(str(tmp_path / "slow.csv"), max_pending=1)
+    columns = rows_to_columns(ROWS)
+    accepted = [exporter.submit(float(index), columns, block=False) for index in range(4)]
+    release.set()
+    result = exporter.close(wait=True)
+    assert not all(accepted)
+    assert result.dropped == exporter.dropped == accepted.count(False) >= 2
+    assert result.frames == accepted.count(True)
+    assert result.rows == result.frames * len(ROWS)
+
+
+def test_writer_error_is_reported(tmp_path, monkeypatch):
+    def failing_write(self, timestamp, columns):
+        raise OSError("磁盘已满")
+
+    monkeypatch.setattr(process_export.JsonlExportWriter, 'write', failing_write)
+    finished = []
+    exporter = SnapshotExporter(str(tmp_path / "fail.jsonl"), on_finished=finished.append)
+    exporter.submit_rows(1.0, ROWS)
+    result = exporter.close(wait=True)
+    assert "磁盘已满" in result.error
+    assert result.frames == 0
+    assert finished == [result]
+    # 出错后不再接受新的帧
+    assert exporter.submit_rows(2.0, ROWS) is False
+
+
+def test_export_format_of():
+    assert export_format_of("a.CSV") == 'csv'
+    assert export_format_of("a.ndjson") == 'jsonl'
+    with pytest.raises(ValueError):
+        export_format_of("a.xlsx")
@@ -0,0 +1,86 @@
+"""查询语法: 解析、引号、取反、各项之间的"与"关系和语法错误"""
+import pytest
+
+from ProcessManager_app import (QUERY_NUMBER_FIELDS, QUERY_TEXT_FIELDS, ProcessTableModel, QueryError, compile_query,
+                                parse_query, query_help_text)
+from process_core import ProcessRow
+
+ROWS = [
+    ProcessRow(10, 1.0, "chrome.exe", "Error report - Chrome", False, "svc_web", 35.0, 800 << 20),
+    ProcessRow(11, 2.0, "chrome.exe", "新标签页", False, "alice", 5.0, 200 << 20),
+    ProcessRow(12, 3.0, "helper.exe", "error log", False, "svc_web", 50.0, 100 << 20),
+    ProcessRow(2000, 4.0, "python.exe", "hello world", False, "root", 0.0, 2 << 30),
+]
+
+
+@pytest.fixture(scope="module")
+def model():
+    model = ProcessTableModel()
+    model.apply_diff(ROWS, [], [])
+    return model
+
+
+def matched_pids(model, text):
+    matches = compile_query(text)
+    return sorted(model.pids[row] for row in range(len(model.pids)) if matches(model, row))
+
+
+def test_parse_terms():
+    assert parse_query('Name:chrome -cpu>=20 !title:/err/i "two words"') == [
+        (False, 'name', ':', 'chrome'),
+        (True, 'cpu', '>=', '20'),
+        (True, 'title', ':', '/err/i'),
+        (False, None, None, '"two words"'),
+    ]
+    assert parse_query("   ") == []
+
+
+def test_quoted_value_keeps_spaces(model):
+    assert matched_pids(model, 'title:"hello world"') == [2000]
+    assert matched_pids(model, '"error report"') == [10]
+    assert matched_pids(model, 'title:hello world') == [2000]
+
+
+def test_terms_are_combined_with_and(model):
+    assert matched_pids(model, "name:chrome") == [10, 11]
+    assert matched_pids(model, "name:chrome cpu>20") == [10]
+    assert matched_pids(model, "user:svc cpu>20 rss>500M") == [10]
+    assert matched_pids(model, "name:chrome name:helper") == []
+
+
+def test_negation_applies_to_single_term(model):
+    assert matched_pids(model, "title:/error/i -name:helper") == [10]
+    assert matched_pids(model, "!name:chrome cpu<10") == [2000]
+    assert matched_pids(model, "name!=chrome.exe") == [12, 2000]
+
+
+def test_numbers_and_units(model):
+    assert matched_pids(model, "pid>1000") == [2000]
+    assert matched_pids(model, "rss>=2G") == [2000]
+    assert matched_pids(model, "cpu=50") == [12]
+    assert matched_pids(model, "rss<150m") == [12]
+
+
+def test_regex_runs_on_original_text(model):
+    assert matched_pids(model, "title:/^Error/") == [10]
+    assert matched_pids(model, "title:/^error/i") == [10, 12]
+    assert matched_pids(model, "title!=/error/i") == [11, 2000]
+
+
+@pytest.mark.parametrize("text", [
+    "color:red",          # 未知字段
+    "cpu>abc",            # 数值字段需要数值
+    "threads>5M",         # 只有内存和读写速率支持单位
+    "name>chrome",        # 文本字段不支持比较运算符
+    "title:/(/",          # 正则表达式错误
+    "title:/error/x",     # 不支持的正则标志
+])
+def test_invalid_query_raises(text):
+    with pytest.raises(QueryError):
+        compile_query(text)
+
+
+def test_help_lists_all_fields():
+    text = query_help_text()
+    for field in list(QUERY_TEXT_FIELDS) + list(QUERY_NUMBER_FIELDS):
+        assert field in text
@@ -0,0 +1,142 @@
+"""录制文件的编码/解码、定位、中断后的截断帧和追加录制"""
+import os
+
+import pytest
+
+from process_core import ProcessRow, ProcessSnapshot
+from process_recording import (DELTA, INDEX_ENTRY, KEYFRAME, SnapshotDecoder, SnapshotEncoder, SnapshotRecorder,
+                               SnapshotReplayer, decompress_frame, index_path, rebuild_index)
+
+
+def make_rows(step):
+    """第 step 帧的进程: 每帧结束一个进程、启动一个进程，其余进程的资源和标题随 step 变化"""
+    rows = {}
+    for pid in range(step, step + 20):
+        rows[(pid, 1000.0 + pid)] = ProcessRow(
+            pid, 1000.0 + pid, f"进程{pid % 7}.exe", f"窗口 {pid} - {step}" if pid % 3 == 0 else "",
+            pid % 5 == 0, "user", (pid + step) % 100 / 2, (pid * 3 + step) << 10, pid % 9 + 1,
+            1024.0 * step, 0.0, 1)
+    return rows
+
+
+def record(path, steps, keyframe_interval=3):
+    recorder = SnapshotRecorder(path, keyframe_interval=keyframe_interval)
+    try:
+        for step in steps:
+            recorder.write(ProcessSnapshot(make_rows(step), 100.0 + step, 0.0, 0.0, 0.0, ()))
+    finally:
+        recorder.close()
+
+
+def test_encode_decode_round_trip():
+    encoder = SnapshotEncoder(keyframe_interval=None)
+    decoder = SnapshotDecoder()
+    kinds = []
+    for step in range(5):
+        kind, payload = encoder.encode(make_rows(step))
+        kinds.append(kind)
+        decoder.apply(kind, payload)
+        assert decoder.rows == make_rows(step)
+    assert kinds == [KEYFRAME] + [DELTA] * 4
+
+
+def test_decoder_marks_remote_host():
+    kind, payload = SnapshotEncoder().encode(make_rows(0))
+    decoder = SnapshotDecoder("server1")
+    decoder.apply(kind, payload)
+    assert all(key[2] == "server1" and row.host == "server1" for key, row in decoder.rows.items())
+
+
+def test_decompress_frame_limits_size():
+    kind, payload = SnapshotEncoder().encode(make_rows(0))
+    with pytest.raises(ValueError):
+        decompress_frame(payload, 100)
+    with pytest.raises(ValueError):
+        decompress_frame(payload[:-4])
+
+
+def test_seek_from_keyframe_and_backwards(tmp_path):
+    path = str(tmp_path / "seek.pmrec")
+    record(path, range(10))
+    replayer = SnapshotReplayer(path)
+    try:
+        assert len(replayer) == 10
+        # 第7帧属于第6帧开始的关键帧区间，先向后再向前定位都应得到相同结果
+        for frame in (7, 8, 2, 9, 0, 7):
+            snapshot = replayer.seek(frame)
+            assert dict(snapshot.rows) == make_rows(frame)
+            assert snapshot.created_at == 100.0 + frame
+        assert replayer.find(104.5) == 4
+        assert replayer.find(0.0) == 0
+    finally:
+        replayer.close()
+
+
+def test_truncated_final_frame_is_ignored(tmp_path):
+    path = str(tmp_path / "truncated.pmrec")
+    record(path, range(4))
+    # 模拟录制过程中被中断: 最后一帧只写入了一部分
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 5)
+    replayer = SnapshotReplayer(path)
+    try:
+        assert len(replayer) == 3
+        assert dict(replayer.seek(10).rows) == make_rows(2)
+    finally:
+        replayer.close()
+
+
+def test_append_to_existing_recording(tmp_path):
+    path = str(tmp_path / "append.pmrec")
+    record(path, range(4))
+    record(path, range(4, 7))
+    replayer = SnapshotReplayer(path)
+    try:
+        assert len(replayer) == 7
+        assert [dict(replayer.seek(frame).rows) for frame in range(7)] == [make_rows(step) for step in range(7)]
+    finally:
+        replayer.close()
+
+    # 索引丢失时按帧头重新生成，结果相同
+    os.remove(index_path(path))
+    rebuild_index(path)
+    replayer = SnapshotReplayer(path)
+    try:
+        assert len(replayer) == 7
+        assert dict(replayer.seek(5).rows) == make_rows(5)
+    finally:
+        replayer.close()
+
+
+@pytest.mark.parametrize("damage", ["index_entry", "frame", "frame_not_indexed", "missing_index"])
+def test_append_after_interrupted_recording(tmp_path, damage):
+    path = str(tmp_path / "interrupted.pmrec")
+    record(path, range(4))
+    kept = 4
+    if damage == "index_entry":
+        # 最后一条索引只写入了一部分
+        with open(index_path(path), 'r+b') as f:
+            f.truncate(os.path.getsize(index_path(path)) - INDEX_ENTRY.size // 2)
+        kept = 3
+    elif damage == "frame":
+        # 最后一帧只写入了一部分(索引已写入)
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 5)
+        kept = 3
+    elif damage == "frame_not_indexed":
+        # 帧已完整写入，但还没来得及写索引
+        with open(index_path(path), 'r+b') as f:
+            f.truncate(3 * INDEX_ENTRY.size)
+        kept = 3
+    else:
+        os.remove(index_path(path))
+
+    record(path, range(10, 13))
+    expected = [make_rows(step) for step in range(kept)] + [make_rows(step) for step in range(10, 13)]
+    assert os.path.getsize(index_path(path)) == len(expected) * INDEX_ENTRY.size
+    replayer = SnapshotReplayer(path)
+    try:
+        assert len(replayer) == len(expected)
+        assert [dict(replayer.seek(frame).rows) for frame in range(len(expected))] == expected
+    finally:
+        replayer.close()
@@ -0,0 +1,45 @@
+"""状态文件的读写，以及命令行工具按状态文件标记隐藏进程"""
+from types import MappingProxyType
+
+from process_cli import collect_snapshot
+from process_core import ProcessRow, ProcessRule, ProcessSnapshot, RuleSet, WatchRule, load_state, save_state
+
+
+def test_state_round_trip(tmp_path):
+    path = str(tmp_path / "state.json")
+    rules = [ProcessRule('name', "notepad.exe", 'hide')]
+    watch_rules = [WatchRule('cpu', '>', 90.0, 30.0)]
+    save_state(path, rules, {(10, 1.5)}, {(11, 2.5)}, ["127.0.0.1:7711"], watch_rules)
+    assert load_state(path) == (rules, {(10, 1.5)}, {(11, 2.5)}, ["127.0.0.1:7711"], watch_rules, [])
+
+
+def test_missing_and_invalid_state(tmp_path):
+    assert load_state(str(tmp_path / "missing.json")) == ([], set(), set(), [], [], [])
+    path = tmp_path / "bad.json"
+    path.write_text("{", encoding='utf-8')
+    rules, hidden, suspended, agents, watch_rules, errors = load_state(str(path))
+    assert not hidden and len(errors) == 1
+
+
+class StaticCollector:
+    """按传入的隐藏进程键和规则返回固定的快照"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def collect(self, hidden_keys, show_hidden, rules=None):
+        rows = {(row.pid, row.create_time): row._replace(hidden=(row.pid, row.create_time) in hidden_keys)
+                for row in self.rows}
+        matches = {key: rules.match({'name': row.name, 'path': None, 'user': row.user, 'title': row.title})
+                   for key, row in rows.items()} if rules else {}
+        return ProcessSnapshot(MappingProxyType(rows), 0.0, 0.0, 0.0, 0.0, (),
+                               MappingProxyType({key: actions for key, actions in matches.items() if actions}))
+
+
+def test_cli_marks_hidden_processes():
+    collector = StaticCollector([ProcessRow(pid, float(pid), name, "", False)
+                                 for pid, name in enumerate(("a.exe", "notepad.exe", "b.exe", "killme.exe"), 1)])
+    rule_set = RuleSet([ProcessRule('name', "notepad.exe", 'hide'),
+                        ProcessRule('name', "killme.exe", 'kill')])
+    snapshot = collect_snapshot(collector, (frozenset({(3, 3.0)}), rule_set))
+    assert {key[0] for key, row in snapshot.rows.items() if row.hidden} == {2, 3}
@@ -0,0 +1,82 @@
+"""资源监控: 条件持续达到阈值后触发一次，条件中断后重新计时"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from ProcessManager_app import MetricHistory, ProcessTableModel, Watchdog
+from process_core import ProcessRow, WatchRule
+
+
+class Feed:
+    """按时间依次把快照应用到表格模型，记录资源历史并判断监控规则"""
+
+    def __init__(self, rules):
+        self.model = ProcessTableModel()
+        self.history = MetricHistory(samples=16)
+        self.watchdog = Watchdog(rules)
+
+    def step(self, now, rows):
+        rows = {(row.pid, row.create_time): row for row in rows}
+        self.model.apply_diff(*self.model.diff(rows))
+        self.model.apply_metrics(rows)
+        self.history.append(self.model, now)
+        return sorted((rule.metric, self.model.pids[row])
+                      for rule, row in self.watchdog.evaluate(self.history, self.model, now))
+
+
+def busy(pid, cpu, rss=100 << 20, create_time=None):
+    return ProcessRow(pid, float(pid) if create_time is None else create_time, f"p{pid}", "", False, "", cpu, rss)
+
+
+def test_fires_once_after_sustained_seconds():
+    feed = Feed([WatchRule('cpu', '>', 50, 10)])
+    assert feed.step(0, [busy(1, 80), busy(2, 10)]) == []
+    assert feed.step(5, [busy(1, 80), busy(2, 10)]) == []
+    assert feed.step(10, [busy(1, 80), busy(2, 10)]) == [('cpu', 1)]
+    # 条件持续成立期间不重复触发
+    assert feed.step(15, [busy(1, 90), busy(2, 10)]) == []
+
+
+def test_interrupted_condition_restarts_timer():
+    feed = Feed([WatchRule('cpu', '>', 50, 10)])
+    for now in (0, 5):
+        assert feed.step(now, [busy(1, 80)]) == []
+    assert feed.step(8, [busy(1, 20)]) == []
+    assert feed.step(12, [busy(1, 80)]) == []
+    assert feed.step(17, [busy(1, 80)]) == []
+    assert feed.step(22, [busy(1, 80)]) == [('cpu', 1)]
+    # 触发后条件中断再成立，可以再次触发
+    assert feed.step(25, [busy(1, 20)]) == []
+    assert feed.step(30, [busy(1, 80)]) == []
+    assert feed.step(40, [busy(1, 80)]) == [('cpu', 1)]
+
+
+def test_sustained_samples_and_less_than():
+    feed = Feed([WatchRule('rss', '<', 50 << 20, 3, 'samples')])
+    # 采样间隔不影响按采样数计时的规则
+    assert feed.step(0, [busy(1, 0, 10 << 20), busy(2, 0)]) == []
+    assert feed.step(0.1, [busy(1, 0, 10 << 20), busy(2, 0)]) == []
+    assert feed.step(0.2, [busy(1, 0, 10 << 20), busy(2, 0)]) == [('rss', 1)]
+
+
+def test_zero_duration_fires_immediately_and_disabled_rules_are_skipped():
+    feed = Feed([WatchRule('cpu', '>', 50, 0), WatchRule('threads', '<', 100, 0, enabled=False)])
+    assert feed.step(0, [busy(1, 80), busy(2, 10)]) == [('cpu', 1)]
+
+
+def test_growth_per_minute():
+    feed = Feed([WatchRule('rss_growth', '>', 60 << 20, 0)])
+    # 第一次采样没有增长量
+    assert feed.step(0, [busy(1, 0, 100 << 20), busy(2, 0, 100 << 20)]) == []
+    # 10秒内增长20MB，即每分钟120MB
+    assert feed.step(10, [busy(1, 0, 120 << 20), busy(2, 0, 101 << 20)]) == [('rss_growth', 1)]
+
+
+def test_new_process_does_not_inherit_state():
+    feed = Feed([WatchRule('cpu', '>', 50, 10)])
+    assert feed.step(0, [busy(1, 80)]) == []
+    assert feed.step(5, [busy(1, 80)]) == []
+    # PID 1 退出后被新进程复用(创建时间不同)，计时从头开始
+    assert feed.step(10, [busy(1, 80, create_time=9.0)]) == []
+    assert feed.step(15, [busy(1, 80, create_time=9.0)]) == []
+    assert feed.step(20, [busy(1, 80, create_time=9.0)]) == [('cpu', 1)]